@@ -0,0 +1,8 @@
+'''
+Benchmarks for the japeto package
+
+Each module can be run on its own outside of Maya and prints its timings,
+
+..python
+    mayapy -m japeto.benchmarks.nameIndex
+'''
@@ -0,0 +1,170 @@
+'''
+Counts the commands japeto.libs.attributeQueue runs against running
+every attribute edit as it is made.
+
+SceneStandIn stands in for the cmds the attribute functions use and
+counts the calls made to it, so neither Maya nor a scene is needed.
+Immediate runs the commands japeto.libs.attribute runs when no queue is
+open, Queued adds the edits to the queue the way it does while one is
+open, so the attribute module and its Maya imports are not needed
+either. Each pass does what
+the post build stages do to a rig's controls and joints: lock and hide
+channels, hide some of them again, and connect the joints to attributes
+on the rig group. The run fails if the queue leaves the attributes in a
+different state than running the edits one by one, or sets a value on
+an attribute it locked. The stand in answers far quicker than Maya does,
+so the commands are what to compare, not the time.
+
+..python
+    mayapy -m japeto.benchmarks.attributeQueue
+'''
+#import python modules
+import time
+
+#import package modules
+from japeto.libs import attributeQueue
+
+SIZES = (10, 100, 1000)
+
+#children of the compound attributes of a transform
+COMPOUNDS = {'t' : ['translateX', 'translateY', 'translateZ'],
+             'r' : ['rotateX', 'rotateY', 'rotateZ'],
+             's' : ['scaleX', 'scaleY', 'scaleZ']}
+
+class SceneStandIn(object):
+    '''
+    The parts of maya.cmds the attribute functions use, over the flags,
+    values and connections of attributes
+    '''
+    def __init__(self):
+        self.flags = dict() #<-- plug : {flag : value}
+        self.values = dict()
+        self.connections = dict() #<-- destination : source
+        self.calls = 0
+
+    def nodeType(self, node):
+        self.calls += 1
+        return 'transform'
+
+    def attributeQuery(self, attr, node = None, type = None, listChildren = False):
+        self.calls += 1
+        if attr not in COMPOUNDS and attr != 'v':
+            raise RuntimeError('No attribute named %s' % attr)
+        return list(COMPOUNDS.get(attr, [])) or None
+
+    def setAttr(self, plug, *values, **flags):
+        self.calls += 1
+        if values:
+            if self.flags.get(plug, dict()).get('lock'):
+                raise RuntimeError('The attribute %s is locked' % plug)
+            self.values[plug] = values
+        for flag, value in flags.iteritems():
+            self.flags.setdefault(plug, dict())[{'l' : 'lock', 'k' : 'keyable'}.get(flag, flag)] = value
+
+    def connectAttr(self, source, destination, f = False):
+        self.calls += 1
+        if self.flags.get(destination, dict()).get('lock'):
+            raise RuntimeError('The attribute %s is locked' % destination)
+        self.connections[destination] = source
+
+    def getAttr(self, plug, type = False):
+        self.calls += 1
+        return 'double'
+
+    def undoInfo(self, **kwargs):
+        self.calls += 1
+
+    def state(self):
+        return self.flags, self.values, self.connections
+
+#---------------------------------------------
+#The attribute functions
+#---------------------------------------------
+class Immediate(object):
+    '''
+    The commands lock(), hide(), connect() and setValue() of
+    japeto.libs.attribute run when no queue is open
+    '''
+    def __init__(self, scene):
+        self.scene = scene
+
+    def lockAndHide(self, attrs, node):
+        for attr in attrs:
+            self.lock(attr, node)
+            self.hide(attr, node)
+
+    def lock(self, attr, node):
+        self.scene.setAttr('%s.%s' % (node, attr), lock = True)
+
+    def hide(self, attr, node):
+        children = self.scene.attributeQuery(attr, node = node, listChildren = True)
+        for child in children or [attr]:
+            self.scene.setAttr('%s.%s' % (node, child), keyable = False)
+
+    def connect(self, source, destination):
+        self.scene.connectAttr(source, destination, f = True)
+
+    def setValue(self, attr, node, value):
+        self.scene.setAttr('%s.%s' % (node, attr), value)
+
+class Queued(Immediate):
+    '''
+    The edits lock(), hide(), connect() and setValue() of
+    japeto.libs.attribute add to the open queue
+    '''
+    def lock(self, attr, node):
+        attributeQueue.current().setFlags('%s.%s' % (node, attr), lock = True)
+
+    def hide(self, attr, node):
+        attributeQueue.current().hide(node, attr)
+
+    def connect(self, source, destination):
+        attributeQueue.current().connect(source, destination, True)
+
+    def setValue(self, attr, node, value):
+        attributeQueue.current().setValue('%s.%s' % (node, attr), value)
+
+def postBuild(edit, count):
+    controls = ['ctrl%s' % i for i in xrange(count)]
+    joints = ['jnt%s' % i for i in xrange(count)]
+    for grp in ('rig_grp', 'skeleton_grp', 'guides_grp'):
+        edit.lockAndHide(['t', 'r', 's', 'v'], grp)
+    for ctrl in controls:
+        edit.setValue('v', ctrl, 1)
+        edit.lockAndHide(['s', 'v'], ctrl)
+    for jnt in joints:
+        edit.connect('rig_grp.jointVis', '%s.v' % jnt)
+        edit.connect('rig_grp.displayJnts', '%s.overrideDisplayType' % jnt)
+        edit.connect('rig_grp.uniformScale', '%s.sx' % jnt)
+    #components lock and hide what the rig has already
+    for ctrl in controls:
+        edit.lockAndHide(['s', 'v'], ctrl)
+        edit.hide('r', ctrl)
+    for jnt in joints:
+        edit.connect('rig_grp.jointVis', '%s.v' % jnt)
+
+def run(sizes = SIZES):
+    cmds = attributeQueue.cmds
+    print '%8s %10s %10s %10s' % ('controls', '', 'time', 'commands')
+    try:
+        for count in sizes:
+            states = dict()
+            for label in ('immediate', 'queued'):
+                scene = SceneStandIn()
+                attributeQueue.cmds = scene
+                start = time.time()
+                if label == 'queued':
+                    with attributeQueue.queued():
+                        postBuild(Queued(scene), count)
+                else:
+                    postBuild(Immediate(scene), count)
+                seconds = time.time() - start
+                states[label] = scene.state()
+                print '%8d %10s %9.3fs %10d' % (count, label, seconds, scene.calls)
+            if states['queued'] != states['immediate']:
+                raise RuntimeError('The queue left %s controls in a different state' % count)
+    finally:
+        attributeQueue.cmds = cmds
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,66 @@
+'''
+Benchmarks japeto.mlRig.ml_attribute.MlAttribute.setValue().
+
+Sets 1,000,000 values on a mix of attribute types and compares the setter
+dispatch tables against the old setValue(), which built a string of python
+and ran it through eval() for every value.
+
+..python
+    mayapy -m japeto.benchmarks.attributeSet
+'''
+#import python modules
+import timeit
+
+#import package modules
+from japeto.mlRig import ml_attribute
+
+COUNT = 1000000
+
+#attribute name, attribute type, values to cycle through
+CASES = (('stretch', None, (True, False)),
+         ('numJoints', None, (2, 3)),
+         ('controlScale', None, (1.0, 1.5)),
+         ('parentHook', None, ('l_arm_bind_jnt', 'r_arm_bind_jnt')),
+         ('fingers', None, (['thumb', 'index'], ['thumb', 'index', 'middle'])),
+         ('position', 'vector', ([0.0, 1.0, 0.0], [2.0, 10.0, 0.0])))
+
+class LegacyAttribute(ml_attribute.MlAttribute):
+    '''
+    MlAttribute with setValue() as it was before the dispatch tables
+    '''
+    __slots__ = ('__legacyValue',)
+
+    def setValue(self, value):
+        #build the command
+        if isinstance(value, basestring):
+            cmd = "self._set%s('%s')" % (type(value).__name__.title(), value)
+        else:
+            cmd = 'self._set%s(%s)' % (type(value).__name__.title(), value)
+
+        #execute the command
+        self.__legacyValue = eval(cmd)
+
+def timeCase(cls, attrType, values, count):
+    attr = cls('benchmark', value = values[0], attrType = attrType)
+    setValue = attr.setValue
+    def loop():
+        for i in xrange(count // 2):
+            setValue(values[0])
+            setValue(values[1])
+    return min(timeit.repeat(loop, repeat = 3, number = 1))
+
+def run(count = COUNT):
+    print '%14s %14s %14s %10s' % ('attribute', 'table (s)', 'eval (s)', 'speedup')
+    totalTable = 0.0
+    totalEval  = 0.0
+    for name, attrType, values in CASES:
+        table = timeCase(ml_attribute.MlAttribute, attrType, values, count)
+        legacy = timeCase(LegacyAttribute, attrType, values, count)
+        totalTable += table
+        totalEval += legacy
+        print '%14s %14.3f %14.3f %9.1fx' % (name, table, legacy, legacy / table)
+
+    print '%14s %14.3f %14.3f %9.1fx' % ('total', totalTable, totalEval, totalEval / totalTable)
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,149 @@
+'''
+Memory benchmark for the slotted japeto.mlRig.ml_node.MlNode and
+japeto.mlRig.ml_attribute.MlAttribute.
+
+Builds the same graph with the current classes and with a copy of the old
+layout (a __dict__ per instance and two ordereddict based dicts created
+with every node) and compares the memory they take.
+
+Uses tracemalloc when it is available (python 3, or pytracemalloc on 2.7).
+Otherwise the objects reachable from the graph are walked and measured
+with sys.getsizeof, which undercounts the allocator overhead a little.
+
+..python
+    mayapy -m japeto.benchmarks.memory
+'''
+#import python modules
+import gc
+import sys
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+#import package modules
+from japeto.libs import ordereddict
+from japeto.mlRig import ml_attribute
+from japeto.mlRig import ml_node
+
+SIZES = (10000, 100000)
+
+class LegacyAttribute(object):
+    '''
+    MlAttribute as it was laid out before __slots__
+    '''
+    def __init__(self, longName, value):
+        self.__name        = longName
+        self.__shortName   = None
+        self.__value       = value
+        self.__storable    = True
+        self.__connectable = True
+        self.__type        = type(value).__name__
+
+    def name(self):
+        return self.__name
+
+
+class LegacyNode(object):
+    '''
+    MlNode as it was laid out before __slots__
+    '''
+    def __init__(self, name, parent = None):
+        self.__name = name
+        self.__parent = parent
+        self.__children = ordereddict.OrderedDict()
+        self.__attributes = ordereddict.OrderedDict()
+        self.__enabled = True
+        self.__dirty = True
+        self.__running = False
+        self.__color = (255,255,255)
+        self.niceName = str()
+        if parent:
+            parent._LegacyNode__children[self.name] = self
+
+    def name(self):
+        return self.__name
+
+    def addAttribute(self, attr, value):
+        self.__attributes[attr] = LegacyAttribute(attr, value)
+
+
+def buildLegacy(size, attributes):
+    root = LegacyNode('node0')
+    nodes = [root]
+    for i in xrange(1, size):
+        node = LegacyNode('node%s' % i, nodes[(i - 1) // 4])
+        for a in xrange(attributes):
+            node.addAttribute('attr%s' % a, float(a))
+        nodes.append(node)
+    return nodes
+
+def buildCurrent(size, attributes):
+    root = ml_node.MlNode('node0')
+    nodes = [root]
+    for i in xrange(1, size):
+        node = ml_node.MlNode('node%s' % i, nodes[(i - 1) // 4])
+        for a in xrange(attributes):
+            node.addAttribute('attr%s' % a, float(a))
+        nodes.append(node)
+    return nodes
+
+def _deepSize(root):
+    '''
+    Adds up sys.getsizeof for every object reachable from root, without
+    following classes, functions or modules.
+    '''
+    skip = (type, type(_deepSize), type(sys))
+    seen = set()
+    stack = [root]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, skip):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        if hasattr(obj, '__dict__'):
+            stack.append(obj.__dict__)
+        for cls in type(obj).__mro__:
+            for slot in cls.__dict__.get('__slots__', ()):
+                if slot.startswith('__') and not slot.endswith('__'):
+                    slot = '_%s%s' % (cls.__name__.lstrip('_'), slot)
+                if hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+    return total
+
+def measure(build, size, attributes):
+    '''
+    Returns the bytes taken by the nodes build() creates
+    '''
+    gc.collect()
+    if tracemalloc:
+        tracemalloc.start()
+        nodes = build(size, attributes)
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return current
+
+    nodes = build(size, attributes)
+    return _deepSize(nodes)
+
+def run(sizes = SIZES, attributes = 2):
+    if not tracemalloc:
+        print 'tracemalloc is not available, measuring with sys.getsizeof'
+    print '%8s %16s %16s %10s' % ('nodes', 'legacy (MB)', 'slots (MB)', 'ratio')
+    for size in sizes:
+        legacy = measure(buildLegacy, size, attributes)
+        current = measure(buildCurrent, size, attributes)
+        print '%8d %16.2f %16.2f %9.2fx' % (size, legacy / 1048576.0,
+                                            current / 1048576.0,
+                                            float(legacy) / current)
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,117 @@
+'''
+Micro benchmarks for japeto.mlRig.ml_dict.MlDict
+
+Compares MlDict, built on libs.indexeddict.IndexedOrderedDict, against
+the implementation it replaced, which rebuilt a libs.ordereddict.OrderedDict
+on every positional add or move.
+
+..python
+    mayapy -m japeto.benchmarks.mlDict
+'''
+#import python modules
+import random
+import timeit
+
+#import package modules
+from japeto.libs import ordereddict
+from japeto.mlRig import ml_dict
+
+SIZES = (100, 500, 1000)
+
+class LegacyMlDict(ordereddict.OrderedDict):
+    '''
+    MlDict.add and MlDict.move as they were on top of ordereddict
+    '''
+    def add(self, key, value, index = None):
+        if self.keys():
+            keys = self.keys()
+            values = self.values()
+            if not self.has_key(key):
+                if index > len(self.keys()):
+                    keys.append(key)
+                    values.append(value)
+                else:
+                    keys.insert(index,key)
+                    values.insert(index,value)
+            elif self.has_key(key):
+                self.move(key, index)
+                if value != self[key]:
+                    self[key] = value
+                return
+            self.clear()
+            for k,v in zip(keys, values):
+                self[k] = v
+        else:
+            self[key] = value
+
+    def move(self, key, index):
+        keys = self.keys()
+        values = self.values()
+        originalIndex = keys.index(key)
+        key = keys.pop(originalIndex)
+        value = values.pop(originalIndex)
+        keys.insert(index, key)
+        values.insert(index, value)
+        self.clear()
+        for k,v in zip(keys, values):
+            self[k] = v
+
+    def index(self, key):
+        return self.keys().index(key)
+
+    def itemAtIndex(self, index):
+        return self.items()[index]
+
+def _append(cls, size):
+    d = cls()
+    for i in xrange(size):
+        d.add(i, i, len(d))
+    return d
+
+def _insert(cls, size, positions):
+    d = cls()
+    for i in xrange(size):
+        d.add(i, i, positions[i] % (i + 1))
+    return d
+
+def _move(d, keys, positions):
+    for key, index in zip(keys, positions):
+        d.move(key, index)
+
+def _index(d, keys):
+    for key in keys:
+        d.index(key)
+
+def _itemAtIndex(d, positions):
+    for index in positions:
+        d.itemAtIndex(index)
+
+def run(sizes = SIZES, repeat = 3):
+    random.seed(0)
+    print '%8s %14s %14s %14s %10s' % ('size', 'operation', 'legacy (ms)',
+                                       'MlDict (ms)', 'speedup')
+    for size in sizes:
+        positions = [random.randint(0, size - 1) for i in xrange(size)]
+        keys = [random.randint(0, size - 1) for i in xrange(size)]
+        
+        for name, test in (('append', lambda cls: _append(cls, size)),
+                           ('insert', lambda cls: _insert(cls, size, positions)),
+                           ('move', lambda cls: _move(d[cls], keys, positions)),
+                           ('index', lambda cls: _index(d[cls], keys)),
+                           ('itemAtIndex', lambda cls: _itemAtIndex(d[cls], positions))):
+            d = {LegacyMlDict : _append(LegacyMlDict, size),
+                 ml_dict.MlDict : _append(ml_dict.MlDict, size)}
+            
+            #the legacy moves and inserts are quadratic, so only time them once
+            legacyRepeat = 1 if size > 500 else repeat
+            legacy = min(timeit.repeat(lambda: test(LegacyMlDict),
+                                       repeat = legacyRepeat, number = 1))
+            current = min(timeit.repeat(lambda: test(ml_dict.MlDict),
+                                        repeat = repeat, number = 1))
+            
+            print '%8d %14s %14.3f %14.3f %9.1fx' % (size, name, legacy * 1e3,
+                                                     current * 1e3,
+                                                     legacy / current)
+
+if __name__ == '__main__':
+    run()
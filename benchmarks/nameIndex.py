@@ -0,0 +1,76 @@
+'''
+Benchmarks the name index on japeto.mlRig.ml_graph.MlGraph.
+
+Times getNodeByName() and registration (the same lookup of the parent by
+name that templates.rig.Rig.register does) against the size of the graph,
+and compares both to the linear scan of MlGraph.nodes() used previously.
+
+..python
+    mayapy -m japeto.benchmarks.nameIndex
+'''
+#import python modules
+import timeit
+
+#import package modules
+from japeto.mlRig import ml_graph
+from japeto.mlRig import ml_node
+
+SIZES = (50, 100, 200, 400, 800, 1600)
+
+def linearLookup(graph, name):
+    '''
+    The lookup getNodeByName() used before the name index.
+    '''
+    for node in graph.nodes():
+        if name == node.name():
+            return node
+    return None
+
+def buildGraph(size, lookup = None):
+    '''
+    Builds a graph with the given number of nodes. Every node is parented
+    under the node registered 3 registrations earlier, which gives a
+    mix of wide and deep branches like the rig templates.
+    
+    :param size: Number of nodes to add to the graph
+    :type size: int
+    
+    :param lookup: Function used to find the parent by name
+    :type lookup: function
+    '''
+    graph = ml_graph.MlGraph('benchmark')
+    if not lookup:
+        lookup = ml_graph.MlGraph.getNodeByName
+    
+    for i in range(size):
+        parent = None
+        if i > 2:
+            parent = lookup(graph, 'node%s' % (i - 3))
+        graph.addNode(ml_node.MlNode('node%s' % i), parent)
+    
+    return graph
+
+def run(sizes = SIZES, repeat = 3):
+    print '%8s %14s %14s %14s %14s' % ('nodes', 'lookup (us)', 'linear (us)',
+                                       'register (ms)', 'linear (ms)')
+    for size in sizes:
+        graph = buildGraph(size)
+        names = graph.nodeNames()
+        
+        indexed = min(timeit.repeat(lambda: [graph.getNodeByName(n) for n in names],
+                                    repeat = repeat, number = 1))
+        linear  = min(timeit.repeat(lambda: [linearLookup(graph, n) for n in names],
+                                    repeat = repeat, number = 1))
+        register = min(timeit.repeat(lambda: buildGraph(size),
+                                     repeat = repeat, number = 1))
+        linearRegister = min(timeit.repeat(lambda: buildGraph(size, linearLookup),
+                                           repeat = repeat, number = 1))
+        
+        print '%8d %14.3f %14.3f %14.3f %14.3f' % (size,
+                                                   indexed / size * 1e6,
+                                                   linear / size * 1e6,
+                                                   register * 1e3,
+                                                   linearRegister * 1e3)
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,98 @@
+'''
+Benchmarks japeto.libs.naming.NameRegistry against the checkName that
+asked the scene about every padded name it tried.
+
+SceneStandIn stands in for cmds.ls, cmds.objExists and cmds.createNode
+and counts the calls made to it, so neither Maya nor a scene is needed.
+Every name handed out is created in the stand in, and the run fails if a
+name is handed out twice.
+
+..python
+    mayapy -m japeto.benchmarks.nameRegistry
+'''
+#import python modules
+import time
+
+#import package modules
+from japeto.libs import naming
+
+SIZES = ((1000, 10), (10000, 100), (10000, 1000))
+
+class SceneStandIn(object):
+    '''
+    The parts of maya.cmds naming uses, over a set of names
+    '''
+    def __init__(self, names = ()):
+        self.names = set(names)
+        self.calls = 0
+
+    def ls(self, *args, **kwargs):
+        self.calls += 1
+        return list(self.names)
+
+    def objExists(self, name):
+        self.calls += 1
+        return name in self.names
+
+    def createNode(self, type, n = None, name = None):
+        self.calls += 1
+        name = n or name
+        if name in self.names:
+            raise RuntimeError('%s was handed out twice' % name)
+        self.names.add(name)
+        return name
+
+#---------------------------------------------
+#checkName before the registry
+#---------------------------------------------
+def legacyCheckName(scene, name, i = 1):
+    if scene.objExists(name):
+        name = '%s_%s' % (name, naming.padNumber(i, naming.PADDING))
+        return legacyCheckName(scene, name, i + 1)
+    return name
+
+def createLegacy(scene, bases, count):
+    for i in xrange(count):
+        scene.createNode('transform', n = legacyCheckName(scene, bases[i % len(bases)]))
+
+def createRegistry(scene, bases, count):
+    #what common.checkName() does while a registry is open
+    with naming.nameRegistry() as registry:
+        for i in xrange(count):
+            naming.registerName(scene.createNode('transform', n = registry.uniqueName(bases[i % len(bases)])))
+
+def createBatch(scene, bases, count):
+    #what common.generateNames() does with unique names
+    names = [naming.DELIMITER.join([naming.LEFT, bases[i % len(bases)], 'grp']) for i in xrange(count)]
+    with naming.nameRegistry() as registry:
+        names = [registry.uniqueName(name) for name in names]
+    for name in names:
+        scene.createNode('transform', n = name)
+
+def run(sizes = SIZES):
+    cmds = naming.cmds
+    print '%8s %8s %10s %10s %12s' % ('nodes', 'bases', '', 'time', 'scene calls')
+    try:
+        for count, baseCount in sizes:
+            bases = ['node%s' % i for i in range(baseCount)]
+            for label, create in (('legacy', createLegacy),
+                                  ('registry', createRegistry),
+                                  ('batch', createBatch)):
+                #the legacy checkName nests its padding, and recurses once a
+                #collision, so keep it to sizes it can get through
+                if create is createLegacy and count // baseCount > 100:
+                    print '%8d %8d %10s %10s %12s' % (count, baseCount, label, '-', '-')
+                    continue
+                scene = SceneStandIn()
+                naming.cmds = scene
+                start = time.time()
+                create(scene, bases, count)
+                seconds = time.time() - start
+                if len(scene.names) != count:
+                    raise RuntimeError('%s created %s nodes, expected %s' % (label, len(scene.names), count))
+                print '%8d %8d %10s %9.3fs %12d' % (count, baseCount, label, seconds, scene.calls)
+    finally:
+        naming.cmds = cmds
+
+if __name__ == '__main__':
+    run()
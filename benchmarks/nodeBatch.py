@@ -0,0 +1,206 @@
+'''
+Counts the commands it takes to create the hierarchies of a rig one node
+at a time, the way Rig.preBuild(), Component.setupRig(), Component.rig()
+and Component.setupCtrl() did, against declaring them in a
+japeto.libs.nodeBatch.NodeBatch that is created with one command.
+
+Neither needs Maya. SceneStandIn stands in for the cmds the node at a
+time path uses and for the nodeBatch command, and counts the calls made
+to it. The run fails if the batch does not build the same nodes, under
+the same parents, with the same values. The stand in answers far
+quicker than Maya does and the batch pays for encoding and decoding its
+records, so the commands are what to compare, not the time.
+
+..python
+    python -m japeto.benchmarks.nodeBatch
+'''
+#import python modules
+import time
+
+#import package modules
+from japeto.libs import nodeBatch
+
+#components, guides a component
+SIZES = ((10, 5), (100, 5), (1000, 10))
+
+class SceneStandIn(object):
+    '''
+    Nodes with their types, parents and values
+    '''
+    def __init__(self):
+        self.nodes = dict() #<-- name : [type, parent]
+        self.children = dict() #<-- parent : set of children
+        self.values = dict()
+        self.calls = 0
+        self.__counters = dict() #<-- base name : next number to try
+
+    def __uniqueName(self, name, type):
+        base = name or type
+        name = name or '%s1' % type
+        i = self.__counters.get(base, 1)
+        while name in self.nodes:
+            name = '%s%s' % (base, i)
+            i += 1
+        self.__counters[base] = i
+        return name
+
+    def createNode(self, type, n = None, p = None):
+        self.calls += 1
+        if type == 'implicitSphere':
+            #shapes made without a parent get a transform made for them
+            p = self.__uniqueName(None, 'transform')
+            self.nodes[p] = ['transform', None]
+        name = self.__uniqueName(n, type)
+        self.__add(name, type, p)
+        return name
+
+    def __add(self, name, type, parent):
+        self.nodes[name] = [type, parent]
+        self.children.setdefault(parent, set()).add(name)
+
+    def parent(self, nodes, parent):
+        self.calls += 1
+        for node in nodes if isinstance(nodes, list) else [nodes]:
+            self.children[self.nodes[node][1]].discard(node)
+            self.children.setdefault(parent, set()).add(node)
+            self.nodes[node][1] = parent
+
+    def listRelatives(self, node, p = False):
+        self.calls += 1
+        return [self.nodes[node][1]]
+
+    def rename(self, node, name):
+        self.calls += 1
+        self.nodes[name] = self.nodes.pop(node)
+        siblings = self.children[self.nodes[name][1]]
+        siblings.discard(node)
+        siblings.add(name)
+        self.children[name] = self.children.pop(node, set())
+        for child in self.children[name]:
+            self.nodes[child][1] = name
+        return name
+
+    def setAttr(self, plug, value):
+        self.calls += 1
+        self.values[plug] = value
+
+    def nodeBatch(self, batch = None):
+        self.calls += 1
+        names = list()
+        for type, name, parent, attributes in nodeBatch.decode(batch):
+            if isinstance(parent, int):
+                parent = names[parent]
+            name = self.__uniqueName(name, type)
+            self.__add(name, type, parent)
+            for attr, value in attributes:
+                self.values['%s.%s' % (name, attr)] = value
+            names.append(name)
+        return names
+
+#---------------------------------------------
+#One node at a time
+#---------------------------------------------
+def buildLegacy(scene, componentCount, guideCount):
+    cmds = scene
+    cmds.createNode('rig', n = 'rig')
+    cmds.createNode('transform', n = 'noXform_grp')
+    cmds.createNode('transform', n = 'joints_grp')
+    cmds.createNode('transform', n = 'controls_grp')
+    cmds.parent(['noXform_grp', 'joints_grp', 'controls_grp'], 'rig')
+    cmds.setAttr('noXform_grp.inheritsTransform', 0)
+
+    for i in xrange(componentCount):
+        name = 'c%s' % i
+        cmds.createNode('transform', n = '%s_setup_grp' % name)
+        cmds.createNode('transform', n = '%s_skeleton_grp' % name)
+        cmds.createNode('transform', n = '%s_guides_grp' % name)
+        cmds.parent('%s_skeleton_grp' % name, '%s_setup_grp' % name)
+        cmds.parent('%s_guides_grp' % name, '%s_setup_grp' % name)
+        for j in xrange(guideCount):
+            guide = '%s_%s' % (name, j)
+            guideZero = cmds.createNode('transform', n = '%s_zero' % guide)
+            guideShape = cmds.createNode('implicitSphere', n = '%s_guideShape' % guide)
+            transform = cmds.listRelatives(guideShape, p = True)[0]
+            guideNode = cmds.rename(transform, '%s_guide' % guide)
+            cmds.parent(guideNode, guideZero)
+        cmds.createNode('transform', n = '%s_rig_grp' % name)
+        cmds.createNode('transform', n = '%s_jnts_grp' % name)
+        cmds.createNode('transform', n = '%s_ctrls_grp' % name)
+        cmds.parent(['%s_jnts_grp' % name, '%s_ctrls_grp' % name], '%s_rig_grp' % name)
+
+#---------------------------------------------
+#Batches
+#---------------------------------------------
+def execute(scene, nodes):
+    nodes.resolve(scene.nodeBatch(batch = nodes.encode()))
+
+def buildBatch(scene, componentCount, guideCount):
+    nodes = nodeBatch.NodeBatch()
+    rig = nodes.createNode('rig', 'rig')
+    nodes.createNode('transform', 'noXform_grp', parent = rig, attributes = {'inheritsTransform' : 0})
+    nodes.createNode('transform', 'joints_grp', parent = rig)
+    nodes.createNode('transform', 'controls_grp', parent = rig)
+    execute(scene, nodes)
+
+    for i in xrange(componentCount):
+        name = 'c%s' % i
+        nodes = nodeBatch.NodeBatch()
+        setupGrp = nodes.createNode('transform', '%s_setup_grp' % name)
+        nodes.createNode('transform', '%s_skeleton_grp' % name, parent = setupGrp)
+        nodes.createNode('transform', '%s_guides_grp' % name, parent = setupGrp)
+        execute(scene, nodes)
+        for j in xrange(guideCount):
+            guide = '%s_%s' % (name, j)
+            nodes = nodeBatch.NodeBatch()
+            guideZero = nodes.createNode('transform', '%s_zero' % guide)
+            guideNode = nodes.createNode('transform', '%s_guide' % guide, parent = guideZero)
+            nodes.createNode('implicitSphere', '%s_guideShape' % guide, parent = guideNode)
+            execute(scene, nodes)
+        nodes = nodeBatch.NodeBatch()
+        rigGrp = nodes.createNode('transform', '%s_rig_grp' % name)
+        nodes.createNode('transform', '%s_jnts_grp' % name, parent = rigGrp)
+        nodes.createNode('transform', '%s_ctrls_grp' % name, parent = rigGrp)
+        execute(scene, nodes)
+
+def buildOneBatch(scene, componentCount, guideCount):
+    '''
+    Every node of the rig in a single batch
+    '''
+    nodes = nodeBatch.NodeBatch()
+    rig = nodes.createNode('rig', 'rig')
+    nodes.createNode('transform', 'noXform_grp', parent = rig, attributes = {'inheritsTransform' : 0})
+    nodes.createNode('transform', 'joints_grp', parent = rig)
+    nodes.createNode('transform', 'controls_grp', parent = rig)
+    for i in xrange(componentCount):
+        name = 'c%s' % i
+        setupGrp = nodes.createNode('transform', '%s_setup_grp' % name)
+        nodes.createNode('transform', '%s_skeleton_grp' % name, parent = setupGrp)
+        nodes.createNode('transform', '%s_guides_grp' % name, parent = setupGrp)
+        for j in xrange(guideCount):
+            guide = '%s_%s' % (name, j)
+            guideZero = nodes.createNode('transform', '%s_zero' % guide)
+            guideNode = nodes.createNode('transform', '%s_guide' % guide, parent = guideZero)
+            nodes.createNode('implicitSphere', '%s_guideShape' % guide, parent = guideNode)
+        rigGrp = nodes.createNode('transform', '%s_rig_grp' % name)
+        nodes.createNode('transform', '%s_jnts_grp' % name, parent = rigGrp)
+        nodes.createNode('transform', '%s_ctrls_grp' % name, parent = rigGrp)
+    execute(scene, nodes)
+
+def run(sizes = SIZES):
+    print '%10s %6s %10s %10s %10s %10s' % ('components', 'guides', 'nodes', '', 'time', 'commands')
+    for componentCount, guideCount in sizes:
+        legacy = None
+        for label, build in (('legacy', buildLegacy), ('batches', buildBatch), ('one batch', buildOneBatch)):
+            scene = SceneStandIn()
+            start = time.time()
+            build(scene, componentCount, guideCount)
+            seconds = time.time() - start
+            print '%10d %6d %10d %10s %9.3fs %10d' % (componentCount, guideCount, len(scene.nodes),
+                                                      label, seconds, scene.calls)
+            if legacy is None:
+                legacy = scene
+            elif scene.nodes != legacy.nodes or scene.values != legacy.values:
+                raise RuntimeError('%s did not build the same nodes with %s components' % (label, componentCount))
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,49 @@
+'''
+Benchmarks what japeto.mlRig.profiler costs MlNode.execute().
+
+Times executing a node with an empty function with profiling off, with
+profiling on, and against calling the function straight, so the cost
+of leaving the profiler hooked in while it is off can be checked.
+
+..python
+    mayapy -m japeto.benchmarks.profiler
+'''
+#import python modules
+import time
+
+#import package modules
+from japeto.mlRig import ml_node
+from japeto.mlRig import profiler
+
+CALLS = 200000
+
+def noop():
+    pass
+
+def timed(func, calls):
+    start = time.time()
+    for i in xrange(calls):
+        func()
+    return time.time() - start
+
+def run(calls = CALLS):
+    node = ml_node.MlNode('benchmark')
+    node.setFunction(noop)
+
+    previous = profiler.disable()
+    try:
+        direct = timed(noop, calls)
+        off = timed(node.execute, calls)
+        with profiler.profile() as p:
+            on = timed(node.execute, calls)
+    finally:
+        if previous:
+            profiler.enable(previous)
+
+    print '%-12s %10s %14s' % ('', 'total', 'per call')
+    for label, total in (('direct', direct), ('off', off), ('on', on)):
+        print '%-12s %9.3fs %12.3fus' % (label, total, total / calls * 1e6)
+    print '%d spans recorded' % len(p.spans())
+
+if __name__ == '__main__':
+    run()
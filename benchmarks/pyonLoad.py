@@ -0,0 +1,93 @@
+'''
+Benchmarks japeto.libs.pyon.load() against eval() and ast.literal_eval().
+
+Writes a weight file shaped like the ones SkinCluster.saveWeights() writes,
+with 1,000,000 weights split over a set of influences, and times reading
+it back with each of them. The file is checked to read back the same
+every way.
+
+..python
+    mayapy -m japeto.benchmarks.pyonLoad
+'''
+#import python modules
+import ast
+import os
+import random
+import tempfile
+import time
+
+#import package modules
+from japeto.libs import pyon
+
+WEIGHTS = 1000000
+INFLUENCES = 50
+
+def buildWeights(count = WEIGHTS, influences = INFLUENCES):
+    '''
+    Returns weight data with the given number of weights in total
+
+    :param count: Number of weights, split evenly over the influences
+    :type count: int
+
+    :param influences: Number of influences
+    :type influences: int
+    '''
+    random.seed(0)
+    vertices = count // influences
+    data = dict()
+    data['name'] = 'body_skinCluster'
+    data['skinningMethod'] = 0
+    data['normalizeWeights'] = 1
+    data['weights'] = dict()
+    for i in range(influences):
+        data['weights']['joint%s' % i] = [round(random.random(), 3) for v in xrange(vertices)]
+    data['blendWeights'] = [0.0] * vertices
+    return data
+
+def timed(func, *args):
+    start = time.time()
+    result = func(*args)
+    return time.time() - start, result
+
+def readEval(filepath):
+    f = open(filepath, 'r')
+    try:
+        return eval(f.read())
+    finally:
+        f.close()
+
+def readLiteralEval(filepath):
+    f = open(filepath, 'r')
+    try:
+        return ast.literal_eval(f.read())
+    finally:
+        f.close()
+
+def readArrays(filepath):
+    return pyon.load(filepath, arrays = True)
+
+def run(count = WEIGHTS):
+    filepath = os.path.join(tempfile.gettempdir(), 'benchmark.wts')
+    pyon.save(buildWeights(count), filepath)
+    try:
+        print '%d weights, %d kb' % (count, os.path.getsize(filepath) // 1024)
+        expected = None
+        for label, func in (('eval', readEval),
+                            ('literal_eval', readLiteralEval),
+                            ('pyon.load', pyon.load),
+                            ('pyon.load arrays', readArrays)):
+            seconds, data = timed(func, filepath)
+            if func is readArrays:
+                for name, weights in data['weights'].items():
+                    data['weights'][name] = weights.tolist()
+                data['blendWeights'] = data['blendWeights'].tolist()
+            if expected is None:
+                expected = data
+            elif data != expected:
+                raise RuntimeError('%s did not read back the same data' % label)
+            print '%-18s %8.3fs' % (label, seconds)
+    finally:
+        os.remove(filepath)
+
+if __name__ == '__main__':
+    run()
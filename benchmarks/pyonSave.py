@@ -0,0 +1,96 @@
+'''
+Benchmarks japeto.libs.pyon.save() against the old Encoder, which built
+the whole document as one string before writing it.
+
+Saves the same 1,000,000 weight data japeto.benchmarks.pyonLoad reads,
+and reports the time taken and the longest string handed to write().
+
+..python
+    mayapy -m japeto.benchmarks.pyonSave
+'''
+#import python modules
+import os
+import tempfile
+import time
+
+#import package modules
+from japeto.libs import pyon
+from japeto.benchmarks import pyonLoad
+
+class LegacyEncoder(object):
+    '''
+    pyon.Encoder as it was before it wrote to a file object
+    '''
+    def __init__(self, indent = 4, precision = 3):
+        self.indent    = indent
+        self.precision = precision
+        self.__depth__ = 0
+
+    def encode(self, obj):
+        if isinstance(obj, bool):
+            return 'True' if obj else 'False'
+        elif isinstance(obj, int):
+            return '%i' % obj
+        elif isinstance(obj, float):
+            return ('%.' + str(self.precision) + 'f') % obj
+        elif isinstance(obj, str):
+            return '"%s"' % obj
+        elif isinstance(obj, list):
+            items = range(len(obj))
+            for i, value in enumerate(obj):
+                items[i] = self.encode(value)
+            return '[%s]' % ', '.join(items)
+        elif isinstance(obj, dict):
+            self.__depth__ += 1
+            items = range(len(obj))
+            for i, k in enumerate(obj.keys()):
+                items[i] = '%s%s: %s' % (' ' * self.indent * self.__depth__, self.encode(k), self.encode(obj[k]))
+            self.__depth__ -= 1
+            return '\n%s{\n%s\n%s}' % (' ' * self.indent * self.__depth__, ',\n'.join(items), ' ' * self.indent * self.__depth__)
+
+class LongestWrite(object):
+    '''
+    File object that wraps another and remembers the longest write
+    '''
+    def __init__(self, f):
+        self.f = f
+        self.longest = 0
+
+    def write(self, data):
+        self.longest = max(self.longest, len(data))
+        self.f.write(data)
+
+def saveLegacy(data, filepath):
+    f = LongestWrite(open(filepath, 'w'))
+    f.write(LegacyEncoder().encode(data))
+    f.f.close()
+    return f.longest
+
+def saveStreamed(data, filepath):
+    f = LongestWrite(open(filepath, 'w'))
+    pyon.Encoder().write(data, f)
+    f.f.close()
+    return f.longest
+
+def run(count = pyonLoad.WEIGHTS):
+    data = pyonLoad.buildWeights(count)
+    legacyPath = os.path.join(tempfile.gettempdir(), 'benchmarkLegacy.wts')
+    streamedPath = os.path.join(tempfile.gettempdir(), 'benchmarkStreamed.wts')
+    try:
+        print '%d weights' % count
+        print '%-10s %10s %16s' % ('', 'time', 'longest write')
+        for label, func, filepath in (('legacy', saveLegacy, legacyPath),
+                                      ('streamed', saveStreamed, streamedPath)):
+            start = time.time()
+            longest = func(data, filepath)
+            print '%-10s %9.3fs %13d kb' % (label, time.time() - start, longest // 1024)
+
+        if pyon.load(legacyPath) != pyon.load(streamedPath):
+            raise RuntimeError('Streamed file does not read back the same as the legacy file')
+    finally:
+        for filepath in (legacyPath, streamedPath):
+            if os.path.exists(filepath):
+                os.remove(filepath)
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,152 @@
+'''
+Benchmarks japeto.libs.queryCache against asking the scene every time.
+
+SceneStandIn stands in for the queries and the parent command, and
+counts the calls made to it, so neither Maya nor a scene is needed. It invalidates the
+cache the way the Maya messages do when a node is reparented. Each pass
+does what Component.rig(), Component.postRig() and Rig.build() do with
+their joints, and the run fails if the cache answers anything the scene
+would not have. The stand in answers far quicker than Maya does, so the
+scene calls are what to compare, not the time.
+
+..python
+    mayapy -m japeto.benchmarks.queryCache
+'''
+#import python modules
+import time
+
+#import package modules
+from japeto.libs import queryCache
+
+SIZES = (100, 1000, 10000)
+
+class SceneStandIn(object):
+    '''
+    The parts of maya.cmds the query functions use, over a hierarchy of
+    transforms
+    '''
+    def __init__(self):
+        self.parents = dict() #<-- node : parent
+        self.types = dict()
+        self.calls = 0
+
+    def createNode(self, type, n = None, parent = None):
+        self.types[n] = type
+        self.parents[n] = parent
+        return n
+
+    def parent(self, node, parent):
+        self.calls += 1
+        old = self.parents[node]
+        self.parents[node] = parent
+        queryCache.invalidateMoved(node)
+        queryCache.invalidateChildren(old, parent)
+
+    def objExists(self, node):
+        self.calls += 1
+        return node in self.parents
+
+    def nodeType(self, node):
+        self.calls += 1
+        if node not in self.types:
+            raise RuntimeError('No object matches name: %s' % node)
+        return self.types[node]
+
+    def listRelatives(self, node, p = False, c = False, shapes = False):
+        self.calls += 1
+        if p:
+            parent = self.parents.get(node)
+            return [parent] if parent else None
+        children = [child for child, parent in self.parents.iteritems() if parent == node and
+                    (not shapes or self.types[child] == 'mesh')]
+        return sorted(children) or None
+
+#---------------------------------------------
+#common's query functions, over the stand in
+#---------------------------------------------
+def isValid(node):
+    cache = queryCache.current()
+    if cache is not None:
+        return cache.exists(node)
+    return bool(queryCache.cmds.objExists(node))
+
+def isType(node, type):
+    cache = queryCache.current()
+    if cache is not None:
+        return cache.nodeType(node) == type
+    return queryCache.cmds.nodeType(node) == type
+
+def getParent(node):
+    cache = queryCache.current()
+    if cache is not None:
+        parent = cache.parent(node)
+    else:
+        parent = queryCache.cmds.listRelatives(node, p = True)
+    if parent:
+        return parent[0]
+    return None
+
+def getChildren(node):
+    cache = queryCache.current()
+    if cache is not None:
+        return cache.children(node) or None
+    return queryCache.cmds.listRelatives(node, c = True)
+
+def buildScene(count):
+    scene = SceneStandIn()
+    for grp in ('skeleton_grp', 'joints_grp', 'trs_ctrl'):
+        scene.createNode('transform', n = grp)
+    for i in xrange(count):
+        scene.createNode('joint', n = 'jnt%s' % i, parent = 'skeleton_grp')
+    return scene
+
+def rigPass(scene, count):
+    '''
+    Returns what every query answered
+    '''
+    answers = list()
+    joints = ['jnt%s' % i for i in xrange(count)] + ['missing_jnt']
+    for jnt in joints:
+        valid = isValid(jnt)
+        answers.append(valid)
+        if valid and getParent(jnt) == 'skeleton_grp':
+            scene.parent(jnt, 'joints_grp')
+    for jnt in joints:
+        valid = isValid(jnt)
+        answers.append(valid)
+        if valid:
+            answers.append(isType(jnt, 'joint'))
+            answers.append(getParent(jnt))
+    for jnt in joints:
+        answers.append(isValid(jnt))
+    for i in xrange(10):
+        answers.append(getChildren('trs_ctrl'))
+        answers.append(getChildren('skeleton_grp'))
+    return answers
+
+def run(sizes = SIZES):
+    cmds = queryCache.cmds
+    print '%8s %10s %10s %12s %10s' % ('joints', '', 'time', 'scene calls', 'hit rate')
+    try:
+        for count in sizes:
+            results = dict()
+            for label in ('uncached', 'cached'):
+                scene = buildScene(count)
+                queryCache.cmds = scene
+                start = time.time()
+                if label == 'cached':
+                    with queryCache.cached(callbacks = False) as cache:
+                        results[label] = rigPass(scene, count)
+                    rate = '%9.1f%%' % (100.0 * cache.hits() / (cache.hits() + cache.misses()))
+                else:
+                    results[label] = rigPass(scene, count)
+                    rate = '-'
+                seconds = time.time() - start
+                print '%8d %10s %9.3fs %12d %10s' % (count, label, seconds, scene.calls, rate)
+            if results['cached'] != results['uncached']:
+                raise RuntimeError('The cache answered differently from the scene with %s joints' % count)
+    finally:
+        queryCache.cmds = cmds
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,343 @@
+'''
+Skin weight I/O benchmark suite
+
+Generates synthetic skin data from 10k to 2M vertices and 10 to 500
+influences, with a few weights a vertex, and times every step weights
+go through on their way in and out of Maya:
+
+    get          skinData query, reshaped in to SparseWeights
+    set          SparseWeights packed in to a sparse weight buffer, sent
+                 through a file past weightBuffer.MAX_ARGUMENT_SIZE, and
+                 unpacked dense the way the skinData plugin does
+    wtsb save    weightFile.save(), what SkinCluster.saveWeights() does
+    wtsb load    weightFile.WeightFile().data(), what SkinCluster.load() does
+    pyon save    pyon.save() of the influence weights a .wts file holds
+    pyon load    pyon.load() and back to SparseWeights
+
+No scene or plugin is needed, SkinDataStandIn stands in for the
+skinData command. Steps that need the dense weights are skipped when a
+case has more than DENSE_LIMIT of them, and recorded as null.
+
+For every step the time, the weights a second, the bytes written and
+the peak memory are recorded. Peak memory is what tracemalloc traced
+during the step when it is available. Otherwise it is the high water
+mark of the whole process, which only ever grows.
+
+Results are printed and written to JSON with the commit they were run
+at, and can be compared with the results of another run to catch
+regressions.
+
+..python
+    mayapy -m japeto.benchmarks.skinIO
+    mayapy -m japeto.benchmarks.skinIO --full --output after.json --compare before.json
+'''
+#import python modules
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from array import array
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+#import package modules
+from japeto.libs import pyon
+from japeto.libs import sparseWeights
+from japeto.libs import weightBuffer
+from japeto.libs import weightFile
+
+#vertices, influences, most influences a vertex
+CASES = ((10000, 10, 4),
+         (10000, 100, 4),
+         (100000, 50, 4),
+         (100000, 100, 8))
+
+FULL_CASES = CASES + ((500000, 10, 2),
+                      (100000, 500, 8),
+                      (500000, 100, 4),
+                      (1000000, 200, 4),
+                      (2000000, 100, 4),
+                      (2000000, 500, 4))
+
+#most dense weights a case builds
+DENSE_LIMIT = 10000000
+
+#a step this many times slower than in the results compared with is a regression
+REGRESSION = 1.2
+
+#steps quicker than this are too noisy to compare
+MIN_SECONDS = 0.05
+
+def buildWeights(vertexCount, influenceCount, influencesPerVertex):
+    '''
+    Returns SparseWeights with 1 to influencesPerVertex neighbouring
+    influences on every vertex, normalized
+    '''
+    random.seed(0)
+    influencesPerVertex = min(influencesPerVertex, influenceCount)
+    offsets = array('I', [0])
+    indices = array(sparseWeights.SparseWeights.indexTypecode(influenceCount))
+    values = array('d')
+    randint, uniform = random.randint, random.random
+    for vertex in xrange(vertexCount):
+        count = randint(1, influencesPerVertex)
+        first = randint(0, influenceCount - count)
+        weights = [uniform() + 0.01 for i in xrange(count)]
+        total = sum(weights)
+        indices.extend(xrange(first, first + count))
+        values.extend([weight / total for weight in weights])
+        offsets.append(len(values))
+
+    influences = ['joint%s' % i for i in xrange(influenceCount)]
+    return sparseWeights.SparseWeights(influences, offsets, indices, values)
+
+class SkinDataStandIn(object):
+    '''
+    Answers the queries SkinCluster makes of the skinData command, and
+    unpacks weight buffers the way the plugin does
+    '''
+    def __init__(self, influences, dense):
+        self.influences = influences
+        self.dense = dense
+        self.set = None
+
+    def __call__(self, node, q = False, wts = None, inf = None, wbf = None, wfl = None):
+        if q and inf:
+            return list(self.influences)
+        if q and wts:
+            return list(self.dense)
+        if wbf is not None or wfl is not None:
+            if wbf is not None:
+                influenceIndices, weights = weightBuffer.decodeArgument(wbf)
+            else:
+                influenceIndices, weights = weightBuffer.load(wfl)
+            #the plugin hands the lists to MScriptUtil
+            self.set = (influenceIndices.tolist(), weights.tolist())
+
+#---------------------------------------------
+#Steps
+#---------------------------------------------
+def getWeights(skinData):
+    influences = skinData('skinCluster1', q = True, inf = True)
+    return sparseWeights.SparseWeights.fromDense(skinData('skinCluster1', q = True, wts = True), influences)
+
+def setWeights(skinData, weights):
+    influences = skinData('skinCluster1', q = True, inf = True)
+    weights = weights.reorder(influences)
+    data = weightBuffer.encodeSparse(weights.offsets(), weights.indices(), weights.values(), range(len(influences)))
+    if len(data) <= weightBuffer.MAX_ARGUMENT_SIZE:
+        skinData('skinCluster1', wbf = weightBuffer.toArgument(data))
+        return
+    handle, filepath = tempfile.mkstemp(prefix = 'skinData.', suffix = '.wbuf')
+    os.close(handle)
+    try:
+        weightBuffer.write(filepath, data)
+        skinData('skinCluster1', wfl = filepath)
+    finally:
+        os.remove(filepath)
+
+def saveBinary(weights, filepath):
+    weightFile.save(filepath, {'name' : 'skinCluster1', 'weights' : weights})
+
+def loadBinary(filepath):
+    data = weightFile.WeightFile(filepath).data()
+    data['blendWeights'].values()
+    return data
+
+def savePyon(weights, filepath):
+    pyon.save({'name' : 'skinCluster1', 'weights' : weights.toInfluenceWeights(),
+               'blendWeights' : [0.0] * weights.vertexCount()}, filepath)
+
+def loadPyon(filepath):
+    data = pyon.load(filepath)
+    data['weights'] = sparseWeights.SparseWeights.fromInfluenceWeights(data['weights'])
+    return data
+
+#---------------------------------------------
+#Measuring
+#---------------------------------------------
+def _highWaterMark():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #kilobytes everywhere but on mac
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def measure(func, *args):
+    '''
+    Returns the seconds func took, its peak memory in bytes and what it
+    returned
+    '''
+    gc.collect()
+    if tracemalloc:
+        tracemalloc.start()
+        start = time.time()
+        result = func(*args)
+        seconds = time.time() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return seconds, peak, result
+
+    start = time.time()
+    result = func(*args)
+    return time.time() - start, _highWaterMark(), result
+
+def commit():
+    '''
+    Returns the commit the package is at, None outside of a git checkout
+    '''
+    try:
+        process = subprocess.Popen(['git', 'rev-parse', 'HEAD'], stdout = subprocess.PIPE,
+                                   stderr = subprocess.PIPE, cwd = os.path.dirname(os.path.abspath(__file__)))
+        output = process.communicate()[0]
+    except OSError:
+        return None
+    return output.strip() or None
+
+def runCase(vertexCount, influenceCount, influencesPerVertex, directory):
+    '''
+    Times every step for one case
+
+    :rtype: dict
+    '''
+    weights = buildWeights(vertexCount, influenceCount, influencesPerVertex)
+    count = len(weights.values())
+    dense = vertexCount * influenceCount <= DENSE_LIMIT
+    binaryPath = os.path.join(directory, 'skinIO.wtsb')
+    pyonPath = os.path.join(directory, 'skinIO.wts')
+
+    steps = [('wtsb save', saveBinary, (weights, binaryPath), binaryPath),
+             ('wtsb load', loadBinary, (binaryPath,), None)]
+    if dense:
+        skinData = SkinDataStandIn(weights.influences(), weights.toDense())
+        steps = [('get', getWeights, (skinData,), None),
+                 ('set', setWeights, (skinData, weights), None)] + steps
+        steps += [('pyon save', savePyon, (weights, pyonPath), pyonPath),
+                  ('pyon load', loadPyon, (pyonPath,), None)]
+
+    results = dict()
+    for name, func, args, output in steps:
+        seconds, peak, result = measure(func, *args)
+        results[name] = {'seconds' : seconds,
+                         'weightsPerSecond' : count / seconds if seconds else None,
+                         'bytes' : os.path.getsize(output) if output else None,
+                         'peakMemory' : peak}
+        result = None
+
+    if dense and skinData.set[1] != skinData.dense:
+        raise RuntimeError('Setting the weights did not set the weights that were got')
+    for name in ('get', 'set', 'pyon save', 'pyon load'):
+        results.setdefault(name, None)
+
+    for filepath in (binaryPath, pyonPath):
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
+    return {'vertices' : vertexCount,
+            'influences' : influenceCount,
+            'influencesPerVertex' : influencesPerVertex,
+            'weights' : count,
+            'steps' : results}
+
+def compare(previous, results, regression = REGRESSION):
+    '''
+    Returns the steps that take regression times longer in results than
+    in previous, as (case, step, previous seconds, seconds). Steps
+    quicker than MIN_SECONDS are left out.
+
+    :rtype: list
+    '''
+    key = lambda case: (case['vertices'], case['influences'], case['influencesPerVertex'])
+    before = dict((key(case), case['steps']) for case in previous['cases'])
+    regressions = list()
+    for case in results['cases']:
+        steps = before.get(key(case))
+        if not steps:
+            continue
+        for name, step in case['steps'].iteritems():
+            if not step or not steps.get(name) or step['seconds'] < MIN_SECONDS:
+                continue
+            if step['seconds'] > steps[name]['seconds'] * regression:
+                regressions.append((key(case), name, steps[name]['seconds'], step['seconds']))
+    return regressions
+
+def run(cases = CASES, output = None, previous = None):
+    '''
+    Runs every case, prints the results and saves them to output as JSON
+
+    :param cases: vertices, influences, most influences a vertex of every case
+    :type cases: tuple
+
+    :param output: JSON file to write the results to
+    :type output: str
+
+    :param previous: JSON file of an earlier run to compare against
+    :type previous: str
+
+    :rtype: dict
+    '''
+    results = {'commit' : commit(),
+               'date' : time.strftime('%Y-%m-%dT%H:%M:%S'),
+               'python' : platform.python_version(),
+               'platform' : platform.platform(),
+               'numpy' : sparseWeights.numpy is not None,
+               'tracemalloc' : tracemalloc is not None,
+               'cases' : list()}
+
+    names = ('get', 'set', 'wtsb save', 'wtsb load', 'pyon save', 'pyon load')
+    print '%8s %6s %4s %10s ' % ('vertices', 'joints', 'per', 'weights') + ' '.join(['%10s' % name for name in names])
+    directory = tempfile.mkdtemp()
+    try:
+        for vertexCount, influenceCount, influencesPerVertex in cases:
+            case = runCase(vertexCount, influenceCount, influencesPerVertex, directory)
+            results['cases'].append(case)
+            times = ['%9.3fs' % case['steps'][name]['seconds'] if case['steps'][name] else '%10s' % '-'
+                     for name in names]
+            print '%8d %6d %4d %10d ' % (vertexCount, influenceCount, influencesPerVertex, case['weights']) + ' '.join(times)
+    finally:
+        os.rmdir(directory)
+
+    if output:
+        f = open(output, 'w')
+        try:
+            json.dump(results, f, indent = 2, sort_keys = True)
+        finally:
+            f.close()
+        print 'results saved to %s' % output
+
+    if previous:
+        f = open(previous, 'r')
+        try:
+            regressions = compare(json.load(f), results)
+        finally:
+            f.close()
+        for case, name, before, after in regressions:
+            print 'regression %s %s: %.3fs -> %.3fs' % (case, name, before, after)
+        if not regressions:
+            print 'no regressions against %s' % previous
+
+    return results
+
+if __name__ == '__main__':
+    arguments = sys.argv[1:]
+    def option(flag):
+        if flag in arguments:
+            return arguments[arguments.index(flag) + 1]
+        return None
+
+    run(FULL_CASES if '--full' in arguments else CASES,
+        option('--output') or 'skinIO_%s.json' % time.strftime('%Y%m%d_%H%M%S'),
+        option('--compare'))
@@ -0,0 +1,116 @@
+'''
+Benchmarks getting and setting skin weights through
+japeto.libs.sparseWeights against SkinCluster's old get and set.
+
+Maya is not needed, skinData() below stands in for the skinData command
+and hands out synthetic dense weights, up to 4 influences a vertex. The
+sparse path is timed with numpy when it is available and without it.
+
+..python
+    mayapy -m japeto.benchmarks.skinWeights
+'''
+#import python modules
+import random
+import time
+
+#import package modules
+from japeto.libs import sparseWeights
+from japeto.libs import ordereddict
+
+SIZES = ((10000, 50), (100000, 100), (300000, 200))
+
+class SkinDataStandIn(object):
+    '''
+    Holds synthetic weights and answers the queries SkinCluster makes
+    of the skinData command
+    '''
+    def __init__(self, vertexCount, influenceCount, influencesPerVertex = 4):
+        random.seed(0)
+        self.influences = ['ns:joint%s' % i for i in range(influenceCount)]
+        self.weights = [0.0] * (vertexCount * influenceCount)
+        for vertex in xrange(vertexCount):
+            start = vertex * influenceCount
+            chosen = random.sample(xrange(influenceCount), random.randint(1, influencesPerVertex))
+            for influence in chosen:
+                self.weights[start + influence] = 1.0 / len(chosen)
+        self.set = None
+
+    def __call__(self, node, q = False, wts = None, inf = None):
+        if q and inf:
+            return list(self.influences)
+        if q and wts:
+            return list(self.weights)
+        self.set = wts
+
+#---------------------------------------------
+#SkinCluster get and set before sparse weights
+#---------------------------------------------
+def legacyGet(skinData):
+    data = ordereddict.OrderedDict()
+    influence = skinData('skinCluster1', q = True, inf = True)
+    weights = skinData('skinCluster1', q = True, wts = True)
+    numComponentsPerInfluence = len(weights) / len(influence)
+    numberOfInflunces = len(influence)
+    for i in range(numberOfInflunces):
+        data[influence[i]] = [weights[j * numberOfInflunces + i] for j in range(numComponentsPerInfluence)]
+    return data
+
+def legacySet(skinData, data):
+    influencePaths = skinData('skinCluster1', q = True, inf = True)
+    numInfluences = len(influencePaths)
+    weights = list(range(numInfluences * len(data[data.keys()[0]])))
+    numComponentsPerInfluence = len(weights) / numInfluences
+    for i in range(numInfluences):
+        influenceName = influencePaths[i]
+        for j in range(numComponentsPerInfluence):
+            weights[j * numInfluences + i] = data[influenceName][j]
+    skinData('skinCluster1', wts = weights, inf = influencePaths)
+
+#---------------------------------------------
+#SkinCluster get and set with sparse weights
+#---------------------------------------------
+def sparseGet(skinData):
+    influence = skinData('skinCluster1', q = True, inf = True)
+    weights = skinData('skinCluster1', q = True, wts = True)
+    return sparseWeights.SparseWeights.fromDense(weights, influence)
+
+def sparseSet(skinData, weights):
+    influencePaths = skinData('skinCluster1', q = True, inf = True)
+    skinData('skinCluster1', wts = weights.toDense(influencePaths), inf = influencePaths)
+
+def timed(func, *args):
+    start = time.time()
+    result = func(*args)
+    return time.time() - start, result
+
+def run(sizes = SIZES):
+    modes = [('legacy', None), ('sparse', False)]
+    if sparseWeights.numpy is not None:
+        modes.append(('sparse numpy', True))
+
+    print '%8s %8s %14s %10s %10s' % ('vertices', 'joints', '', 'get', 'set')
+    for vertexCount, influenceCount in sizes:
+        skinData = SkinDataStandIn(vertexCount, influenceCount)
+        numpyModule = sparseWeights.numpy
+        try:
+            for label, useNumpy in modes:
+                if useNumpy is None:
+                    getTime, data = timed(legacyGet, skinData)
+                    setTime, result = timed(legacySet, skinData, data)
+                else:
+                    sparseWeights.numpy = numpyModule if useNumpy else None
+                    getTime, data = timed(sparseGet, skinData)
+                    #set on to the influences without their namespace, the
+                    #way weights come back on to a referenced rig
+                    skinData.influences = [name.split(':')[-1] for name in skinData.influences]
+                    setTime, result = timed(sparseSet, skinData, data)
+                    skinData.influences = ['ns:%s' % name for name in skinData.influences]
+
+                if skinData.set != skinData.weights:
+                    raise RuntimeError('%s did not set the weights it got' % label)
+                print '%8d %8d %14s %9.3fs %9.3fs' % (vertexCount, influenceCount, label, getTime, setTime)
+        finally:
+            sparseWeights.numpy = numpyModule
+
+if __name__ == '__main__':
+    run()
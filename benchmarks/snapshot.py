@@ -0,0 +1,108 @@
+'''
+Benchmarks japeto.mlRig.snapshot against templates.rig.Rig.saveTemplate().
+
+Builds rigs of plain nodes with a few attributes each, saves them both as
+a snapshot and as a template module, and times saving, loading the
+template module (import plus initialize()), loading the snapshot lazily,
+and loading it fully. Every snapshot is loaded back and compared to the
+rig it was saved from.
+
+..python
+    mayapy -m japeto.benchmarks.snapshot
+'''
+#import python modules
+import imp
+import os
+import shutil
+import tempfile
+import time
+
+#import package modules
+from japeto.mlRig import ml_node
+from japeto.mlRig import snapshot
+from japeto.templates import rig
+
+SIZES = (100, 1000, 10000, 50000)
+
+def buildRig(size):
+    '''
+    Builds a rig with the given number of nodes. Every node is parented
+    under the node added 3 nodes earlier.
+
+    :param size: Number of nodes to add to the rig
+    :type size: int
+    '''
+    graph = rig.Rig.createTemplate('benchmark', 'benchmark', rig.Rig)
+    for i in range(size):
+        parent = None
+        if i > 2:
+            parent = graph.getNodeByName('node%s' % (i - 3))
+        node = ml_node.MlNode('node%s' % i)
+        node.disable()
+        graph.addNode(node, parent)
+        node.niceName = 'Node %s' % i
+        node.addAttribute('position', [float(i), 1.0, 0.0])
+        node.addAttribute('stretch', bool(i % 2))
+        node.addAttribute('numJoints', i % 5)
+        node.addAttribute('parentHook', 'node%s_sc_jnt' % i)
+
+    return graph
+
+def describe(graph):
+    '''
+    Returns everything a snapshot stores about the graph, to compare graphs
+    '''
+    description = list()
+    for node in graph.iterNodes():
+        parent = node.parent()
+        description.append((node.name(), parent.name() if parent else None, node.niceName,
+                            tuple(node.color()), node.active(),
+                            [(a.name(), a.attrType(), a.value()) for a in node.attributes()]))
+    return description
+
+def timed(func, *args):
+    start = time.time()
+    result = func(*args)
+    return time.time() - start, result
+
+def loadTemplate(filepath):
+    module = imp.load_source('benchmarkTemplate', filepath)
+    graph = module.Benchmark('benchmark')
+    graph.initialize()
+    return graph
+
+def loadSnapshot(filepath, lazy):
+    graph = rig.Rig('benchmark')
+    graph.load(filepath, lazy)
+    return graph
+
+def run(sizes = SIZES):
+    directory = tempfile.mkdtemp()
+    print '%8s %12s %12s %12s %12s %12s %12s %12s' % ('nodes', 'template kb', 'snapshot kb',
+                                                      'save tpl', 'save snap', 'load tpl',
+                                                      'load lazy', 'load full')
+    try:
+        for size in sizes:
+            graph = buildRig(size)
+            templatePath = os.path.join(directory, 'benchmarkTemplate%s.py' % size)
+            snapshotPath = os.path.join(directory, 'benchmark%s.jpsn' % size)
+
+            saveTemplate, result = timed(rig.Rig.saveTemplate, graph, templatePath)
+            saveSnapshot, result = timed(snapshot.save, graph, snapshotPath)
+            loadTpl, result = timed(loadTemplate, templatePath)
+            loadLazy, result = timed(loadSnapshot, snapshotPath, True)
+            loadFull, loaded = timed(loadSnapshot, snapshotPath, False)
+
+            if describe(loaded) != describe(graph):
+                raise RuntimeError('Snapshot of %s nodes did not load back the same' % size)
+
+            print '%8d %12d %12d %11.3fs %11.3fs %11.3fs %11.3fs %11.3fs' % (
+                        size,
+                        os.path.getsize(templatePath) // 1024,
+                        os.path.getsize(snapshotPath) // 1024,
+                        saveTemplate, saveSnapshot, loadTpl, loadLazy, loadFull)
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,69 @@
+'''
+Benchmarks the nearest point queries of japeto.libs.spatialIndex with the
+python grid, the path taken when scipy is not installed, for targets on
+the source points and for targets moved away from them, the way an
+offset or moved LOD is transferred on to.
+
+Maya is not needed. The run fails if a query does not find the same
+distances a search through every point does, or if the moved targets
+take far longer than the ones on the points.
+
+..python
+    mayapy -m japeto.benchmarks.spatialIndex
+'''
+#import python modules
+import math
+import random
+import time
+
+#import package modules
+from japeto.libs import spatialIndex
+
+#source points, target points
+SIZES = ((20000, 200), (100000, 2000))
+
+#how far the targets are moved, in sizes of the source bounding box
+OFFSETS = (0, 2, 4, 100)
+
+#how many times slower than targets on the points moved targets may be
+SLOWEST = 20.0
+
+#targets checked against a search through every point
+CHECKED = 20
+
+def bruteForce(positions, target, count):
+    squared = sorted([sum([(positions[i * 3 + axis] - target[axis]) ** 2 for axis in range(3)])
+                      for i in xrange(len(positions) // 3)])
+    return [math.sqrt(value) for value in squared[:count]]
+
+def run(sizes = SIZES, offsets = OFFSETS, count = 4):
+    tree = spatialIndex.cKDTree
+    spatialIndex.cKDTree = None
+    print '%8s %8s %8s %10s' % ('points', 'targets', 'offset', 'time')
+    try:
+        for sourceCount, targetCount in sizes:
+            random.seed(0)
+            positions = [random.random() for i in xrange(sourceCount * 3)]
+            index = spatialIndex.PointIndex(positions)
+            onPoints = None
+            for offset in offsets:
+                targets = [random.random() + offset for i in xrange(targetCount * 3)]
+                start = time.time()
+                indices, distances = index.nearest(targets, count = count)
+                seconds = time.time() - start
+                print '%8d %8d %8s %9.3fs' % (sourceCount, targetCount, offset, seconds)
+
+                for target in xrange(min(CHECKED, targetCount)):
+                    expected = bruteForce(positions, targets[target * 3:target * 3 + 3], count)
+                    if any([abs(a - b) > 1e-9 for a, b in zip(distances[target], expected)]):
+                        raise RuntimeError('Target %s moved by %s did not find its closest points' % (target, offset))
+
+                if onPoints is None:
+                    onPoints = seconds
+                elif seconds > max(onPoints, 0.01) * SLOWEST:
+                    raise RuntimeError('Targets moved by %s took %.3fs, %.3fs on the points' % (offset, seconds, onPoints))
+    finally:
+        spatialIndex.cKDTree = tree
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,87 @@
+'''
+Benchmarks japeto.mlRig.ml_traversal against the recursive walk
+MlNode.descendants() used previously.
+
+The recursive walk is only timed on graphs shallow enough for it to
+finish, the deep chain would hit python's recursion limit.
+
+..python
+    mayapy -m japeto.benchmarks.traversal
+'''
+#import python modules
+import sys
+import timeit
+
+#import package modules
+from japeto.mlRig import ml_graph
+from japeto.mlRig import ml_node
+from japeto.mlRig import ml_traversal
+
+SIZES = (500, 1000, 5000)
+
+def recursiveDescendants(node):
+    '''
+    The walk MlNode.descendants() did before ml_traversal.
+    '''
+    children = node.children()
+    nodes = list()
+    if children:
+        for child in children:
+            nodes.append(child)
+            newNodes = recursiveDescendants(child)
+            if newNodes:
+                if newNodes not in nodes:
+                    nodes.extend(newNodes)
+    return nodes
+
+def buildTree(size, branching = 4):
+    '''
+    Builds a balanced tree with the given number of nodes
+    '''
+    graph = ml_graph.MlGraph('tree')
+    nodes = [graph.addNode('node0')]
+    for i in range(1, size):
+        nodes.append(ml_node.MlNode('node%s' % i, nodes[(i - 1) // branching]))
+    
+    return graph
+
+def buildChain(size):
+    '''
+    Builds a single chain of nodes, each one parented to the last
+    '''
+    graph = ml_graph.MlGraph('chain')
+    node = graph.addNode('node0')
+    for i in range(1, size):
+        node = ml_node.MlNode('node%s' % i, node)
+    
+    return graph
+
+def run(sizes = SIZES, repeat = 3):
+    print '%8s %8s %14s %14s %14s %14s' % ('shape', 'nodes', 'recursive (ms)',
+                                           'preOrder (ms)', 'postOrder (ms)',
+                                           'breadth (ms)')
+    for shape, build in (('tree', buildTree), ('chain', buildChain)):
+        for size in sizes:
+            graph = build(size)
+            roots = graph.rootNodes()
+            
+            #a chain is as deep as it is long
+            recursive = float('nan')
+            if shape == 'tree' or size < sys.getrecursionlimit() - 100:
+                recursive = min(timeit.repeat(lambda: recursiveDescendants(roots[0]),
+                                              repeat = repeat, number = 1))
+            pre = min(timeit.repeat(lambda: list(ml_traversal.preOrder(roots)),
+                                    repeat = repeat, number = 1))
+            post = min(timeit.repeat(lambda: list(ml_traversal.postOrder(roots)),
+                                     repeat = repeat, number = 1))
+            breadth = min(timeit.repeat(lambda: list(ml_traversal.breadthFirst(roots)),
+                                        repeat = repeat, number = 1))
+            
+            print '%8s %8d %14.3f %14.3f %14.3f %14.3f' % (shape, size,
+                                                           recursive * 1e3,
+                                                           pre * 1e3,
+                                                           post * 1e3,
+                                                           breadth * 1e3)
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,92 @@
+'''
+Benchmarks japeto.libs.weightProcessing on synthetic weights, against
+the per vertex skinPercent loop it replaces, which is timed here as the
+equivalent python loop over dense weights (without the cost of the
+commands themselves).
+
+Maya is not needed. Each operation is timed with numpy when it is
+available and without it.
+
+..python
+    mayapy -m japeto.benchmarks.weightProcessing
+'''
+#import python modules
+import random
+import time
+
+#import package modules
+from japeto.libs import sparseWeights
+from japeto.libs import weightProcessing
+
+SIZES = ((100000, 100), (1000000, 100))
+
+def buildWeights(vertexCount, influenceCount, influencesPerVertex = 8):
+    '''
+    Returns SparseWeights with up to influencesPerVertex random weights a
+    vertex
+    '''
+    random.seed(0)
+    offsets = sparseWeights.array('I', [0])
+    indices = sparseWeights.array(sparseWeights.SparseWeights.indexTypecode(influenceCount))
+    values = sparseWeights.array('d')
+    sample, randint, uniform = random.sample, random.randint, random.random
+    population = xrange(influenceCount)
+    for vertex in xrange(vertexCount):
+        chosen = sorted(sample(population, randint(1, influencesPerVertex)))
+        indices.extend(chosen)
+        values.extend([uniform() for influence in chosen])
+        offsets.append(len(values))
+    influences = ['joint%s' % i for i in range(influenceCount)]
+    return sparseWeights.SparseWeights(influences, offsets, indices, values)
+
+def legacyClean(dense, influenceCount, count, epsilon, locked):
+    '''
+    What a skinPercent loop does, vertex by vertex over dense weights
+    '''
+    for start in xrange(0, len(dense), influenceCount):
+        row = dense[start:start + influenceCount]
+        kept = sorted(range(influenceCount), key = lambda i: -row[i])[:count]
+        row = [row[i] if i in kept and row[i] > epsilon else 0.0 for i in range(influenceCount)]
+        lockedSum = sum([row[i] for i in locked])
+        freeSum = sum(row) - lockedSum
+        if freeSum > 0:
+            scale = max(1.0 - lockedSum, 0.0) / freeSum
+            row = [value if i in locked else value * scale for i, value in enumerate(row)]
+        dense[start:start + influenceCount] = row
+
+def timed(func, *args, **kwargs):
+    start = time.time()
+    result = func(*args, **kwargs)
+    return time.time() - start, result
+
+def run(sizes = SIZES):
+    modes = [('python', False)]
+    if weightProcessing.numpy is not None:
+        modes.append(('numpy', True))
+
+    print '%8s %8s %8s %10s %10s %10s %10s %10s' % ('vertices', 'joints', '', 'limit', 'prune',
+                                                     'normalize', 'round', 'clean')
+    numpyModule = weightProcessing.numpy
+    for vertexCount, influenceCount in sizes:
+        weights = buildWeights(vertexCount, influenceCount)
+        locked = weights.influences()[:2]
+        try:
+            for label, useNumpy in modes:
+                weightProcessing.numpy = numpyModule if useNumpy else None
+                times = [timed(weightProcessing.limitInfluences, weights, 4)[0],
+                         timed(weightProcessing.prune, weights, 0.01)[0],
+                         timed(weightProcessing.normalize, weights, locked)[0],
+                         timed(weightProcessing.roundWeights, weights, 3)[0],
+                         timed(weightProcessing.clean, weights, locked = locked)[0]]
+                print '%8d %8d %8s %9.3fs %9.3fs %9.3fs %9.3fs %9.3fs' % ((vertexCount, influenceCount, label) + tuple(times))
+        finally:
+            weightProcessing.numpy = numpyModule
+
+        #the dense loop is slow, time it on a slice and scale it up
+        sample = min(vertexCount, 20000)
+        dense = weights.toDense()[:sample * influenceCount]
+        legacyTime = timed(legacyClean, dense, influenceCount, 4, 0.01, [0, 1])[0] * vertexCount / sample
+        print '%8d %8d %8s %54s %9.3fs' % (vertexCount, influenceCount, 'legacy', '(estimated)', legacyTime)
+
+if __name__ == '__main__':
+    run()
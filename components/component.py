@@ -7,19 +7,24 @@ This is the base component for all the rig components
 '''
 
 #import python modules
+import os
 from functools import wraps
 
 #import maya modules
 import maya.cmds as cmds
 
 #import package modules
+from japeto import PLUGINDIR
 #libs
 from japeto.libs import common 
 from japeto.libs import attribute
+from japeto.libs import attributeQueue
 from japeto.libs import joint
 from japeto.libs import control
 from japeto.libs import fileIO
+from japeto.libs import nodeBatch
 from japeto.mlRig import ml_node
+from japeto.mlRig import profiler
 reload(ml_node)
 reload(control)
 
@@ -29,6 +34,7 @@ reload(puppet)
 
 #import decompose matrix plugin
 fileIO.loadPlugin('matrixNodes.bundle')
+fileIO.loadPlugin(os.path.join(PLUGINDIR, 'nodeBatchCmd.py'))
 
 
 # Overload Arguments Decorator
@@ -152,7 +158,7 @@ class Component(ml_node.MlNode):
         self.__location  = common.getLocation(self.name()) #checks if there is a location based off name template
         self.masterGuide = '%s_master_%s' % (self.name(), common.GUIDES)
         
-        self.addArgument('position', [0,0,0], 0)
+        self.addArgument('position', [0,0,0], 0, 'vector')
         self.addArgument('controlScale', 1, 1)
         self.addArgument('parentHook', str(), 2)
 
@@ -172,12 +178,11 @@ class Component(ml_node.MlNode):
         common.setColor(self.masterGuide, 'darkred')
         
         #create hierarchy
-        cmds.createNode('transform', n = self.setupRigGrp)
-        cmds.createNode('transform', n = self.skeletonGrp)
-        cmds.createNode('transform', n = self.guidesGrp)
+        with nodeBatch.batch() as nodes:
+            setupRigGrp = nodes.createNode('transform', self.setupRigGrp)
+            nodes.createNode('transform', self.skeletonGrp, parent = setupRigGrp)
+            nodes.createNode('transform', self.guidesGrp, parent = setupRigGrp)
         
-        cmds.parent(self.skeletonGrp, self.setupRigGrp)
-        cmds.parent(self.guidesGrp, self.setupRigGrp)
         cmds.parent(common.getParent(self.masterGuide),self.guidesGrp)
         
         #add attributes to groups
@@ -209,7 +214,7 @@ class Component(ml_node.MlNode):
         
         #connect joints to the attributes on the masterGuide control
         for jnt in skeletonJnts:
-            if cmds.objExists(jnt):
+            if common.isValid(jnt):
                 attribute.connect(displayAttr , '%s.displayLocalAxis' % jnt)
                 common.setDisplayType(jnt, 'reference')
 
@@ -242,8 +247,11 @@ class Component(ml_node.MlNode):
         '''
         runs both the setup and postSetup for the rig. 
         '''
-        self.setupRig()
-        self.postSetupRig()
+        with profiler.span(self, 'setupRig'):
+            self.setupRig()
+        #attribute edits are queued and flushed together
+        with profiler.span(self, 'postSetupRig'), attributeQueue.queued():
+            self.postSetupRig()
 
     
     #----------------------------------
@@ -265,29 +273,26 @@ class Component(ml_node.MlNode):
         
         self.puppetNode.restoreArgs(self)
         
-        cmds.createNode('transform', n = self.rigGrp)
-        cmds.createNode('transform', n = self.jointsGrp)
-        cmds.createNode('transform', n = self.controlsGrp)
-        
-        cmds.parent([self.jointsGrp, self.controlsGrp], self.rigGrp)
+        with nodeBatch.batch() as nodes:
+            rigGrp = nodes.createNode('transform', self.rigGrp)
+            nodes.createNode('transform', self.jointsGrp, parent = rigGrp)
+            nodes.createNode('transform', self.controlsGrp, parent = rigGrp)
         
         if not self.skinClusterJnts:
             self.skinClusterJnts.extend(self.getSkeletonJnts())
         
         for jnt in self.skinClusterJnts:
-            if cmds.objExists(jnt):
+            if common.isValid(jnt):
                 common.setDisplayType(jnt, 'normal')
                 #get parent jnt 
-                parent = cmds.listRelatives(jnt, p = True)
-                if parent:
-                    if parent[0] == self.skeletonGrp:
-                        cmds.parent(jnt, self.jointsGrp)
+                if common.getParent(jnt) == self.skeletonGrp:
+                    cmds.parent(jnt, self.jointsGrp)
         
         #delete the setup rig group
         cmds.delete(self.setupRigGrp)
         
         for jnt in self.skinClusterJnts:
-            if cmds.objExists(jnt):
+            if common.isValid(jnt):
                 #turn display axis off
                 cmds.setAttr('%s.displayLocalAxis' % jnt, 0)
                 #take the rotations of the joint and make the orientation
@@ -317,7 +322,7 @@ class Component(ml_node.MlNode):
             
         if self.skinClusterJnts:
             for jnt in self.skinClusterJnts:
-                if cmds.objExists(jnt):
+                if common.isValid(jnt):
                     attribute.connect(jointVisAttr , '%s.v' % jnt)
                     cmds.setAttr('%s.overrideEnabled' % jnt, 1)
                     attribute.connect(jointDisplayAttr , '%s.overrideDisplayType' % jnt)
@@ -330,8 +335,10 @@ class Component(ml_node.MlNode):
 
     
     def runRig(self):
-        self.rig()
-        self.postRig()
+        with profiler.span(self, 'rig'):
+            self.rig()
+        with profiler.span(self, 'postRig'), attributeQueue.queued():
+            self.postRig()
 
     #-------------------------------
     #utility functions
@@ -351,10 +358,11 @@ class Component(ml_node.MlNode):
         :rtype: str	
         '''
         #create hierarchy
-        guideZero = cmds.createNode('transform', n = '%s_%s' % (name, common.ZERO))
-        guideShape = cmds.createNode('implicitSphere',n = '%s_%sShape' % (name,common.GUIDES))
-        guide = common.getParent(guideShape)
-        guide = cmds.rename(guide, name + '_' + common.GUIDES)
+        with nodeBatch.batch() as nodes:
+            guideZero = nodes.createNode('transform', '%s_%s' % (name, common.ZERO))
+            guide = nodes.createNode('transform', name + '_' + common.GUIDES, parent = guideZero)
+            guideShape = nodes.createNode('implicitSphere', '%s_%sShape' % (name,common.GUIDES), parent = guide)
+        guideZero, guide, guideShape = guideZero.name(), guide.name(), guideShape.name()
         
         #set color
         if color:
@@ -362,9 +370,6 @@ class Component(ml_node.MlNode):
         else:
             common.setColor(guideShape, common.SIDE_COLOR[self._getSide()])
         
-        #parent guide to zero group
-        cmds.parent(guide, guideZero)
-        
         cmds.delete(cmds.parentConstraint(obj, guideZero, mo = False))
         
         constraint = cmds.pointConstraint(guide, obj)
@@ -405,20 +410,24 @@ class Component(ml_node.MlNode):
         
         if skeletonRels:
             for jnt in skeletonRels:
-                if cmds.objExists(jnt):
-                    if cmds.nodeType(jnt) == 'joint':
+                if common.isValid(jnt):
+                    if common.isType(jnt, 'joint'):
                         skeletonJnts.append(jnt)
                         
         return skeletonJnts
         
 
-    def addArgument(self, name, value, index = -1):
+    def addArgument(self, name, value, index = -1, attrType = None):
         '''
         this is how it's done
+        
+        :param attrType: Type of the attribute (i.e. "vector" or "file").
+                         Defaults to the type of the value.
+        :type attrType: str
         '''
         #adds key and value to __dict__ attribute, which is a dictionary.
         vars(self) [name] = value
-        self.addAttribute(name, value, index)
+        self.addAttribute(name, value, index, attrType)
         
     def removeArgument(self, name):
         '''
@@ -116,7 +116,7 @@ def create(name):
     #end if
 
     #create
-    cmds.createNode('transform', name = name) #create transform
+    common.registerName(cmds.createNode('transform', name = name)) #create transform
     #mFnDependNode.setName(name) #set name
     
     #return an asset object
@@ -9,6 +9,7 @@ This is the attribute module for all the attribute utility functions
 from maya import cmds
 
 from japeto.libs import common
+from japeto.libs import attributeQueue
 
 #Global constants
 NUMERIC_COMPOUND = ["doulbe2", "double3", "float2", "float3", "long2", "long3", "short2", "short3"]
@@ -115,6 +116,10 @@ def lock (attr, node = None):
             attrPath, attrName, attrNode = resolveArgs (attr, node)
 
             # Lock attributes
+            queue = attributeQueue.current()
+            if queue is not None:
+                queue.setFlags(attrPath, lock = True)
+                continue
             cmds.setAttr(attrPath, lock = True)
 
 
@@ -128,6 +133,11 @@ def hide(attr, node = None):
         for attr in attrList:
             # Resolve attribute
             attrPath, attrName, attrNode = resolveArgs (attr, node)
+            # The queue looks the children up when it is flushed
+            queue = attributeQueue.current()
+            if queue is not None:
+                queue.hide(attrNode, attrName)
+                continue
             # Get attribute children
             attrChildren = cmds.attributeQuery (attrName, node = attrNode, listChildren = True)
 
@@ -161,6 +171,8 @@ def lockAndHide(attr, node = None):
 
 def unlock(attr, node = str()):
     attrs, nodes = attrNodeList(attr, node)
+    #queued locks go first, so they do not lock the attributes again
+    attributeQueue.flush()
 
     #lock attributes
     for node in nodes:
@@ -170,6 +182,7 @@ def unlock(attr, node = str()):
 
 def unhide(attr, node = str()):	    
     attrs, nodes = attrNodeList(attr, node)
+    attributeQueue.flush()
 
     #lock attributes
     for node in nodes:
@@ -195,6 +208,10 @@ def connect(source, destination, force = True):
     @param force: Force the connection
     @type force: *bool*
     '''
+    queue = attributeQueue.current()
+    if queue is not None:
+        queue.connect(source, destination, force)
+        return
     cmds.connectAttr(source, destination,f = force)
 
 def addAttr(node, attr, attrType = 'double',keyable = True, defValue = None, min = None, max = None, value = None , parent = None):
@@ -270,14 +287,21 @@ def getValue(attr, node = None):
     '''
 
     attrPath, attrName, attrNode = resolveArgs (attr, node)
+    attributeQueue.flush()
     return cmds.getAttr(attrPath)
 
 def setValue(attr, node= None, value = 0):
     attrPath = resolveArgs (attr, node)[0]
     if isCompound(attrPath):
-        cmds.setAttr(attrPath, value[0], value[1], value[2])
+        values = (value[0], value[1], value[2])
     else:
-        cmds.setAttr(attrPath, value)
+        values = (value,)
+
+    queue = attributeQueue.current()
+    if queue is not None:
+        queue.setValue(attrPath, *values)
+        return
+    cmds.setAttr(attrPath, *values)
 
 # Switch Attribute Function
 def switch (attr, node = None, value=0, choices = None, outputs = None):
@@ -364,6 +388,7 @@ def isConnected (attr, node = None, incoming = True, outgoing = True):
     '''
     # Resolve attribute
     attrPath = resolveArgs (attr, node) [0]
+    attributeQueue.flush()
 
     # Check if attribute is connected
     if outgoing and cmds.connectionInfo (attrPath, isSource = True):
@@ -375,6 +400,7 @@ def isConnected (attr, node = None, incoming = True, outgoing = True):
     
 def isLocked(attr, node = None):
     attrPath = resolveArgs (attr, node)[0]
+    attributeQueue.flush()
     
     return cmds.getAttr(attrPath, l = True)
 
@@ -473,6 +499,8 @@ def copy(attr, node = None, destination = None, connect = False, reverseConnect
     @rtype: *str*
     '''
     attrList = common.toList(attr)
+    #copy reads the keyable state and value of the attributes
+    attributeQueue.flush()
 
     for attr in attrList:
         attrPath, attrName, attrNode = resolveArgs(attr, node)
@@ -0,0 +1,250 @@
+'''
+Deferred attribute edits
+
+While a queue is open with queued(), attribute.lock(), hide(),
+lockAndHide(), connect() and setValue() add their edits to it instead
+of running them, and the edits are flushed together when the outermost
+queue closes:
+
+    - an attribute set more than once is only set to its last value
+    - a destination connected more than once only gets its last source
+    - the lock and keyable state of an attribute are set in one command
+    - the children hide() needs are looked up once for every node type,
+      not for every node and attribute
+
+They are flushed in an order that can not fail on a lock the queue set
+itself: attributes that are unlocked first, then values, connections,
+and the attributes that are locked or hidden last. A flush is one undo
+chunk.
+
+Reading attributes through the attribute module flushes the queue
+first, so it reads what was queued. Reading them straight through cmds
+does not. A queue that is closed by an error drops what it queued.
+
+:example:
+    >>> with attributeQueue.queued() as queue:
+    ...     attribute.lockAndHide(['t', 'r', 's', 'v'], nodes)
+    ...     attribute.connect('rig.uniformScale', 'joints_grp.sx')
+    >>> print queue.report()
+'''
+#import python modules
+from contextlib import contextmanager
+
+#import maya modules, edits are queued without Maya
+try:
+    import maya.cmds as cmds
+except ImportError:
+    cmds = None
+
+#import package modules
+from japeto.libs import queryCache
+
+class AttributeQueue(object):
+    '''
+    Attribute values, connections and lock and keyable states, kept until
+    they are flushed
+    '''
+    def __init__(self):
+        #edits are kept in dicts for the last one to win, with a list of
+        #the keys in the order they were first queued
+        self.__values      = (dict(), list()) #<-- plug : (values, flags)
+        self.__connections = (dict(), list()) #<-- destination : (source, force)
+        self.__flags       = (dict(), list()) #<-- plug : {flag : value}
+        self.__hidden      = (dict(), list()) #<-- (node, attr) : None
+        self.__queued      = 0
+        self.__commands    = 0
+        self.__flushes     = 0
+
+    def __repr__(self):
+        return '< %s: %s edits >' % (self.__class__.__name__, len(self))
+
+    def __len__(self):
+        return sum([len(edits) for edits, order in (self.__values, self.__connections, self.__flags, self.__hidden)])
+
+    def __edit(self, edits, key):
+        '''
+        Returns the dict of the edits, adding the key to their order
+        '''
+        if key not in edits[0]:
+            edits[1].append(key)
+        return edits[0]
+
+    def __items(self, edits):
+        return [(key, edits[0][key]) for key in edits[1]]
+
+    def setValue(self, plug, *values, **flags):
+        '''
+        Queues cmds.setAttr(plug, *values, **flags)
+        '''
+        self.__queued += 1
+        self.__edit(self.__values, plug)[plug] = (values, flags)
+
+    def connect(self, source, destination, force = True):
+        '''
+        Queues cmds.connectAttr(source, destination, f = force)
+        '''
+        self.__queued += 1
+        self.__edit(self.__connections, destination)[destination] = (source, force)
+
+    def setFlags(self, plug, lock = None, keyable = None):
+        '''
+        Queues the lock and keyable state of an attribute, None leaves the
+        state as it is
+        '''
+        self.__queued += 1
+        flags = self.__edit(self.__flags, plug).setdefault(plug, dict())
+        if lock is not None:
+            flags['lock'] = lock
+        if keyable is not None:
+            flags['keyable'] = keyable
+
+    def hide(self, node, attr):
+        '''
+        Queues making the attribute, or the children of a compound
+        attribute, not keyable
+        '''
+        self.__queued += 1
+        self.__edit(self.__hidden, (node, attr))[(node, attr)] = None
+
+    def clear(self):
+        '''
+        Drops every queued edit
+        '''
+        for edits, order in (self.__values, self.__connections, self.__flags, self.__hidden):
+            edits.clear()
+            del order[:]
+
+    def __call(self, command, *args, **kwargs):
+        self.__commands += 1
+        return command(*args, **kwargs)
+
+    def __children(self, node, attr, nodeTypes, children):
+        '''
+        Returns the children of the attribute, looked up once for every node
+        type. Dynamic attributes are looked up on the node.
+        '''
+        if node not in nodeTypes:
+            cache = queryCache.current()
+            if cache is not None:
+                nodeTypes[node] = cache.nodeType(node)
+            else:
+                nodeTypes[node] = self.__call(cmds.nodeType, node)
+
+        key = (nodeTypes[node], attr)
+        if key not in children:
+            try:
+                children[key] = self.__call(cmds.attributeQuery, attr, type = key[0], listChildren = True) or list()
+            except RuntimeError:
+                #not an attribute of the node type
+                children[key] = None
+
+        if children[key] is None:
+            return self.__call(cmds.attributeQuery, attr, node = node, listChildren = True) or list()
+        return children[key]
+
+    def flush(self):
+        '''
+        Runs the queued edits and empties the queue
+
+        :return: Number of commands that were run
+        :rtype: int
+        '''
+        if not len(self):
+            return 0
+
+        commands = self.__commands
+        values = self.__items(self.__values)
+        connections = self.__items(self.__connections)
+        hidden = list(self.__hidden[1])
+        flags = (dict(self.__flags[0]), list(self.__flags[1]))
+        self.clear()
+
+        nodeTypes = dict()
+        children = dict()
+        for node, attr in hidden:
+            for child in self.__children(node, attr, nodeTypes, children) or [attr]:
+                plug = '%s.%s' % (node, child)
+                self.__edit(flags, plug).setdefault(plug, dict())['keyable'] = False
+
+        flags = self.__items(flags)
+        unlocked = [(plug, state) for plug, state in flags if state.get('lock') is False]
+        locked = [(plug, state) for plug, state in flags if state.get('lock') is not False]
+
+        cmds.undoInfo(openChunk = True)
+        try:
+            for plug, state in unlocked:
+                self.__call(cmds.setAttr, plug, **state)
+            for plug, (args, kwargs) in values:
+                self.__call(cmds.setAttr, plug, *args, **kwargs)
+            for destination, (source, force) in connections:
+                self.__call(cmds.connectAttr, source, destination, f = force)
+            for plug, state in locked:
+                self.__call(cmds.setAttr, plug, **state)
+        finally:
+            cmds.undoInfo(closeChunk = True)
+
+        self.__flushes += 1
+        return self.__commands - commands
+
+    #----------------------------------
+    #Statistics
+    #----------------------------------
+    def edits(self):
+        '''
+        Returns the number of edits that were queued
+        '''
+        return self.__queued
+
+    def commands(self):
+        '''
+        Returns the number of commands flushes ran
+        '''
+        return self.__commands
+
+    def flushes(self):
+        return self.__flushes
+
+    def report(self):
+        return '%s edits queued, %s commands run in %s flushes\n' % (self.__queued, self.__commands, self.__flushes)
+
+
+_queue      = None
+_queueDepth = 0
+
+@contextmanager
+def queued():
+    '''
+    Opens an AttributeQueue for the attribute functions to add their edits
+    to, and flushes it when the outermost one closes. Opening it again
+    while it is open uses the same queue.
+    '''
+    global _queue, _queueDepth
+    if _queue is None:
+        _queue = AttributeQueue()
+    _queueDepth += 1
+    try:
+        yield _queue
+    except:
+        _queueDepth -= 1
+        if not _queueDepth:
+            _queue = None
+        raise
+
+    _queueDepth -= 1
+    if not _queueDepth:
+        queue, _queue = _queue, None
+        queue.flush()
+
+def current():
+    '''
+    Returns the open AttributeQueue, None if there isn't one
+    '''
+    return _queue
+
+def flush():
+    '''
+    Flushes the open AttributeQueue, if there is one, so the scene has the
+    edits queued so far
+    '''
+    if _queue is not None:
+        _queue.flush()
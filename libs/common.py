@@ -15,37 +15,19 @@ import maya.mel as mel
 import maya.OpenMaya as OpenMaya
 
 #import package modules
+from japeto.libs import queryCache
+from japeto.libs import naming
+
+#the naming convention lives in naming, which works without Maya
+from japeto.libs.naming import (LEFT, RIGHT, CENTER, SIDES, FRONT, BACK, MIDDLE, TOP, BOTTOM, LOCATIONS,
+                                DELIMITER, NAMETEMPLATE, PADDING, REQUIRED, NAME_CACHE_SIZE,
+                                padNumber, NameRegistry, nameRegistry, registerName,
+                                NameTokens, parseName, clearNameCache,
+                                getSide, getLocation, getDescription, getNumber, getClass, getNameType)
 
 #Constant variables
 #-------------------
 
-
-
-#Set up for naming convention constant variables
-#  Example:
-#    side_location(optional)_description_###(optional)_class(optional)_type
-
-NAMETEMPLATE = 'side.location.description.number.type.function'
-DELIMITER    = '_'
-
-#side constants
-LEFT   = 'l'
-RIGHT  = 'r'
-CENTER = 'c'
-
-SIDES   = {"left" : LEFT, "right" : RIGHT,
-            "center" : CENTER}
-
-#location constants
-FRONT   = 'fr'
-BACK    = 'bk'
-MIDDLE  = 'md'
-TOP     = 'tp'
-BOTTOM  = 'bt'
-
-LOCATIONS = {'front' : FRONT, 'back' : BACK, 'middle' : MIDDLE,
-         'top': TOP, 'bottom' : BOTTOM}
-
 #Class constants
 IK                = "ik"
 FK                = "fk"
@@ -130,13 +112,6 @@ LOW     = "lo"
 LODS = {"hi" : HI, "medium" : MEDIUM, "low" : LOW}
 
 
-#Naming template variables
-DELIMITER = "_"
-NAMETEMPLATE  = "SIDE.LOCATION.DESCRIPTION.NUMBER.CLASS.TYPE"
-PADDING = 3
-REQUIRED = ["SIDE", "DESCRIPTION", "TYPE"]
-
-
 # Color constants
 NONE        = 0;    NONE_RGB        = [0, 0.015, 0.375]
 BLACK       = 1;    BLACK_RGB       = [0, 0, 0]
@@ -200,38 +175,6 @@ CLIP    = ".clip"
 
 
 
-def padNumber(number, pad):
-    '''
-    .. python:
-        padNumber(2,3)
-        #return: '002'
-
-    @param number: number to use
-    @type number: *int*
-
-    @param pad: number padding to use (i.e. '3')
-    @type pad: *int*
-
-    @return: number string with correct padding
-    @rtype: *str*
-
-    '''
-
-    if not isinstance(number, int):
-        raise ValueError('%s must be an integer data type' % number)
-
-    if not isinstance(pad, int):
-        raise ValueError('%s must be an integer data type' % pad)   
-
-    padNumberStr = str(number)
-    pad = pad - len(padNumberStr)
-
-    for i in range(pad):
-        padNumberStr = '0%s' % padNumberStr 
-
-    return padNumberStr 
-
-
 def toList(input):
     """
     @param input:
@@ -260,6 +203,9 @@ def isValid(node):
     @rtype: *bool*
 
     '''
+    cache = queryCache.current()
+    if cache is not None:
+        return cache.exists(node)
 
     if cmds.objExists(node):
         return True
@@ -284,6 +230,9 @@ def isType(node, type):
     @rtype: *bool*
 
     '''
+    cache = queryCache.current()
+    if cache is not None:
+        return cache.nodeType(node) == type
 
     if cmds.nodeType(node) == type:
         return True
@@ -294,26 +243,39 @@ def isType(node, type):
 # Name Functions
 def checkName(name, i = 1):
     '''
-    Checks if name exists and returns a padded one if it does
+    Checks if name exists and returns a padded one if it does. While a
+    nameRegistry() is open the registry hands out the name without
+    looking in the scene.
+
+    Example:
+
+    .. python::
+        checkName('l_leg')
+        #Return: 'l_leg_002' when l_leg and l_leg_001 exist
 
     @param name: Name you wish to check for
     @type name: *str*
 
-    @param i: Integer to number the padding with
+    @param i: Integer to start the padding from
     @type i: *int*
     '''
     #check to see if *i* is an integer
     if not isinstance(i, int):
         raise TypeError('%s is not of type int()' % i)
 
+    registry = naming.currentRegistry()
+    if registry is not None:
+        return registry.uniqueName(name, i)
+
     #check name and create a new one if it already exist in the scene
-    if isValid(name):
-        name = '%s_%s' % (name, padNumber(i, PADDING)) #create the new name using padding
-        return checkName(name, i + 1) #recursively create the new name
-    #end if
+    newName = name
+    while isValid(newName):
+        newName = '%s_%s' % (name, padNumber(i, PADDING)) #create the new name using padding
+        i += 1
+    #end while
 
     #return new name
-    return name
+    return newName
 
 
 def searchReplaceRename(name, search = str(), replace = ()):
@@ -371,271 +333,60 @@ def generateName (*args, **kwargs):
     @rtype: *str*
     '''
 
-    # Get template order
-    order = NAMETEMPLATE.split (".")
-    keys = []
-    for key in kwargs.keys():
-            if key in order:
-                    keys.append(key)
-
-    for r in REQUIRED:
-            if r not in keys:
-                    cmds.error ('Must pass required Kwargs %s' % listToStringArray(REQUIRED))	
-
-    try:          
-        newName = ""      
-        for i in range(0, len(order)):
-            if kwargs.has_key(order[i]):      
-                if i == len(order) - 1:
-                    newName = "%s%s" % (newName, kwargs[order[i]]) 
-                else:                           
-                    # Check for padding			
-                    if order[i] == "NUMBER":
-                        number = str(kwargs[order[i]])
-                        newName = "%s%s" % (newName, padNumber(number, PADDING) + DELIMITER)
-                        continue
-                    newName = "%s%s" % (newName, kwargs[order[i]] + DELIMITER)
-    except:
-        cmds.error("Please provide the correct kwargs for the name generator!\ncorrect kwargs are: %s" % str(order)) 
-
-    # Return new name
-    return newName
-
-
-
-def getSide(name):
-    '''
-    Get a possible side reference from object name
-
-    Example:
-
-    .. python::
-        # Get side token from name
-        getSide ("l_fr_leg_001_ik_ctrl")
-        "l"
-
-    :note: Valid side tokens defined in SIDES constant variable
-    :note: The search pattern goes start > end
-
-    @param name: Object name
-    @type name: *str*
-
-    @return: Return side if found
-    @rtype: *str*
-    '''
-    if isinstance(name, unicode):
-        name = str(name)
-    
-    print name
-    
-    if not isinstance(name, basestring):
-        raise RuntimeError('%s can only be passed as a string argument!' % name)
-
-    nameList = name.split(DELIMITER)
-
-    # Loop through side tokens
-
-    for key in SIDES:
-
-        # Search for side token
-        for name in nameList:
-            if SIDES[key] == name:
-                return SIDES[key]
-
-    # Return None
-    return None    
-
-def getLocation(name):
-    '''
-    Get a possible location reference from object name
-
-    Example:
-
-    .. python::
-        # Get side token from name
-        getLocation ("l_fr_leg_001_ik_ctrl")
-        "fr"
-
-    :note: Valid location tokens defined in LOCATIONS constant variable
-    :note: The search pattern goes start > end
-
-    @param name: Object name
-    @type name: *str*
-
-    @return: Return side if found
-    @rtype: *str*
-    '''
-    if isinstance(name, unicode):
-        name = str(name)
-
-    if not isinstance(name, str):
-        raise RuntimeError, '*name* can only be passed as a string argument!'
-
-    nameList = name.split(DELIMITER)
-
-    # Loop through side tokens
-
-    for key in LOCATIONS:             
-        # Search for side token
-        for name in nameList:
-            if LOCATIONS[key] == name:
-                return LOCATIONS[key]
+    return _templateName(NAMETEMPLATE.split('.'), kwargs)
 
-    # Return None
-    return None        
-
-def getDescription(name):
+def generateNames(tokens, unique = False):
     '''
-    Get a possible description reference from object name
-
     Example:
 
     .. python::
-        # Get description token from name
-        getSide ("l_fr_leg_001_ik_ctrl")
-        "leg"
-
-    :note: Valid side tokens defined in SIDES constant variable
-    :note: The search pattern goes start > end
-
-    @param name: Object name
-    @type name: *str*
-
-    @return: Return side if found
-    @rtype: *str*
-    '''
-    if isinstance(name, unicode):
-        name = str(name)
-
-    if not isinstance(name, str):
-        raise RuntimeError, '*name* can only be passed as a string argument!'
+    generateNames([{'SIDE' : LEFT, 'DESCRIPTION' : 'finger', 'NUMBER' : i, 'TYPE' : JOINT} for i in range(1, 4)])
+    ['l_finger_001_jnt', 'l_finger_002_jnt', 'l_finger_003_jnt']
 
-    nameList = name.split(DELIMITER)
+    Generate many names based on the template at once, the way
+    generateName() generates one
 
-    for key in LOCATIONS:
-        if LOCATIONS[key] in nameList:
-            index = nameList.index(LOCATIONS[key])
-            return nameList[index+1]
+    @param tokens: Key word arguments generateName() takes for every name
+    @type tokens: *list*
 
-    # Return None
-    return nameList[1]
+    @param unique: Make every name unique with checkName()
+    @type unique: *bool*
 
-
-def getNumber(name):
+    @return: Return new names
+    @rtype: *list*
     '''
-    Get a possible Number reference from object name
-
-    Example:
+    order = NAMETEMPLATE.split('.')
+    names = [_templateName(order, kwargs) for kwargs in tokens]
+    if unique:
+        with nameRegistry():
+            names = [checkName(name) for name in names]
 
-    .. python::
-        # Get Number token from name
-        getSide ("l_fr_leg_001_ik_ctrl")
-        "001"
+    return names
 
-    :note: Valid side tokens defined in SIDES constant variable
-    :note: The search pattern goes start > end
-
-    @param name: Object name
-    @type name: *str*
-
-    @return: Return side if found
-    @rtype: *str*
+def _templateName(order, kwargs):
     '''
-    if isinstance(name, unicode):
-        name = str(name)
-
-    if not isinstance(name, str):
-        raise RuntimeError, '*name* can only be passed as a string argument!'
-
-    nameList = name.split(DELIMITER)
-
-    for string in nameList:
-        if string.isdigit():
-            number = string
-            return number
-
-    # Return None
-    return None
-
-
-def getClass(name):
+    Joins the kwargs in the order of the template
     '''
-    Get a possible CLASS reference from object name
-
-    Example:
-
-    .. python::
-        # Get CLASS token from name
-        getClass ("l_fr_leg_001_ik_ctrl")
-        "ik"
-
-    :note: Valid side tokens defined in SIDES constant variable
-    :note: The search pattern goes start > end
-
-    @param name: Object name
-    @type name: *str*
-
-    @return: Return side if found
-    @rtype: *str*
-    '''
-
-    nameList = name.split(DELIMITER)
-
-    location = getLocation(name)
-    number = getNumber(name)
-    description = getDescription(name)
-
-    if number and location and len(nameList) == 6:
-        index = nameList.index(number)
-        return nameList[index+1]
-
-    if number and not location and len(nameList) == 5:
-        index = nameList.index(number)
-        return nameList[index+1]
-
-    if not number and location and len(nameList) == 5:
-        index = nameList.index(location)
-        return nameList[index+2]
-
-    if not number and not location and len(nameList) == 4:
-        index = nameList.index(description)
-        return nameList[index+1]
-
-    # Return None
-    return None
-
-
-def getNameType(name):
-    '''
-    Get a possible TYPE reference from object name
-
-    Example:
-
-    .. python::
-        # Get TYPE token from name
-        getClass ("l_fr_leg_001_ik_ctrl")
-        "ik"
-
-    :note: Valid side tokens defined in SIDES constant variable
-    :note: The search pattern goes start > end
-
-    @param name: Object name
-    @type name: *str*
-
-    @return: Return side if found
-    @rtype: *str*
-    '''
-
-    nameList = name.split(DELIMITER)
+    for r in REQUIRED:
+        if r not in kwargs:
+            cmds.error('Must pass required Kwargs %s' % ', '.join(REQUIRED))
 
-    side = getSide(name)
-    description = getDescription(name)
+    try:
+        tokens = list()
+        for key in order:
+            if key in kwargs:
+                # Check for padding
+                if key == "NUMBER":
+                    tokens.append(padNumber(int(kwargs[key]), PADDING))
+                    continue
+                tokens.append(kwargs[key])
+        newName = DELIMITER.join(tokens)
+    except (TypeError, ValueError):
+        cmds.error("Please provide the correct kwargs for the name generator!\ncorrect kwargs are: %s" % str(order))
 
-    if side and description:
-        return nameList[-1]
+    # Return new name
+    return newName
 
-    # Return None
-    return None
 
 
 def removeCharsFromString(name, chars):
@@ -784,7 +535,11 @@ def getTopNode(node):
 
 
 def getParent(node):
-    parent = cmds.listRelatives(node, p = True)
+    cache = queryCache.current()
+    if cache is not None:
+        parent = cache.parent(node)
+    else:
+        parent = cmds.listRelatives(node, p = True)
 
     if parent:
         return parent[0]
@@ -793,7 +548,11 @@ def getParent(node):
 
 
 def getChildren(node):
-    children = cmds.listRelatives(node, c = True)
+    cache = queryCache.current()
+    if cache is not None:
+        children = cache.children(node)
+    else:
+        children = cmds.listRelatives(node, c = True)
 
     if children:
         return children
@@ -802,10 +561,15 @@ def getChildren(node):
 
 
 def getShapes(node, index = None):
-    if cmds.nodeType(node) in ['nurbsCurve', 'mesh', 'nurbsSurface']:
-        return node
-    
-    shapes = cmds.listRelatives(node, c = True, shapes = True)
+    cache = queryCache.current()
+    if cache is not None:
+        if cache.nodeType(node) in ['nurbsCurve', 'mesh', 'nurbsSurface']:
+            return node
+        shapes = cache.shapes(node)
+    else:
+        if cmds.nodeType(node) in ['nurbsCurve', 'mesh', 'nurbsSurface']:
+            return node
+        shapes = cmds.listRelatives(node, c = True, shapes = True)
 
     if shapes:
         if isinstance(index, int):
@@ -51,6 +51,7 @@ def create(name, type = 'circle', parent = None, color = 'yellow'):
     #create zero group for the control
     zeroGrp = cmds.createNode('transform', n = '%s_%s' % (name, common.ZERO))
     ctrl = cmds.createNode('joint', n = '%s_%s' % (name, common.CONTROL))
+    common.registerName(zeroGrp, ctrl)
     cmds.parent(ctrl, zeroGrp) #parent control to the zero group
     tag_as_control(ctrl) #tag the control
 
@@ -86,6 +87,7 @@ def createSetup(name, type = 'circle', parent = None):
     #create zero group for the control
     zeroGrp = cmds.createNode('transform', n = '{0}_{1}'.format(name, common.ZERO))
     ctrl = cmds.createNode('transform', n = '{0}_{1}'.format(name, common.GUIDES))
+    common.registerName(zeroGrp, ctrl)
     cmds.parent(ctrl, zeroGrp) #parent control to the zero group
     tag_as_control(ctrl) #tag the control
 
@@ -7,6 +7,7 @@ This is the deformer module for all the deformer utility functions
 '''
 #import python modules
 import os
+import tempfile
 
 #import Maya modules
 from maya import cmds
@@ -19,6 +20,12 @@ from japeto.libs import common
 from japeto.libs import pyon
 from japeto.libs import ordereddict
 from japeto.libs import fileIO
+from japeto.libs import weightFile
+from japeto.libs import weightBuffer
+from japeto.libs import weightProcessing
+from japeto.libs import weightMirror
+from japeto.libs import sparseWeights
+from japeto.libs import weightTransfer
 
 #load plugin for skinData
 fileIO.loadPlugin(os.path.join(japeto.PLUGINDIR, 'skinDataCmd.py'))
@@ -27,6 +34,8 @@ fileIO.loadPlugin(os.path.join(japeto.PLUGINDIR, 'skinDataCmd.py'))
 class SkinCluster(object):
     
     kFileExtension = '.wts'
+    kBinaryFileExtension = '.wtsb'
+    kFileFilter = 'Weight Files (*%s *%s)' % (kFileExtension, kBinaryFileExtension)
     
     @classmethod
     def save(cls, filePath = None, shape = None):
@@ -34,7 +43,23 @@ class SkinCluster(object):
         skin.saveWeights(filePath)
     
     @classmethod
-    def load(self, filePath = None, shape = None):
+    def load(self, filePath = None, shape = None, transfer = False):
+        '''
+        Loads weights from a file on to the shape
+        
+        :param filePath: Weight file to load, a dialog is brought up if
+                         there is none
+        :type filePath: str
+        
+        :param shape: Shape to load the weights on to, defaults to the
+                      selection
+        :type shape: str
+        
+        :param transfer: When the shape's vertices do not match the ones
+                         the weights were saved from, transfer the weights
+                         by closest point instead of raising an error
+        :type transfer: bool
+        '''
         if not shape:
             try:
                 shape = cmds.ls(sl = True)[0]
@@ -46,7 +71,7 @@ class SkinCluster(object):
         if not filePath:
             dir = cmds.workspace(q = True, rootDirectory = True)
             filePath = cmds.fileDialog2(dialogStyle = 2, fileMode = 0, 
-                                        startingDirectory = dir, fileFilter = 'Weight Files (*%s)' % SkinCluster.kFileExtension)
+                                        startingDirectory = dir, fileFilter = SkinCluster.kFileFilter)
             
         #return if no filePath is found
         if not filePath:
@@ -55,21 +80,36 @@ class SkinCluster(object):
         if isinstance(filePath, list):
             filePath = filePath[0]
             
-        #read in the data from file
-        data = pyon.load(filePath)
+        #read in the data from file, binary files are picked by extension
+        topology = None
+        if filePath.endswith(SkinCluster.kBinaryFileExtension):
+            weights = weightFile.WeightFile(filePath)
+            data = weights.data()
+            topology = weights.topology()
+        else:
+            data = pyon.load(filePath)
+            data['weights'] = sparseWeights.SparseWeights.fromInfluenceWeights(data['weights'])
         
         #make sure the vertex count is the same
         meshVerts = cmds.polyEvaluate(shape, vertex = True)
         importedVerts = len(data['blendWeights'])
         if meshVerts != importedVerts:
-            raise RuntimeError('Vertex counts do not match. %d != %d' % (meshVerts, importedVerts))
+            if not transfer:
+                raise RuntimeError('Vertex counts do not match. %d != %d' % (meshVerts, importedVerts))
+            data = weightTransfer.transferData(data, SkinCluster.getPositions(shape), filepath = filePath)
+        
+        #make sure the topology is the same when the file has a hash for it
+        elif topology and topology != SkinCluster.getTopologyHash(shape):
+            if not transfer:
+                raise RuntimeError('Topology of %s does not match the topology weights were saved from in %s' % (shape, filePath))
+            data = weightTransfer.transferData(data, SkinCluster.getPositions(shape), filepath = filePath)
         
         if SkinCluster.getSkinCluster(shape):
             #existing skinCluster
             skinCluster = SkinCluster(shape)
         else:
             #create new skinCluster
-            joints = data['weights'].keys()
+            joints = data['weights'].influences()
             cmds.skinCluster(joints, shape, tsb = True, nw = 2, n = data['name'])
             skinCluster = SkinCluster(shape)
         
@@ -90,15 +130,61 @@ class SkinCluster(object):
         
         return None
     
+    @classmethod
+    def getTopologyHash(cls, shape):
+        '''
+        Returns weightFile.topologyHash() for the mesh, None if the shape
+        is not a mesh
+        
+        :param shape: Mesh or transform of the mesh
+        :type shape: str
+        '''
+        shape = common.getShapes(shape, 0)
+        if not shape or not common.isType(shape, 'mesh'):
+            return None
+        
+        selection = OpenMaya.MSelectionList()
+        selection.add(shape)
+        dagPath = OpenMaya.MDagPath()
+        selection.getDagPath(0, dagPath)
+        counts = OpenMaya.MIntArray()
+        connects = OpenMaya.MIntArray()
+        OpenMaya.MFnMesh(dagPath).getVertices(counts, connects)
+        
+        return weightFile.topologyHash(counts, connects)
+    
+    @classmethod
+    def getPositions(cls, shape):
+        '''
+        Returns the world space x, y, z of every vertex of the mesh, one
+        after the other
+        
+        :param shape: Mesh or transform of the mesh
+        :type shape: str
+        
+        :rtype: list
+        '''
+        shape = common.getShapes(shape, 0)
+        if not shape or not common.isType(shape, 'mesh'):
+            return list()
+        
+        selection = OpenMaya.MSelectionList()
+        selection.add(shape)
+        dagPath = OpenMaya.MDagPath()
+        selection.getDagPath(0, dagPath)
+        points = OpenMaya.MPointArray()
+        OpenMaya.MFnMesh(dagPath).getPoints(points, OpenMaya.MSpace.kWorld)
+        
+        positions = list()
+        for i in xrange(points.length()):
+            point = points[i]
+            positions.extend((point.x, point.y, point.z))
+        
+        return positions
+    
     @classmethod
     def removeNamespace(cls, value):
-        valueSplit = value.split('|')
-        newName = ''
-        for i, val in enumerate(valueSplit):
-            if i > 0:
-                newName += '|'
-            newName += val.split(':')[-1]
-        return newName
+        return sparseWeights.removeNamespace(value)
     
     
     def __init__(self, shape = None):
@@ -114,13 +200,17 @@ class SkinCluster(object):
         
         self.node = SkinCluster.getSkinCluster(self.shape)
         
+        #weights of epsilon or less are pruned when weights are gathered
+        self.epsilon = sparseWeights.EPSILON
+        
         #create the orderedDict for data
         self.data = ordereddict.OrderedDict()
         self.data['name']             = self.node
         self.data['skinningMethod']   = int()
         self.data['normalizeWeights'] = int()
-        self.data['weights']          = ordereddict.OrderedDict()
+        self.data['weights']          = sparseWeights.SparseWeights.fromDense(list(), list())
         self.data['blendWeights']     = list()
+        self.data['positions']        = list()
                     
 
     #-------------------
@@ -130,6 +220,7 @@ class SkinCluster(object):
     def getData(self):
         self.getInfluenceWeights()
         self.getBlendWeights()
+        self.data['positions'] = SkinCluster.getPositions(self.shape)
         
         for attr in ['skinningMethod', 'normalizeWeights']:
             self.data[attr] = cmds.getAttr('%s.%s' % (self.node, attr))
@@ -138,10 +229,7 @@ class SkinCluster(object):
         influence = cmds.skinData(self.node,q=True,inf=True)
         weights = cmds.skinData(self.node,q=True,wts=True)
 
-        numComponentsPerInfluence = len(weights)/len(influence)
-        numberOfInflunces = len(influence)
-        for i in range(numberOfInflunces):  
-            self.data['weights'][influence[i]] = [weights[j*numberOfInflunces + i] for j in range(numComponentsPerInfluence)]
+        self.data['weights'] = sparseWeights.SparseWeights.fromDense(weights, influence, self.epsilon)
             
     def getBlendWeights(self):
         self.data['blendWeights'] = cmds.skinData(self.node,q=True,bwt=True)
@@ -161,26 +249,98 @@ class SkinCluster(object):
             
     def setInfluenceWeights(self):
         influencePaths = cmds.skinData(self.node,q=True,inf=True)
-        numInfluences = len(influencePaths)
-        weights = list(range(numInfluences*len(self.data['weights'][self.data['weights'].keys()[0]])))
-        numComponentsPerInfluence = len(weights) / numInfluences
+        weights = self.data['weights']
+        if not isinstance(weights, sparseWeights.SparseWeights):
+            weights = sparseWeights.SparseWeights.fromInfluenceWeights(weights, self.epsilon)
+        
+        #influences are matched by name, then without namespaces. The
+        #ones that are not in the weights get 0. Only the weights that
+        #are set are sent, in one sparse weight buffer rather than a flag
+        #per weight, the plugin lays them out dense
+        weights = weights.reorder(influencePaths)
+        data = weightBuffer.encodeSparse(weights.offsets(), weights.indices(), weights.values(),
+                                         range(len(influencePaths)))
+        if len(data) <= weightBuffer.MAX_ARGUMENT_SIZE:
+            cmds.skinData(self.node,wbf=weightBuffer.toArgument(data))
+            return
 
-        for i in range(numInfluences):
-            influenceName = influencePaths[i]
-            influenceNoNamespace = SkinCluster.removeNamespace(influenceName)
-            if influenceNoNamespace == influenceName:
-                for j in range(numComponentsPerInfluence):
-                    weights[j*numInfluences+i] = self.data['weights'][influenceName][j]
-                        
-        cmds.skinData(self.node,wts=weights,inf=influencePaths)
+        #big buffers go through a file instead of one huge flag argument.
+        #The plugin reads the file before the command returns
+        handle, filepath = tempfile.mkstemp(prefix = 'skinData.', suffix = '.wbuf')
+        os.close(handle)
+        try:
+            weightBuffer.write(filepath, data)
+            cmds.skinData(self.node,wfl=filepath)
+        finally:
+            os.remove(filepath)
                         
         
         
     def setBlendWeights(self):
-        cmds.skinData(self.node,bwt=self.data['blendWeights'])
+        cmds.skinData(self.node,bwt=list(self.data['blendWeights']))
         
 
 
+    def cleanWeights(self, count = weightProcessing.MAX_INFLUENCES, epsilon = 0.01, locked = None, decimals = None):
+        '''
+        Limits, prunes, normalizes and optionally rounds the weights in
+        data. See weightProcessing.clean(). setData() applies them.
+        
+        :param count: Number of influences a vertex keeps
+        :type count: int
+        
+        :param epsilon: Weights of epsilon or less are dropped
+        :type epsilon: float
+        
+        :param locked: Influences whose weights are not normalized
+        :type locked: list
+        
+        :param decimals: Number of decimals to round to, None to not round
+        :type decimals: int
+        '''
+        self.data['weights'] = weightProcessing.clean(self.data['weights'], count, epsilon, locked, decimals)
+        
+        return self.data['weights']
+    
+    def mirrorWeights(self, axis = 'x', positive = True, search = common.LEFT, replace = common.RIGHT,
+                      tolerance = weightMirror.TOLERANCE, cache = True):
+        '''
+        Mirrors the weights in data from one side of the mesh to the
+        other. See weightMirror. setData() applies them.
+        
+        :param axis: Axis to mirror across
+        :type axis: str
+        
+        :param positive: Copy from the positive side to the negative side,
+                         False to copy the other way
+        :type positive: bool
+        
+        :param search: Side token of the influences on one side
+        :type search: str
+        
+        :param replace: Side token of the influences on the other side
+        :type replace: str
+        
+        :param tolerance: How far a vertex can be from the mirrored
+                          position of the vertex it mirrors
+        :type tolerance: float
+        
+        :param cache: Cache the vertex map on disk by the mesh's topology
+        :type cache: bool
+        '''
+        positions = self.data.get('positions') or SkinCluster.getPositions(self.shape)
+        if cache:
+            mirrors = weightMirror.cachedVertexMap(positions, SkinCluster.getTopologyHash(self.shape), axis, tolerance)
+        else:
+            mirrors = weightMirror.vertexMap(positions, axis, tolerance)
+        
+        weights = self.data['weights']
+        influenceMirrors = weightMirror.influenceMirrorMap(weights.influences(), search, replace, common.DELIMITER)
+        self.data['weights'] = weightMirror.mirrorWeights(weights, positions, mirrors, influenceMirrors,
+                                                          axis, positive, tolerance)
+        
+        return self.data['weights']
+    
     def __getComponents(self):
         fnSet = OpenMaya.MFnSet(self._fn.deformerSet())
         members = OpenMaya.MSelectionList()
@@ -195,7 +355,7 @@ class SkinCluster(object):
         if not filePath:
             dir = cmds.workspace(q = True, rootDirectory = True)
             filePath = cmds.fileDialog2(dialogStyle = 2, fileMode = 0, 
-                                        startingDirectory = dir, fileFilter = 'Weight Files (*%s)' % SkinCluster.kFileExtension)
+                                        startingDirectory = dir, fileFilter = SkinCluster.kFileFilter)
         #return if no filePath is found
         if not filePath:
             return
@@ -204,14 +364,20 @@ class SkinCluster(object):
             filePath = filePath[0]
         
         #check to see if extension is attached to the filePath
-        if not filePath.endswith(SkinCluster.kFileExtension):
-            filePath += SkinCluster.kFileExtension
+        if not filePath.endswith((SkinCluster.kFileExtension, SkinCluster.kBinaryFileExtension)):
+            filePath += SkinCluster.kBinaryFileExtension
         
         #gather the data
         self.getData()
         
-        #export the data
-        pyon.save(self.data, filePath)
+        #export the data, binary files are picked by extension
+        if filePath.endswith(SkinCluster.kBinaryFileExtension):
+            weightFile.save(filePath, self.data, mesh = self.shape,
+                            topology = SkinCluster.getTopologyHash(self.shape))
+        else:
+            data = ordereddict.OrderedDict(self.data)
+            data['weights'] = self.data['weights'].toInfluenceWeights()
+            pyon.save(data, filePath)
         
     
 
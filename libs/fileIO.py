@@ -9,9 +9,14 @@ This is the common module for all the common utility functions
 #importing python modules
 import os
 import shutil
+import tempfile
+from contextlib import contextmanager
 
-#import maya modules
-import maya.cmds as cmds
+#import maya modules, the file functions work without Maya
+try:
+	import maya.cmds as cmds
+except ImportError:
+	cmds = None
 
 
 def copyFile(src, dst):
@@ -30,6 +35,47 @@ def copyDir(src,dst, ignore = None):
 	shutil.copytree(src, dst, ignore=ignore)
 
 	
+@contextmanager
+def atomicWrite(filepath, mode = 'w'):
+	'''
+	Opens a temporary file next to filepath to write to. When the with
+	block finishes the temporary file replaces filepath, if it raises
+	the temporary file is removed and filepath is left as it was.
+	
+	@example:
+		>>> with fileIO.atomicWrite(filepath) as f:
+		...     f.write(data)
+	
+	@param filepath: File path the data is for
+	@type filepath: *str*
+	
+	@param mode: Mode to open the temporary file with
+	@type mode: *str*
+	'''
+	directory, filename = os.path.split(os.path.abspath(filepath))
+	handle, tempPath = tempfile.mkstemp(prefix = '.%s.' % filename, suffix = '.tmp', dir = directory)
+	f = os.fdopen(handle, mode)
+	try:
+		yield f
+		f.flush()
+		os.fsync(f.fileno())
+		f.close()
+		
+		#mkstemp only gives the owner permissions
+		if os.path.exists(filepath):
+			shutil.copymode(filepath, tempPath)
+		else:
+			os.chmod(tempPath, 0644)
+		#windows will not rename over an existing file
+		if os.name == 'nt' and os.path.exists(filepath):
+			os.remove(filepath)
+		os.rename(tempPath, filepath)
+	except:
+		f.close()
+		if os.path.exists(tempPath):
+			os.remove(tempPath)
+		raise
+	
 def isFile(filename):
 	if os.path.isfile(filename):
 		return True
@@ -58,6 +104,8 @@ def loadPlugin(name):
 	@param name: Name of the plugin with extension
 	@type name: *str*  
 	'''
+	if cmds is None:
+		raise RuntimeError('Maya is needed to load the %s plugin' % name)
 	try:
 		if not cmds.pluginInfo(name, q = True, l = True):
 			cmds.loadPlugin(name)
@@ -0,0 +1,357 @@
+'''
+Ordered dictionary with fast positional access
+
+IndexedOrderedDict keeps its keys in a blocked list: the order is split
+into blocks of at most 2 * LOAD keys, and a binary indexed (Fenwick) tree
+over the block lengths finds the block for any position. Each key
+remembers which block it is in. That makes insert at a position, move,
+index of a key and item at an index O(log n) plus a scan of one bounded
+block, instead of the O(n) rebuild that reordering ordereddict.OrderedDict
+takes.
+
+:example:
+    >>> d = indexeddict.IndexedOrderedDict([('a', 1), ('c', 3)])
+    >>> d.insert(1, 'b', 2)
+    >>> d.keys()
+    ['a', 'b', 'c']
+    >>> d.move('c', 0)
+    >>> d.index('a')
+    1
+    >>> d.itemAtIndex(2)
+    ('b', 2)
+'''
+
+#the size blocks are split back down to when they grow past LOAD * 2
+LOAD = 32
+
+class _Block(object):
+    '''
+    A run of keys, and where the run is in the list of blocks
+    '''
+    __slots__ = ('keys', 'index')
+
+    def __init__(self, keys, index):
+        self.keys  = keys
+        self.index = index
+
+
+class IndexedOrderedDict(dict):
+    __slots__ = ('__blocks', '__blockOf', '__tree')
+
+    def __init__(self, *args, **kwargs):
+        if len(args) > 1:
+            raise TypeError('expected at most 1 arguments, got %d' % len(args))
+        self.__blocks  = list()
+        self.__blockOf = dict() #<-- key : _Block the key is in
+        self.__tree    = [0]    #<-- fenwick tree over the block lengths
+        self.update(*args, **kwargs)
+
+    #---------------------------------------------
+    #Block bookkeeping
+    #---------------------------------------------
+    def __rebuild(self):
+        '''
+        Renumbers the blocks and rebuilds the fenwick tree from scratch.
+        Only needed when blocks are split or removed.
+        '''
+        size = len(self.__blocks)
+        tree = [0] * (size + 1)
+        for i, block in enumerate(self.__blocks):
+            block.index = i
+            tree[i + 1] += len(block.keys)
+            parent = (i + 1) + ((i + 1) & -(i + 1))
+            if parent <= size:
+                tree[parent] += tree[i + 1]
+        self.__tree = tree
+
+    def __addToBlock(self, blockIndex, delta):
+        tree = self.__tree
+        i = blockIndex + 1
+        size = len(tree)
+        while i < size:
+            tree[i] += delta
+            i += i & -i
+
+    def __offset(self, blockIndex):
+        '''
+        Returns the number of keys in the blocks before the given block
+        '''
+        tree = self.__tree
+        i = blockIndex
+        total = 0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def __locate(self, index):
+        '''
+        Returns the block holding the given position and the position
+        inside of that block.
+        '''
+        tree = self.__tree
+        size = len(tree) - 1
+        pos = 0
+        step = 1
+        while step * 2 <= size:
+            step *= 2
+        while step:
+            nextPos = pos + step
+            if nextPos <= size and tree[nextPos] <= index:
+                pos = nextPos
+                index -= tree[nextPos]
+            step //= 2
+        return self.__blocks[pos], index
+
+    def __normalizeIndex(self, index):
+        '''
+        Clamps the index the same way list.insert() does
+        '''
+        length = len(self.__blockOf)
+        if index is None:
+            return length
+        if index < 0:
+            index += length
+            if index < 0:
+                index = 0
+        if index > length:
+            index = length
+        return index
+
+    def __insertKey(self, index, key):
+        blocks = self.__blocks
+        if not blocks:
+            block = _Block([key], 0)
+            blocks.append(block)
+            self.__blockOf[key] = block
+            self.__rebuild()
+            return
+
+        if index >= len(self.__blockOf):
+            #appending is the common case, skip the tree search
+            block = blocks[-1]
+            block.keys.append(key)
+        else:
+            block, position = self.__locate(index)
+            block.keys.insert(position, key)
+        self.__blockOf[key] = block
+
+        if len(block.keys) > LOAD * 2:
+            #split the block in half
+            half = len(block.keys) // 2
+            newBlock = _Block(block.keys[half:], block.index + 1)
+            del block.keys[half:]
+            for k in newBlock.keys:
+                self.__blockOf[k] = newBlock
+            blocks.insert(block.index + 1, newBlock)
+            self.__rebuild()
+        else:
+            self.__addToBlock(block.index, 1)
+
+    def __removeKey(self, key):
+        block = self.__blockOf.pop(key)
+        block.keys.remove(key)
+        if not block.keys:
+            self.__blocks.pop(block.index)
+            self.__rebuild()
+        else:
+            self.__addToBlock(block.index, -1)
+
+    #---------------------------------------------
+    #Dictionary methods
+    #---------------------------------------------
+    def __setitem__(self, key, value):
+        if not dict.__contains__(self, key):
+            self.__insertKey(len(self.__blockOf), key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self.__removeKey(key)
+
+    def __iter__(self):
+        for block in self.__blocks:
+            for key in block.keys:
+                yield key
+
+    def __reversed__(self):
+        for block in reversed(self.__blocks):
+            for key in reversed(block.keys):
+                yield key
+
+    def clear(self):
+        dict.clear(self)
+        self.__blocks  = list()
+        self.__blockOf = dict()
+        self.__tree    = [0]
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def iterkeys(self):
+        return iter(self)
+
+    def itervalues(self):
+        for key in self:
+            yield self[key]
+
+    def iteritems(self):
+        for key in self:
+            yield (key, self[key])
+
+    def update(self, *args, **kwargs):
+        if args:
+            other = args[0]
+            if hasattr(other, 'keys'):
+                for key in other.keys():
+                    self[key] = other[key]
+            else:
+                for key, value in other:
+                    self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def setdefault(self, key, default = None):
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    __marker = object()
+
+    def pop(self, key, default = __marker):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        if default is self.__marker:
+            raise KeyError(key)
+        return default
+
+    def popitem(self, last = True):
+        if not self:
+            raise KeyError('dictionary is empty')
+        if last:
+            key = next(reversed(self))
+        else:
+            key = next(iter(self))
+        value = self.pop(key)
+        return key, value
+
+    def copy(self):
+        return self.__class__(self)
+
+    @classmethod
+    def fromkeys(cls, iterable, value = None):
+        d = cls()
+        for key in iterable:
+            d[key] = value
+        return d
+
+    def __reduce__(self):
+        items = [[k, self[k]] for k in self]
+        return self.__class__, (items,)
+
+    def __repr__(self):
+        if not self:
+            return '%s()' % (self.__class__.__name__,)
+        return '%s(%r)' % (self.__class__.__name__, self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, IndexedOrderedDict):
+            if len(self) != len(other):
+                return False
+            for p, q in zip(self.iteritems(), other.iteritems()):
+                if p != q:
+                    return False
+            return True
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    #---------------------------------------------
+    #Positional methods
+    #---------------------------------------------
+    def insert(self, index, key, value):
+        '''
+        Adds the key:value pair at the given position, following the
+        same rules as list.insert(). If the key already exists its value
+        is replaced and it is moved to the position.
+
+        :param index: Position to put the key at
+        :type index: *int*
+
+        :param key: Key to add
+        :type key: *str*
+
+        :param value: Value for the key
+        '''
+        if dict.__contains__(self, key):
+            self.move(key, index)
+        else:
+            self.__insertKey(self.__normalizeIndex(index), key)
+        dict.__setitem__(self, key, value)
+
+    def move(self, key, index):
+        '''
+        Moves the key to the given position. The position is used as if
+        the key had already been taken out, the same as popping it from
+        a list and inserting it again.
+
+        :param key: Key to move
+        :type key: *str*
+
+        :param index: Position to move the key to
+        :type index: *int*
+        '''
+        if not dict.__contains__(self, key):
+            raise KeyError('%s is not a valid key in %s' % (key, self))
+        self.__removeKey(key)
+        self.__insertKey(self.__normalizeIndex(index), key)
+
+    def index(self, key):
+        '''
+        Returns the position of the key
+
+        :param key: Key to find
+        :type key: *str*
+
+        :rtype: *int*
+        '''
+        block = self.__blockOf.get(key)
+        if block is None:
+            raise KeyError('%s is not a valid key in %s' % (key, self))
+        return self.__offset(block.index) + block.keys.index(key)
+
+    def keyAtIndex(self, index):
+        '''
+        Returns the key at the given position. Negative positions count
+        from the end like a list.
+
+        :param index: Position of the key
+        :type index: *int*
+        '''
+        length = len(self)
+        if index < 0:
+            index += length
+        if index < 0 or index >= length:
+            raise IndexError('list index out of range')
+        block, position = self.__locate(index)
+        return block.keys[position]
+
+    def itemAtIndex(self, index):
+        '''
+        Returns the (key, value) pair at the given position.
+
+        :param index: Position of the item
+        :type index: *int*
+        '''
+        key = self.keyAtIndex(index)
+        return key, self[key]
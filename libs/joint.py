@@ -30,10 +30,11 @@ def create(name, parent = None, position = [0,0,0]):
     cmds.select(cl = True)
 
     jnt = cmds.joint(n = name, position = position)
+    common.registerName(jnt)
 
     if parent:
         if not cmds.objExists(parent):
-            cmds.createNode('transform', n = parent)
+            common.registerName(cmds.createNode('transform', n = parent))
             cmds.xform(parent, ws = True, t = position)
         
         cmds.parent(jnt, parent)
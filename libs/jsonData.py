@@ -2,6 +2,8 @@ import json
 import sys
 import os
 
+from japeto.libs import fileIO
+
 def dump(data):
     '''
     encodes python data to json data
@@ -16,15 +18,18 @@ def dump(data):
 
 def save(data, filepath = None):
     '''
-    saves data out to a json file
+    saves data out to a json file. The data is streamed to a temporary
+    file next to filepath which replaces filepath once it has all been
+    written.
     
     @param data:
     @param filepath:
     '''
-    f = open(filepath, 'w')
-    newData = dump(data)
-    f.write( newData ) 
-    f.close()
+    if not isinstance(data, dict):
+        raise TypeError('%s must be of type dict()' % data)
+    
+    with fileIO.atomicWrite(filepath) as f:
+        json.dump(data, f, sort_keys = True, indent = 4)
     
     return filepath
     
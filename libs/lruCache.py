@@ -0,0 +1,132 @@
+'''
+Bounded least recently used cache
+
+LruCache keeps at most size values. Getting or setting a key makes it the
+most recently used one, and setting a new key when the cache is full
+drops the least recently used one. The order is kept in a circular
+doubly linked list of small lists, so every operation is O(1).
+
+:example:
+    >>> cache = lruCache.LruCache(2)
+    >>> cache['a'] = 1
+    >>> cache['b'] = 2
+    >>> cache.get('a')
+    1
+    >>> cache['c'] = 3
+    >>> 'b' in cache
+    False
+'''
+#positions in a link
+_PREVIOUS, _NEXT, _KEY, _VALUE = 0, 1, 2, 3
+
+class LruCache(object):
+    '''
+    :param size: Most values the cache keeps
+    :type size: int
+    '''
+    __slots__ = ('__size', '__links', '__root', '__hits', '__misses')
+
+    def __init__(self, size = 1024):
+        if size < 1:
+            raise ValueError('LruCache size must be at least 1, not %s' % size)
+        self.__size   = size
+        self.__links  = dict() #<-- key : [previous, next, key, value]
+        self.__root   = list()
+        self.__root[:] = [self.__root, self.__root, None, None]
+        self.__hits   = 0
+        self.__misses = 0
+
+    def __repr__(self):
+        return '< %s: %s of %s >' % (self.__class__.__name__, len(self.__links), self.__size)
+
+    def __len__(self):
+        return len(self.__links)
+
+    def __contains__(self, key):
+        return key in self.__links
+
+    def __getitem__(self, key):
+        link = self.__links.get(key)
+        if link is None:
+            raise KeyError(key)
+        self.__moveToFront(link)
+        return link[_VALUE]
+
+    def __setitem__(self, key, value):
+        link = self.__links.get(key)
+        if link is not None:
+            link[_VALUE] = value
+            self.__moveToFront(link)
+            return
+
+        root = self.__root
+        if len(self.__links) >= self.__size:
+            #reuse the least recently used link for the new key
+            oldest = root[_PREVIOUS]
+            del self.__links[oldest[_KEY]]
+            oldest[_KEY] = key
+            oldest[_VALUE] = value
+            self.__links[key] = oldest
+            self.__moveToFront(oldest)
+            return
+
+        first = root[_NEXT]
+        link = [root, first, key, value]
+        first[_PREVIOUS] = root[_NEXT] = link
+        self.__links[key] = link
+
+    def __delitem__(self, key):
+        link = self.__links.pop(key)
+        link[_PREVIOUS][_NEXT] = link[_NEXT]
+        link[_NEXT][_PREVIOUS] = link[_PREVIOUS]
+
+    def __moveToFront(self, link):
+        root = self.__root
+        if root[_NEXT] is link:
+            return
+        link[_PREVIOUS][_NEXT] = link[_NEXT]
+        link[_NEXT][_PREVIOUS] = link[_PREVIOUS]
+        first = root[_NEXT]
+        link[_PREVIOUS] = root
+        link[_NEXT] = first
+        first[_PREVIOUS] = root[_NEXT] = link
+
+    def get(self, key, default = None):
+        '''
+        Returns the value for key, default if it is not cached. Counts a
+        hit or a miss.
+        '''
+        link = self.__links.get(key)
+        if link is None:
+            self.__misses += 1
+            return default
+        self.__hits += 1
+        self.__moveToFront(link)
+        return link[_VALUE]
+
+    def keys(self):
+        '''
+        Returns the keys, most recently used first
+        '''
+        keys = list()
+        root = self.__root
+        link = root[_NEXT]
+        while link is not root:
+            keys.append(link[_KEY])
+            link = link[_NEXT]
+        return keys
+
+    def size(self):
+        return self.__size
+
+    def hits(self):
+        return self.__hits
+
+    def misses(self):
+        return self.__misses
+
+    def clear(self):
+        self.__links.clear()
+        self.__root[:] = [self.__root, self.__root, None, None]
+        self.__hits = 0
+        self.__misses = 0
@@ -0,0 +1,480 @@
+'''
+Naming convention
+
+The tokens of the naming template, parseName() to split a name in to
+them, and NameRegistry to hand out unique names without asking the scene
+about every one. common imports all of it, so it is used through common
+in Maya. Nothing here needs Maya, except NameRegistry.refresh() taking
+the names in the scene.
+
+Names follow NAMETEMPLATE, for example:
+
+    side_location(optional)_description_###(optional)_class(optional)_type
+'''
+#import python modules
+from contextlib import contextmanager
+
+#import maya modules, the name functions work without Maya
+try:
+    import maya.cmds as cmds
+except ImportError:
+    cmds = None
+
+#import package modules
+from japeto.libs import lruCache
+
+#side constants
+LEFT   = 'l'
+RIGHT  = 'r'
+CENTER = 'c'
+
+SIDES   = {"left" : LEFT, "right" : RIGHT,
+            "center" : CENTER}
+
+#location constants
+FRONT   = 'fr'
+BACK    = 'bk'
+MIDDLE  = 'md'
+TOP     = 'tp'
+BOTTOM  = 'bt'
+
+LOCATIONS = {'front' : FRONT, 'back' : BACK, 'middle' : MIDDLE,
+         'top': TOP, 'bottom' : BOTTOM}
+
+#Naming template variables
+DELIMITER = "_"
+NAMETEMPLATE  = "SIDE.LOCATION.DESCRIPTION.NUMBER.CLASS.TYPE"
+PADDING = 3
+REQUIRED = ["SIDE", "DESCRIPTION", "TYPE"]
+
+
+def padNumber(number, pad):
+    '''
+    .. python:
+        padNumber(2,3)
+        #return: '002'
+
+    @param number: number to use
+    @type number: *int*
+
+    @param pad: number padding to use (i.e. '3')
+    @type pad: *int*
+
+    @return: number string with correct padding
+    @rtype: *str*
+
+    '''
+
+    if not isinstance(number, int):
+        raise ValueError('%s must be an integer data type' % number)
+
+    if not isinstance(pad, int):
+        raise ValueError('%s must be an integer data type' % pad)   
+
+    padNumberStr = str(number)
+    pad = pad - len(padNumberStr)
+
+    for i in range(pad):
+        padNumberStr = '0%s' % padNumberStr 
+
+    return padNumberStr 
+
+
+# ------------------------------------------------------------------------------
+# Name registry
+class NameRegistry(object):
+    '''
+    The names of the nodes in the scene, taken with one cmds.ls() call,
+    that hands out unique names without asking the scene again. Every
+    base name keeps a counter of the next padded index to try, so a name
+    that has collided many times does not walk through all its indices
+    again.
+
+    Nodes created while the registry is open have to be added to it,
+    which the creation helpers do through registerName(). Call refresh()
+    after creating nodes any other way.
+
+    Example:
+
+    .. python::
+        registry = NameRegistry()
+        registry.uniqueName('l_leg')
+        #Return: 'l_leg_001' when l_leg exists
+    '''
+    def __init__(self, names = None):
+        '''
+        @param names: Names to start with, the names in the scene if None
+        @type names: *list*
+        '''
+        self.__names    = set()
+        self.__counters = dict() #<-- base name : next index to try
+
+        if names is None:
+            self.refresh()
+        else:
+            self.update(names)
+
+    def __repr__(self):
+        return '< %s: %s names >' % (self.__class__.__name__, len(self.__names))
+
+    def __len__(self):
+        return len(self.__names)
+
+    def __contains__(self, name):
+        return name in self.__names
+
+    def refresh(self):
+        '''
+        Takes the names from the scene again
+        '''
+        if cmds is None:
+            raise RuntimeError('The names in the scene can only be taken in Maya, pass the names instead')
+        self.__names.clear()
+        self.__counters.clear()
+        self.update(cmds.ls() or list())
+
+    def update(self, names):
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        '''
+        Adds a name. Paths are added along with the name of their last node,
+        the way cmds.objExists() finds them.
+        '''
+        self.__names.add(name)
+        if '|' in name:
+            self.__names.add(name.rsplit('|', 1)[-1])
+
+    def remove(self, name):
+        self.__names.discard(name)
+        self.__counters.pop(name, None)
+
+    def uniqueName(self, name, i = 1, reserve = True):
+        '''
+        Returns name if it is free, otherwise name with the next free padded
+        index
+
+        @param name: Base name
+        @type name: *str*
+
+        @param i: Lowest index to use
+        @type i: *int*
+
+        @param reserve: Add the name that is returned, so it is not handed
+                        out again
+        @type reserve: *bool*
+
+        @rtype: *str*
+        '''
+        names = self.__names
+        newName = name
+        if newName in names:
+            i = max(i, self.__counters.get(name, i))
+            newName = '%s_%s' % (name, padNumber(i, PADDING))
+            while newName in names:
+                i += 1
+                newName = '%s_%s' % (name, padNumber(i, PADDING))
+            self.__counters[name] = i + 1
+
+        if reserve:
+            names.add(newName)
+
+        return newName
+
+
+_registry      = None
+_registryDepth = 0
+
+@contextmanager
+def nameRegistry():
+    '''
+    Opens a NameRegistry for common.checkName() and common.generateNames()
+    to use. Opening it again while it is open uses the same registry.
+
+    Example:
+
+    .. python::
+        with nameRegistry():
+            names = [common.checkName('l_finger') for i in range(5)]
+    '''
+    global _registry, _registryDepth
+    if _registry is None:
+        _registry = NameRegistry()
+    _registryDepth += 1
+    try:
+        yield _registry
+    finally:
+        _registryDepth -= 1
+        if not _registryDepth:
+            _registry = None
+
+def registerName(*names):
+    '''
+    Adds the names of nodes that were created to the open NameRegistry, if
+    there is one
+    '''
+    if _registry is not None:
+        _registry.update(names)
+
+def currentRegistry():
+    '''
+    Returns the open NameRegistry, None if there isn't one
+    '''
+    return _registry
+
+
+# ------------------------------------------------------------------------------
+# Name parsing
+
+#tokens that can be each part of a name, in the order the get functions
+#have always looked for them
+_SIDE_ORDER     = tuple(SIDES.values())
+_LOCATION_ORDER = tuple(LOCATIONS.values())
+_SIDE_TOKENS     = frozenset(_SIDE_ORDER)
+_LOCATION_TOKENS = frozenset(_LOCATION_ORDER)
+
+#number of parsed names kept
+NAME_CACHE_SIZE = 4096
+
+_nameCache = lruCache.LruCache(NAME_CACHE_SIZE)
+
+class NameTokens(tuple):
+    '''
+    The parts of a name that follows NAMETEMPLATE, as parseName() finds
+    them. Parts that are not in the name are None.
+    '''
+    __slots__ = ()
+
+    def __new__(cls, side, location, description, number, nameClass, nameType):
+        return tuple.__new__(cls, (side, location, description, number, nameClass, nameType))
+
+    def __repr__(self):
+        return ('NameTokens(side=%r, location=%r, description=%r, number=%r, nameClass=%r, nameType=%r)'
+                % tuple(self))
+
+    side        = property(lambda self: self[0])
+    location    = property(lambda self: self[1])
+    description = property(lambda self: self[2])
+    number      = property(lambda self: self[3])
+    nameClass   = property(lambda self: self[4])
+    nameType    = property(lambda self: self[5])
+
+
+def _tokenAt(tokens, index):
+    if 0 <= index < len(tokens):
+        return tokens[index]
+    return None
+
+def parseName(name):
+    '''
+    Splits a name in to the parts of the naming template in one pass over
+    its tokens. Results are cached, so parsing the same name again is a
+    dictionary lookup.
+
+    Example:
+
+    .. python::
+        parseName("l_fr_leg_001_ik_ctrl")
+        NameTokens(side='l', location='fr', description='leg', number='001', nameClass='ik', nameType='ctrl')
+
+    @param name: Object name
+    @type name: *str*
+
+    @return: The parts of the name
+    @rtype: *NameTokens*
+    '''
+    if not isinstance(name, basestring):
+        raise RuntimeError('%s can only be passed as a string argument!' % name)
+
+    tokens = _nameCache.get(name)
+    if tokens is not None:
+        return tokens
+
+    key = name
+    if isinstance(name, unicode):
+        name = str(name)
+
+    nameList = name.split(DELIMITER)
+
+    #first position of every side and location token, and the first number
+    found = dict()
+    numberIndex = -1
+    for index, token in enumerate(nameList):
+        if token in _SIDE_TOKENS or token in _LOCATION_TOKENS:
+            found.setdefault(token, index)
+        elif numberIndex == -1 and token.isdigit():
+            numberIndex = index
+
+    side = None
+    for token in _SIDE_ORDER:
+        if token in found:
+            side = token
+            break
+
+    location = None
+    for token in _LOCATION_ORDER:
+        if token in found:
+            location = token
+            break
+
+    number = _tokenAt(nameList, numberIndex)
+    if location:
+        description = _tokenAt(nameList, found[location] + 1)
+    else:
+        description = _tokenAt(nameList, 1)
+
+    nameClass = None
+    count = len(nameList)
+    if number and count == (6 if location else 5):
+        nameClass = _tokenAt(nameList, numberIndex + 1)
+    elif not number and location and count == 5:
+        nameClass = _tokenAt(nameList, found[location] + 2)
+    elif not number and not location and count == 4 and description is not None:
+        nameClass = _tokenAt(nameList, nameList.index(description) + 1)
+
+    nameType = None
+    if side and description:
+        nameType = nameList[-1]
+
+    tokens = NameTokens(side, location, description, number, nameClass, nameType)
+    _nameCache[key] = tokens
+    return tokens
+
+def clearNameCache():
+    '''
+    Empties the cache parseName() keeps
+    '''
+    _nameCache.clear()
+
+def getSide(name):
+    '''
+    Get a possible side reference from object name
+
+    Example:
+
+    .. python::
+        # Get side token from name
+        getSide ("l_fr_leg_001_ik_ctrl")
+        "l"
+
+    :note: Valid side tokens defined in SIDES constant variable
+    :note: The search pattern goes start > end
+
+    @param name: Object name
+    @type name: *str*
+
+    @return: Return side if found
+    @rtype: *str*
+    '''
+    return parseName(name).side
+
+def getLocation(name):
+    '''
+    Get a possible location reference from object name
+
+    Example:
+
+    .. python::
+        # Get side token from name
+        getLocation ("l_fr_leg_001_ik_ctrl")
+        "fr"
+
+    :note: Valid location tokens defined in LOCATIONS constant variable
+    :note: The search pattern goes start > end
+
+    @param name: Object name
+    @type name: *str*
+
+    @return: Return side if found
+    @rtype: *str*
+    '''
+    return parseName(name).location
+
+def getDescription(name):
+    '''
+    Get a possible description reference from object name
+
+    Example:
+
+    .. python::
+        # Get description token from name
+        getSide ("l_fr_leg_001_ik_ctrl")
+        "leg"
+
+    :note: The token after the location, or the second token when there
+           is no location
+
+    @param name: Object name
+    @type name: *str*
+
+    @return: Return description if found
+    @rtype: *str*
+    '''
+    return parseName(name).description
+
+
+def getNumber(name):
+    '''
+    Get a possible Number reference from object name
+
+    Example:
+
+    .. python::
+        # Get Number token from name
+        getSide ("l_fr_leg_001_ik_ctrl")
+        "001"
+
+    :note: The first token that is all digits
+
+    @param name: Object name
+    @type name: *str*
+
+    @return: Return number if found
+    @rtype: *str*
+    '''
+    return parseName(name).number
+
+
+def getClass(name):
+    '''
+    Get a possible CLASS reference from object name
+
+    Example:
+
+    .. python::
+        # Get CLASS token from name
+        getClass ("l_fr_leg_001_ik_ctrl")
+        "ik"
+
+    :note: Only found when the name has every part of the template
+
+    @param name: Object name
+    @type name: *str*
+
+    @return: Return class if found
+    @rtype: *str*
+    '''
+    return parseName(name).nameClass
+
+
+def getNameType(name):
+    '''
+    Get a possible TYPE reference from object name
+
+    Example:
+
+    .. python::
+        # Get TYPE token from name
+        getNameType ("l_fr_leg_001_ik_ctrl")
+        "ctrl"
+
+    :note: The last token, when the name has a side and a description
+
+    @param name: Object name
+    @type name: *str*
+
+    @return: Return type if found
+    @rtype: *str*
+    '''
+    return parseName(name).nameType
@@ -0,0 +1,300 @@
+'''
+Bulk node creation
+
+A NodeBatch is a declaration of nodes, with their names, types, parents
+and the values of their attributes. Executing it creates all of them
+with the nodeBatch command, which runs them through one MDagModifier and
+is one undo step, instead of a createNode, parent, rename and setAttr
+command for each of them.
+
+Declaring nodes does not need Maya. Every node declared gets a
+NodeHandle, which stands for the node until the batch is executed and
+resolves to the name Maya gave it after that, so handles can be used as
+parents of other nodes in the batch and kept to use the nodes later.
+
+:example:
+    >>> with nodeBatch.batch() as batch:
+    ...     rigGrp = batch.createNode('transform', 'l_arm_rig_grp')
+    ...     jointsGrp = batch.createNode('transform', 'l_arm_jnts_grp', parent = rigGrp)
+    ...     noXform = batch.createNode('transform', 'l_arm_noXform_grp', parent = rigGrp,
+    ...                                attributes = {'inheritsTransform' : 0})
+    >>> jointsGrp.name()
+    'l_arm_jnts_grp'
+'''
+#import python modules
+import json
+from contextlib import contextmanager
+
+try:
+    import maya.cmds as cmds
+except ImportError:
+    cmds = None
+
+#types attribute values can be
+_VALUE_TYPES = (bool, int, long, float, basestring)
+
+def _checkValue(attr, value):
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            if not isinstance(item, _VALUE_TYPES) or isinstance(item, basestring):
+                raise TypeError('%s can not be set to %r, compound values have to be numbers' % (attr, value))
+    elif not isinstance(value, _VALUE_TYPES):
+        raise TypeError('%s can not be set to %r, it is not a number, string or list of numbers' % (attr, value))
+
+class NodeHandle(object):
+    '''
+    A node declared in a NodeBatch
+    '''
+    __slots__ = ('__batch', '__index', '__type', '__name', '__parent', '__attributes', '__resolved')
+
+    def __init__(self, batch, index, type, name, parent):
+        self.__batch      = batch
+        self.__index      = index
+        self.__type       = type
+        self.__name       = name
+        self.__parent     = parent
+        self.__attributes = list()
+        self.__resolved   = None
+
+    def __repr__(self):
+        return '< %s: %s %s >' % (self.__class__.__name__, self.__type, self.name())
+
+    def __str__(self):
+        return self.name()
+
+    def batch(self):
+        return self.__batch
+
+    def index(self):
+        '''
+        Returns the position of the node in its batch
+        '''
+        return self.__index
+
+    def type(self):
+        return self.__type
+
+    def parent(self):
+        '''
+        Returns the NodeHandle or name of the parent, None for the world
+        '''
+        return self.__parent
+
+    def attributes(self):
+        '''
+        Returns the attributes set on the node, as (attribute, value)
+        '''
+        return list(self.__attributes)
+
+    def name(self):
+        '''
+        Returns the name of the node, the name it was declared with until
+        the batch is executed. Nodes declared without a name have None
+        until then.
+        '''
+        if self.__resolved is not None:
+            return self.__resolved
+        return self.__name
+
+    def attr(self, attr):
+        '''
+        Returns the path of an attribute of the node
+        '''
+        return '%s.%s' % (self.name(), attr)
+
+    def isResolved(self):
+        return self.__resolved is not None
+
+    def _setAttr(self, attr, value):
+        self.__attributes.append((attr, value))
+
+    def _resolve(self, name):
+        self.__resolved = name
+
+
+class NodeBatch(object):
+    '''
+    Nodes declared to be created together
+    '''
+    def __init__(self):
+        self.__handles  = list()
+        self.__executed = False
+
+    def __repr__(self):
+        return '< %s: %s nodes >' % (self.__class__.__name__, len(self.__handles))
+
+    def __len__(self):
+        return len(self.__handles)
+
+    def __iter__(self):
+        return iter(self.__handles)
+
+    def __checkOpen(self):
+        if self.__executed:
+            raise RuntimeError('%s has been executed, declare new nodes in a new batch' % self)
+
+    def __handle(self, node):
+        if not isinstance(node, NodeHandle) or node.batch() is not self:
+            raise ValueError('%r was not declared in %s' % (node, self))
+        return node
+
+    def createNode(self, type, name = None, parent = None, attributes = None):
+        '''
+        Declares a node
+
+        :param type: Type of the node
+        :type type: str
+
+        :param name: Name of the node, the default name for its type if None
+        :type name: str
+
+        :param parent: Parent of a dag node, a NodeHandle of this batch, a
+                       resolved NodeHandle or the name of a node in the scene
+        :type parent: NodeHandle | str
+
+        :param attributes: Values to set, attribute : value. Values are
+                           numbers, strings or lists of numbers for
+                           compound attributes.
+        :type attributes: dict
+
+        :rtype: NodeHandle
+        '''
+        self.__checkOpen()
+        if not isinstance(type, basestring) or not type:
+            raise TypeError('%r is not a node type' % type)
+        if name is not None and not isinstance(name, basestring):
+            raise TypeError('%r is not a name' % name)
+
+        if isinstance(parent, NodeHandle) and parent.batch() is not self:
+            if not parent.isResolved():
+                raise ValueError('%r is in a batch that has not been executed' % parent)
+            parent = parent.name()
+        elif parent is not None and not isinstance(parent, (NodeHandle, basestring)):
+            raise TypeError('%r is not a NodeHandle or the name of a node' % parent)
+
+        handle = NodeHandle(self, len(self.__handles), type, name, parent)
+        self.__handles.append(handle)
+        for attr, value in sorted((attributes or dict()).items()):
+            self.setAttr(handle, attr, value)
+
+        return handle
+
+    def setAttr(self, node, attr, value):
+        '''
+        Declares the value of an attribute of a node in the batch. Values
+        are set after every node has been created, in the order they were
+        declared.
+
+        :param node: Node declared in this batch
+        :type node: NodeHandle
+        '''
+        self.__checkOpen()
+        if not isinstance(attr, basestring) or not attr:
+            raise TypeError('%r is not an attribute' % attr)
+        _checkValue(attr, value)
+        self.__handle(node)._setAttr(attr, value)
+
+    def handles(self):
+        return list(self.__handles)
+
+    def executed(self):
+        return self.__executed
+
+    def records(self):
+        '''
+        Returns the batch as the records the nodeBatch command takes, one
+        [type, name, parent, attributes] for every node. Parents in the
+        batch are given by their index, parents in the scene by name.
+
+        :rtype: list
+        '''
+        records = list()
+        for handle in self.__handles:
+            parent = handle.parent()
+            if isinstance(parent, NodeHandle):
+                parent = parent.index()
+            records.append([handle.type(), handle.name(), parent,
+                            [[attr, list(value) if isinstance(value, tuple) else value]
+                             for attr, value in handle.attributes()]])
+        return records
+
+    def encode(self):
+        '''
+        Returns the records of the batch as the string the nodeBatch
+        command takes
+
+        :rtype: str
+        '''
+        return json.dumps(self.records(), separators = (',', ':'))
+
+    def resolve(self, names):
+        '''
+        Resolves every handle to the name the node was created with
+
+        :param names: Names of the nodes, in the order they were declared
+        :type names: list
+        '''
+        if len(names) != len(self.__handles):
+            raise RuntimeError('%s nodes were created for %s declared' % (len(names), len(self.__handles)))
+        for handle, name in zip(self.__handles, names):
+            handle._resolve(name)
+        self.__executed = True
+
+    def execute(self):
+        '''
+        Creates the nodes with the nodeBatch command and resolves their
+        handles
+
+        :return: Names of the nodes, in the order they were declared
+        :rtype: list
+        '''
+        self.__checkOpen()
+        if cmds is None:
+            raise RuntimeError('Maya is needed to execute %s' % self)
+        if not self.__handles:
+            self.__executed = True
+            return list()
+
+        names = cmds.nodeBatch(batch = self.encode()) or list()
+        self.resolve(names)
+
+        #common needs Maya, declaring nodes does not
+        from japeto.libs import common
+        common.registerName(*names)
+
+        return names
+
+
+def decode(batch):
+    '''
+    Returns the records of a batch from NodeBatch.encode(), checked
+
+    :rtype: list
+    '''
+    try:
+        records = json.loads(batch)
+    except ValueError, e:
+        raise ValueError('Not a node batch: %s' % e)
+    if not isinstance(records, list):
+        raise ValueError('Not a node batch: %r' % batch)
+
+    for index, record in enumerate(records):
+        if not isinstance(record, list) or len(record) != 4:
+            raise ValueError('Record %s of the node batch is not [type, name, parent, attributes]' % index)
+        parent = record[2]
+        if isinstance(parent, int) and not 0 <= parent < index:
+            raise ValueError('Record %s of the node batch is parented to %s, which is not declared before it' %
+                             (index, parent))
+        for attr, value in record[3]:
+            _checkValue(attr, value)
+    return records
+
+@contextmanager
+def batch():
+    '''
+    Opens a NodeBatch to declare nodes in and executes it when it closes.
+    A batch closed by an error is not executed.
+    '''
+    nodes = NodeBatch()
+    yield nodes
+    nodes.execute()
@@ -5,20 +5,47 @@ pyon data library
 
 #Import python modules
 import os
+import re
 import tempfile
 import inspect
+import cStringIO as StringIO
+from array import array
 import japeto.mlRig.ml_node as node
 from japeto.libs import ordereddict
+from japeto.libs import fileIO
 # ------------------------------------------------------------------------------
 # Create custom encoder
 #
+#number of floats formatted at a time when writing a list of floats
+FLOAT_CHUNK = 4096
+
+_FLOAT_TYPES = set( [float] )
+_STRING_ESCAPES = ( '\\', '"', '\n', '\r', '\t' )
+
 class Encoder( object ):
+    '''
+    Writes python data out as python literals.
+
+    write() streams the data to a file object while it goes, nothing
+    bigger than FLOAT_CHUNK numbers is ever held as one string. Runs of
+    floats in lists are formatted FLOAT_CHUNK at a time with one %
+    operation. Dicts are indented by how many dicts they are in, ordered
+    dicts are written in their order.
+
+    :param indent: Number of spaces to indent each level of dicts
+    :type indent: int
 
-    def __init__( self, indent=4, precision = 3 ):
+    :param precision: Number of decimal places floats are written with
+    :type precision: int
+
+    :param sort: Write the keys of plain dicts sorted
+    :type sort: bool
+    '''
+    def __init__( self, indent=4, precision = 3, sort = False ):
         
         self.indent    = indent
         self.precision = precision
-        self.__depth__ = 0
+        self.sort      = sort
         
     # --------------------------------------------------------------------------
     
@@ -32,65 +59,156 @@ class Encoder( object ):
         return '%i' % obj
     
     def encode_float( self, obj ):
-        #return '%.3f' % obj
         return ('%.' + str(self.precision) + 'f') % obj
 
     def encode_str( self, obj ):
+        for char in _STRING_ESCAPES:
+            if char in obj:
+                return '"%s"' % obj.encode( 'string_escape' ).replace( '"', '\\"' )
         return '"%s"' % obj
 
     def encode_unicode( self, obj ):
-        return '"%s"' % obj
+        return self.encode_str( obj.encode( 'utf-8' ) )
 
-    def encode_tuple( self, obj ):
+    def encode_method( self, obj ):
+        '''
+        @todo: Figure out how we really want to write this out
+        @warning: Still a WIP. Would not use this yet.
+        '''
+        return '%s.%s.%s' % (str(obj.__self__.__module__), str(obj.__self__.__class__.__name__), str(obj.__func__.__name__))
+    
+    # --------------------------------------------------------------------------
 
-        items = range( len( obj ) )
-        for i, value in enumerate( obj ):
-            items[i] = self.encode( value )
-        return '(%s)' % ', '.join(items)
+    def write_tuple( self, obj, write, depth ):
 
-    def encode_list( self, obj ):
+        write( '(' )
+        self.__writeItems( obj, write, depth )
+        #a tuple of one needs the comma to read back as a tuple
+        write( ',)' if len( obj ) == 1 else ')' )
 
-        items = range( len( obj ) )
-        for i, value in enumerate( obj ):
-            items[i] = self.encode( value )
-        return '[%s]' % ', '.join(items)
-    
-    def encode_ordereddict(self):
-        items = range( len( obj ) )
-        for i,k in enumerate(obj.keys()):
-            items[i] = '%s%s: %s' % ( ' '*self.indent*self.__depth__, self.encode( k ), self.encode( obj[k] ) )
-        self.__depth__ -= 1
-        
-    def encode_dict( self, obj ):
+    def write_list( self, obj, write, depth ):
 
-        items = range( len( obj ) )
-        for i,k in enumerate(obj.keys()):
-            items[i] = '%s%s: %s' % ( ' '*self.indent*self.__depth__, self.encode( k ), self.encode( obj[k] ) )
-        self.__depth__ -= 1
-        
-        return '\n%s{\n%s\n%s}' % (' '*self.indent*self.__depth__, ',\n'.join(items), ' '*self.indent*self.__depth__ )
-    
-    def encode_method( self, obj ):
+        write( '[' )
+        self.__writeItems( obj, write, depth )
+        write( ']' )
+
+    def write_dict( self, obj, write, depth ):
+
+        if not obj:
+            write( '{}' )
+            return
+
+        keys = obj.keys()
+        if self.sort and type( obj ) is dict:
+            keys.sort()
+
+        padding     = ' ' * self.indent * depth
+        itemPadding = padding + ' ' * self.indent
+        write( '\n%s{\n' % padding )
+        for i, key in enumerate( keys ):
+            if i:
+                write( ',\n' )
+            write( itemPadding )
+            self.__write( key, write, depth + 1 )
+            write( ': ' )
+            self.__write( obj[key], write, depth + 1 )
+        write( '\n%s}' % padding )
+
+    def write_node( self, obj, write, depth ):
         '''
         @todo: Figure out how we really want to write this out
         @warning: Still a WIP. Would not use this yet.
         '''
-        return '%s.%s.%s' % (str(obj.__self__.__module__), str(obj.__self__.__class__.__name__), str(obj.__func__.__name__))
-    
-    
-    def encode_node( self, obj ):
-
-        items = range( len( obj ) )
-        for i,k in enumerate(obj.keys()):
-            if isinstance(obj[k],node.MlNode):
-                items[i] = '%snode %s: %s' % ( ' '*self.indent*self.__depth__, self.encode( k ), self.encode( obj[k] ) )
-            else:
-                items[i] = '%s%s: %s' % ( ' '*self.indent*self.__depth__, self.encode( k ), self.encode( obj[k] ) )
-        self.__depth__ -= 1
-        
-        return '\n%s{\n%s\n%s}' % (' '*self.indent*self.__depth__, ',\n'.join(items), ' '*self.indent*self.__depth__ )
+        padding = ' ' * self.indent * depth
+        write( '\n%s{\n' % padding )
+        for i, key in enumerate( obj.keys() ):
+            if i:
+                write( ',\n' )
+            write( ' ' * self.indent * (depth + 1) )
+            if isinstance( obj[key], node.MlNode ):
+                write( 'node ' )
+            self.__write( key, write, depth + 1 )
+            write( ': ' )
+            self.__write( obj[key], write, depth + 1 )
+        write( '\n%s}' % padding )
+
+    def __writeItems( self, obj, write, depth ):
+        '''
+        Writes the items of a list or tuple separated by commas
+        '''
+        floatFormat = '%.' + str(self.precision) + 'f'
+        chunkFormat = ', '.join( [floatFormat] * FLOAT_CHUNK )
+        isFloatArray = isinstance( obj, array ) and obj.typecode in 'fd'
+
+        for start in xrange( 0, len( obj ), FLOAT_CHUNK ):
+            chunk = obj[start:start + FLOAT_CHUNK]
+            if start:
+                write( ', ' )
+
+            if isFloatArray or set( map( type, chunk ) ) == _FLOAT_TYPES:
+                if len( chunk ) != FLOAT_CHUNK:
+                    chunkFormat = ', '.join( [floatFormat] * len( chunk ) )
+                write( chunkFormat % tuple( chunk ) )
+                continue
+
+            for i, item in enumerate( chunk ):
+                if i:
+                    write( ', ' )
+                self.__write( item, write, depth )
+
+    def __write( self, obj, write, depth ):
+
+        if isinstance( obj, bool ):
+            write( self.encode_bool( obj ) )
+
+        elif isinstance( obj, (int, long) ):
+            write( self.encode_int( obj ) )
+
+        elif isinstance( obj, float ):
+            write( self.encode_float( obj ) )
+
+        elif isinstance( obj, str ):
+            write( self.encode_str( obj ) )
+
+        elif isinstance( obj, unicode ):
+            write( self.encode_unicode( obj ) )
+
+        elif obj is None:
+            write( self.encode_none( obj ) )
+
+        elif isinstance( obj, tuple ):
+            self.write_tuple( obj, write, depth )
+
+        elif isinstance( obj, (list, array) ):
+            self.write_list( obj, write, depth )
+
+        elif isinstance( obj, node.MlNode ):
+            self.write_node( obj, write, depth )
+
+        elif isinstance( obj, dict ):
+            self.write_dict( obj, write, depth )
+
+        elif inspect.ismethod( obj ):
+            write( self.encode_method( obj ) )
+
+        else:
+            raise TypeError( '%s of type %s can not be written to pyon' % (obj, type( obj ).__name__) )
+
     # --------------------------------------------------------------------------
 
+    def write( self, obj, f ):
+        '''
+        Writes the python object to the file object
+        
+        @param obj: Python object to write
+        @type obj: *str* *int* *float* *bool* *list* *tuple*
+                   *dict* *method* 
+
+        @param f: File like object to write to
+        @type f: *file*
+        '''
+        self.__write( obj, f.write, 0 )
+
     def encode( self, obj ):
         '''
         Checks the type of python object it is and calls the 
@@ -100,52 +218,307 @@ class Encoder( object ):
         @type obj: *str* *int* *float* *bool* *list* *tuple*
                    *dict* *method* 
         '''
-        if isinstance( obj, bool ):
-            return self.encode_bool( obj )
+        output = StringIO.StringIO()
+        self.write( obj, output )
+        return output.getvalue()
 
-        elif isinstance( obj, int ):
-            return self.encode_int( obj )
+# ------------------------------------------------------------------------------
+# Create custom decoder
+#
+#number of characters read from a file at a time
+CHUNK_SIZE = 1 << 20
 
-        # Parse float
-        elif isinstance( obj, float ):
-            return self.encode_float( obj )
+_WHITESPACE = re.compile(r'(?:\s+|#[^\n]*)*')
+_NUMBER     = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+_STRING     = re.compile(r'''[uU]?(?:"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')''')
+_NAME       = re.compile(r'[A-Za-z_][A-Za-z_0-9.]*')
+_NAMES      = {'True' : True, 'False' : False, 'None' : None}
 
-        elif isinstance( obj, str ):
-            return self.encode_str( obj )
+#characters a run of numbers in a list or tuple can be made of
+_NUMBER_CHARS = '0123456789+-.eE, \t\r\n'
+_NUMBER_START = '0123456789+-.'
 
-        elif isinstance( obj, unicode ):
-            return self.encode_unicode( obj )
+class Decoder( object ):
+    '''
+    Reads the python literals Encoder writes out without using eval().
+    Only dicts, lists, tuples, numbers, strings, True, False and None
+    are understood, anything else raises a ValueError.
 
-        # Parse tuple
-        elif isinstance( obj, tuple ):
-            return self.encode_tuple( obj )
+    Files are read CHUNK_SIZE characters at a time. Runs of numbers in a
+    list or tuple are found with str.find() and converted with a single
+    split() and map(), so a long list of weights is not tokenized one
+    number at a time.
 
-        # Parse list
-        elif isinstance( obj, list ):
-            return self.encode_list( obj )
+    :param arrays: Return lists of numbers as array('d') instead of list
+    :type arrays: bool
+
+    :param dictType: Type dicts are read in to
+    :type dictType: type
+
+    :param chunkSize: Number of characters to read from a file at a time
+    :type chunkSize: int
+    '''
+    def __init__( self, arrays = False, dictType = dict, chunkSize = CHUNK_SIZE ):
+
+        self.arrays    = arrays
+        self.dictType  = dictType
+        self.chunkSize = chunkSize
+        self.__file    = None
+        self.__buffer  = ''
+        self.__pos     = 0
+        self.__offset  = 0 #<-- characters dropped from the front of the buffer
+
+    def decode( self, source ):
+        '''
+        Reads one value from the source
+
+        :param source: File object or string to read from
+        :type source: *file* *str*
+        '''
+        if isinstance( source, basestring ):
+            if isinstance( source, unicode ):
+                source = source.encode( 'utf-8' )
+            self.__file   = None
+            self.__buffer = source
+        else:
+            self.__file   = source
+            self.__buffer = ''
+        self.__pos    = 0
+        self.__offset = 0
+
+        try:
+            value = self.__value()
+            if self.__peek():
+                self.__error( 'Extra data' )
+        finally:
+            self.__file   = None
+            self.__buffer = ''
+
+        return value
+
+    # --------------------------------------------------------------------------
+
+    def __error( self, message ):
+        raise ValueError( '%s at character %d' % (message, self.__offset + self.__pos) )
+
+    def __fill( self ):
+        '''
+        Reads the next chunk on to the end of the buffer. Returns False
+        when there is nothing left to read.
+        '''
+        if self.__file is None:
+            return False
+
+        chunk = self.__file.read( self.chunkSize )
+        if not chunk:
+            self.__file = None
+            return False
+
+        self.__offset += self.__pos
+        self.__buffer  = self.__buffer[self.__pos:] + chunk
+        self.__pos     = 0
+        return True
+
+    def __match( self, pattern ):
+        '''
+        Matches the pattern at the current position, reading more of the
+        file while the match could carry on past the end of the buffer
+        '''
+        while True:
+            match = pattern.match( self.__buffer, self.__pos )
+            if match and match.end() < len( self.__buffer ) or not self.__fill():
+                return match
+
+    def __peek( self ):
+        '''
+        Skips whitespace and comments, returns the next character or an
+        empty string at the end of the data
+        '''
+        self.__pos = self.__match( _WHITESPACE ).end()
+        return self.__buffer[self.__pos:self.__pos + 1]
+
+    def __value( self ):
+
+        char = self.__peek()
+        if char == '{':
+            return self.__dict()
+
+        elif char == '[':
+            self.__pos += 1
+            values, done, comma = self.__numbers( ']' )
+            if done:
+                return values
+            if isinstance( values, array ):
+                values = values.tolist()
+            return self.__sequence( ']', values, comma )[0]
+
+        elif char == '(':
+            self.__pos += 1
+            values, done, comma = self.__numbers( ')' )
+            if not done:
+                values, comma = self.__sequence( ')', values, comma )
+            #(value) is just the value, a tuple needs a comma
+            if len( values ) == 1 and not comma:
+                return values[0]
+            return tuple( values )
+
+        elif char in '"\'uU' and char:
+            match = self.__match( _STRING )
+            if match:
+                self.__pos = match.end()
+                return self.__string( match.group() )
+
+        if char and char in _NUMBER_START:
+            match = self.__match( _NUMBER )
+            if match:
+                self.__pos = match.end()
+                text = match.group()
+                if '.' in text or 'e' in text or 'E' in text:
+                    return float( text )
+                return int( text )
+
+        elif char:
+            match = self.__match( _NAME )
+            if match:
+                if match.group() in _NAMES:
+                    self.__pos = match.end()
+                    return _NAMES[match.group()]
+                self.__error( 'Unsupported name "%s"' % match.group() )
+
+        if not char:
+            self.__error( 'Expected a value but reached the end of the data' )
+        self.__error( 'Expected a value' )
+
+    def __string( self, text ):
+
+        isUnicode = text[0] in 'uU'
+        if isUnicode:
+            text = text[1:]
+        text = text[1:-1]
+
+        if isUnicode:
+            if '\\' in text:
+                return text.decode( 'unicode_escape' )
+            return text.decode( 'utf-8' )
+
+        if '\\' in text:
+            return text.decode( 'string_escape' )
+        return text
+
+    def __numbers( self, close ):
+        '''
+        Reads the run of numbers at the start of a list or tuple, a chunk
+        at a time. Stops at the first thing that is not a number and
+        leaves it for __sequence().
+
+        :return: The numbers read, whether the closing bracket was read
+                 and whether a comma was read
+        :rtype: tuple
+        '''
+        if self.arrays and close == ']':
+            values = array( 'd' )
+        else:
+            values = list()
+        comma = False
+
+        char = self.__peek()
+        if not char or char not in _NUMBER_START:
+            return values, False, comma
+
+        while True:
+            buffer = self.__buffer
+            end    = buffer.find( close, self.__pos )
+            done   = end != -1
+            if not done:
+                #only take the numbers up to the last comma, the number
+                #after it may carry on in the next chunk
+                end = buffer.rfind( ',', self.__pos )
+                if end == -1:
+                    if self.__fill():
+                        continue
+                    return values, False, comma
+
+            segment = buffer[self.__pos:end]
+            if segment.translate( None, _NUMBER_CHARS ):
+                return values, False, comma
+
+            parts    = segment.split( ',' )
+            hasComma = len( parts ) > 1
+            if done and hasComma and not parts[-1].strip():
+                parts.pop() #<-- trailing comma
+            try:
+                if isinstance( values, array ):
+                    values.fromlist( map( float, parts ) )
+                elif '.' in segment or 'e' in segment or 'E' in segment:
+                    values.extend( [float( part ) if '.' in part or 'e' in part or 'E' in part
+                                    else int( part ) for part in parts] )
+                else:
+                    values.extend( map( int, parts ) )
+            except ValueError:
+                #not a list of numbers after all, leave it to __sequence()
+                return values, False, comma
+
+            comma = comma or hasComma or not done
+            self.__pos = end + 1
+            if done:
+                return values, True, comma
+            if not self.__fill():
+                return values, False, comma
+
+    def __sequence( self, close, values, comma ):
+        '''
+        Reads the items of a list or tuple up to the closing bracket
+
+        :return: The items and whether a comma was read
+        :rtype: tuple
+        '''
+        while True:
+            if self.__peek() == close:
+                self.__pos += 1
+                return values, comma
+
+            values.append( self.__value() )
+
+            char = self.__peek()
+            if char == ',':
+                self.__pos += 1
+                comma = True
+            elif char != close:
+                self.__error( 'Expected "," or "%s"' % close )
+
+    def __dict( self ):
+
+        self.__pos += 1
+        items = self.dictType()
+        while True:
+            char = self.__peek()
+            if char == '}':
+                self.__pos += 1
+                return items
+
+            key = self.__value()
+            if self.__peek() != ':':
+                self.__error( 'Expected ":"' )
+            self.__pos += 1
+            items[key] = self.__value()
+
+            char = self.__peek()
+            if char == ',':
+                self.__pos += 1
+            elif char != '}':
+                self.__error( 'Expected "," or "}"' )
 
-        #Parse node
-        elif isinstance(obj,node.MlNode):
-            self.__depth__ += 1
-            return self.encode_node(obj)            
-        
-        # Parse dict
-        elif isinstance( obj, dict ):
-            self.__depth__ += 1
-            return self.encode_dict( obj )
-        
-        #Parse method
-        elif inspect.ismethod(obj):
-            return self.encode_method(obj)
 # ------------------------------------------------------------------------------
 
-def dump( data ):
+def dump( data, precision = 3, sort = False ):
     '''Converts the data to string using pyon parser
     '''
-    return Encoder().encode( data ) 
+    return Encoder( precision = precision, sort = sort ).encode( data ) 
 
-def save( data, filepath=None ):
-    '''Write to file with python encoding.
+def save( data, filepath=None, precision = 3, sort = False ):
+    '''Write to file with python encoding. The data is streamed to a
+    temporary file next to filepath which replaces filepath once it
+    has all been written.
     
     Example:
         .. python::
@@ -166,15 +539,14 @@ def save( data, filepath=None ):
         filepath = os.path.join( tempfile.gettempdir(), 'data.pyon' )
 
     # Dump data
-    f       = open( filepath, 'w' )
-    newData = dump( data )
-    f.write(newData)
-    f.close()
+    with fileIO.atomicWrite( filepath ) as f:
+        Encoder( precision = precision, sort = sort ).write( data, f )
 
     return filepath
 
-def load( filepath ): 
+def load( filepath, arrays = False, dictType = dict ):
     '''Read file decoding with pyson and return it as Python dictionary.
+    The file is parsed with Decoder, nothing in it is evaluated.
     
     Example:
         ..python::
@@ -182,6 +554,10 @@ def load( filepath ):
 
     :param filepath: file path and name of file
     :type filepath: *str*
+    :param arrays: Return lists of numbers as array('d')
+    :type arrays: *bool*
+    :param dictType: Type dicts are read in to
+    :type dictType: *type*
     '''
     
     if not os.path.isfile( filepath ):
@@ -189,7 +565,9 @@ def load( filepath ):
 
     # Read data
     f    = open( filepath,'r' )
-    data = eval( f.read() ) 
-    f.close()
+    try:
+        data = Decoder( arrays, dictType ).decode( f )
+    finally:
+        f.close()
     
     return data
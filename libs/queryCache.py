@@ -0,0 +1,325 @@
+'''
+Scene query cache
+
+While a cache is open with cached(), common.isValid(), common.isType(),
+common.getParent(), common.getChildren() and common.getShapes() only ask
+the scene about a node the first time, and answer from the cache after
+that. Opening a cache while one is open uses the same cache, and the
+cache is thrown away when the outermost one closes, so nothing cached
+outlives the build stage it was opened for.
+
+Entries are invalidated by Maya messages for nodes that are added,
+removed, renamed and reparented, so it does not matter whether a node
+was changed by a helper in libs or straight through cmds. Every entry
+that names the node, in the node it was asked about or in the nodes it
+returned, is dropped when it is added, removed or renamed. Reparenting a
+node only drops its parent, the paths it is in and the children of the
+parents it moved between, its name and type do not change. Paths are
+named by every node in them, so reparenting or renaming a node drops the
+paths of its children as well.
+
+Attributes and components are not cached, adding and deleting
+attributes does not send the messages the cache listens to.
+
+:example:
+    >>> with queryCache.cached() as cache:
+    ...     common.isValid('l_arm_jnt')
+    ...     common.getParent('l_arm_jnt')
+    ...     print cache.report()
+'''
+#import python modules
+from contextlib import contextmanager
+
+#import maya modules, the entries and invalidation work without Maya
+try:
+    import maya.cmds as cmds
+    import maya.OpenMaya as OpenMaya
+except ImportError:
+    cmds = OpenMaya = None
+
+#queries the cache answers
+EXISTS   = 'exists'
+TYPE     = 'type'
+PARENT   = 'parent'
+CHILDREN = 'children'
+SHAPES   = 'shapes'
+
+QUERIES = (EXISTS, TYPE, PARENT, CHILDREN, SHAPES)
+
+def _names(name):
+    '''
+    Returns the names of the nodes in a path
+    '''
+    return [part for part in name.split('|') if part]
+
+def _isNode(node):
+    return isinstance(node, basestring) and '.' not in node
+
+class QueryCache(object):
+    '''
+    Existence, type and hierarchy queries of nodes, asked of the scene
+    once and kept until a node they name changes
+
+    :param callbacks: Listen to Maya messages to invalidate entries, False
+                      to leave invalidating to invalidate()
+    :type callbacks: bool
+    '''
+    def __init__(self, callbacks = True):
+        self.__entries       = dict() #<-- (query, node) : result
+        self.__keys          = dict() #<-- node name : keys whose entries name it
+        self.__movedKeys     = dict() #<-- node name : keys of its parent and paths it is in
+        self.__childKeys     = dict() #<-- node name : keys of its children and shapes
+        self.__hits          = dict.fromkeys(QUERIES, 0)
+        self.__misses        = dict.fromkeys(QUERIES, 0)
+        self.__invalidations = 0
+        self.__callbacks     = list()
+
+        if callbacks:
+            self.addCallbacks()
+
+    def __repr__(self):
+        return '< %s: %s entries >' % (self.__class__.__name__, len(self.__entries))
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __query(self, query, node, ask):
+        if not _isNode(node):
+            return ask()
+
+        key = (query, node)
+        if key in self.__entries:
+            self.__hits[query] += 1
+            result = self.__entries[key]
+        else:
+            self.__misses[query] += 1
+            result = ask()
+            if isinstance(result, list):
+                result = tuple(result)
+            self.__entries[key] = result
+
+            names = _names(node)
+            if isinstance(result, tuple):
+                for member in result:
+                    names.extend(_names(member))
+            for name in names:
+                self.__keys.setdefault(name, set()).add(key)
+            if '|' in node:
+                for name in _names(node):
+                    self.__movedKeys.setdefault(name, set()).add(key)
+            elif query == PARENT:
+                self.__movedKeys.setdefault(node, set()).add(key)
+            if query in (CHILDREN, SHAPES):
+                self.__childKeys.setdefault(node.rsplit('|', 1)[-1], set()).add(key)
+
+        #callers get a list of their own to change
+        if isinstance(result, tuple):
+            return list(result)
+        return result
+
+    def exists(self, node):
+        '''
+        Returns True if the node exists, cmds.objExists()
+
+        :rtype: bool
+        '''
+        return self.__query(EXISTS, node, lambda: bool(cmds.objExists(node)))
+
+    def nodeType(self, node):
+        '''
+        Returns the type of the node, cmds.nodeType()
+
+        :rtype: str
+        '''
+        return self.__query(TYPE, node, lambda: cmds.nodeType(node))
+
+    def parent(self, node):
+        '''
+        Returns cmds.listRelatives(node, p = True)
+
+        :rtype: list
+        '''
+        return self.__query(PARENT, node, lambda: cmds.listRelatives(node, p = True))
+
+    def children(self, node):
+        '''
+        Returns cmds.listRelatives(node, c = True)
+
+        :rtype: list
+        '''
+        return self.__query(CHILDREN, node, lambda: cmds.listRelatives(node, c = True))
+
+    def shapes(self, node):
+        '''
+        Returns cmds.listRelatives(node, c = True, shapes = True)
+
+        :rtype: list
+        '''
+        return self.__query(SHAPES, node, lambda: cmds.listRelatives(node, c = True, shapes = True))
+
+    def invalidate(self, *names):
+        '''
+        Drops every entry that names one of the nodes. Nodes given as paths
+        are dropped by the name of their last node.
+        '''
+        self.__invalidate(self.__keys, names)
+
+    def invalidateMoved(self, *names):
+        '''
+        Drops the parents of the nodes and the paths they are in, for nodes
+        that were reparented
+        '''
+        self.__invalidate(self.__movedKeys, names)
+
+    def invalidateChildren(self, *names):
+        '''
+        Drops the children and shapes of the nodes, for the parents a node
+        was parented to or from
+        '''
+        self.__invalidate(self.__childKeys, names)
+
+    def __invalidate(self, index, names):
+        for name in names:
+            if not name:
+                continue
+            #keys stay in the sets of the other names they are under,
+            #popping them again does nothing
+            for key in index.pop(name.rsplit('|', 1)[-1], ()):
+                if self.__entries.pop(key, self) is not self:
+                    self.__invalidations += 1
+
+    def clear(self):
+        '''
+        Drops every entry, the statistics are kept
+        '''
+        self.__entries.clear()
+        self.__keys.clear()
+        self.__movedKeys.clear()
+        self.__childKeys.clear()
+
+    #----------------------------------
+    #Statistics
+    #----------------------------------
+    def hits(self, query = None):
+        if query:
+            return self.__hits[query]
+        return sum(self.__hits.values())
+
+    def misses(self, query = None):
+        if query:
+            return self.__misses[query]
+        return sum(self.__misses.values())
+
+    def invalidations(self):
+        '''
+        Returns the number of entries invalidated
+        '''
+        return self.__invalidations
+
+    def stats(self):
+        '''
+        Returns the hits and misses of every query
+
+        :rtype: list
+        '''
+        return [(query, self.__hits[query], self.__misses[query]) for query in QUERIES]
+
+    def report(self):
+        '''
+        Returns the stats as a table
+        '''
+        output = '%-12s %10s %10s %10s\n' % ('query', 'hits', 'misses', 'hit rate')
+        for query, hits, misses in self.stats() + [('total', self.hits(), self.misses())]:
+            rate = '%9.1f%%' % (100.0 * hits / (hits + misses)) if hits + misses else '%10s' % '-'
+            output += '%-12s %10d %10d %s\n' % (query, hits, misses, rate)
+        output += '%s entries invalidated\n' % self.__invalidations
+        return output
+
+    #----------------------------------
+    #Maya messages
+    #----------------------------------
+    def addCallbacks(self):
+        '''
+        Listens to the messages for nodes that are added, removed, renamed
+        and reparented
+        '''
+        if self.__callbacks:
+            return
+        if OpenMaya is None:
+            raise RuntimeError('Maya messages can only be listened to in Maya, use callbacks = False')
+        self.__callbacks = [OpenMaya.MDGMessage.addNodeAddedCallback(self.__nodeChanged),
+                            OpenMaya.MDGMessage.addNodeRemovedCallback(self.__nodeChanged),
+                            OpenMaya.MNodeMessage.addNameChangedCallback(OpenMaya.MObject(), self.__nodeRenamed),
+                            OpenMaya.MDagMessage.addAllDagChangesCallback(self.__dagChanged)]
+
+    def removeCallbacks(self):
+        for callback in self.__callbacks:
+            OpenMaya.MMessage.removeCallback(callback)
+        self.__callbacks = list()
+
+    def __nodeChanged(self, mobject, *args):
+        self.invalidate(OpenMaya.MFnDependencyNode(mobject).name())
+
+    def __nodeRenamed(self, mobject, previousName, *args):
+        self.invalidate(OpenMaya.MFnDependencyNode(mobject).name(), previousName)
+
+    def __dagChanged(self, message, child, parent, *args):
+        if child.isValid():
+            self.invalidateMoved(OpenMaya.MFnDependencyNode(child.node()).name())
+        if parent.isValid() and parent.length():
+            self.invalidateChildren(OpenMaya.MFnDependencyNode(parent.node()).name())
+
+
+_cache      = None
+_cacheDepth = 0
+
+@contextmanager
+def cached(callbacks = True):
+    '''
+    Opens a QueryCache for the common query functions to use. Opening it
+    again while it is open uses the same cache.
+
+    :param callbacks: Listen to Maya messages to invalidate entries
+    :type callbacks: bool
+    '''
+    global _cache, _cacheDepth
+    if _cache is None:
+        _cache = QueryCache(callbacks)
+    _cacheDepth += 1
+    try:
+        yield _cache
+    finally:
+        _cacheDepth -= 1
+        if not _cacheDepth:
+            _cache.removeCallbacks()
+            _cache = None
+
+def current():
+    '''
+    Returns the open QueryCache, None if there isn't one
+    '''
+    return _cache
+
+def invalidate(*names):
+    '''
+    Drops the entries that name the nodes from the open QueryCache, if
+    there is one
+    '''
+    if _cache is not None:
+        _cache.invalidate(*names)
+
+def invalidateMoved(*names):
+    '''
+    Drops the parents of the nodes and the paths they are in from the open
+    QueryCache, if there is one
+    '''
+    if _cache is not None:
+        _cache.invalidateMoved(*names)
+
+def invalidateChildren(*names):
+    '''
+    Drops the children and shapes of the nodes from the open QueryCache,
+    if there is one
+    '''
+    if _cache is not None:
+        _cache.invalidateChildren(*names)
@@ -0,0 +1,535 @@
+'''
+Sparse skin weights
+
+Most vertices are only weighted to a few of a skinCluster's influences.
+SparseWeights stores only the weights above an epsilon, in compressed
+sparse rows: for every vertex the offset of its first weight, and for
+every weight the index of its influence and its value.
+
+    offsets   vertex count + 1 offsets in to indices and values, the
+              weights of vertex v are offsets[v] up to offsets[v + 1]
+    indices   index in to influences() of every weight
+    values    every weight
+
+The skinData command gets and sets weights as one dense list with all
+the influences of a vertex one after the other (vertex * influence count
++ influence). fromDense() and toDense() convert to and from it, with
+numpy when it is available and with itertools over arrays when it isn't.
+toColumns() and fromColumns() convert to and from the same weights
+stored per influence instead of per vertex (compressed sparse columns),
+the way weightFile saves them.
+
+Influences are matched to another list of influences with
+influenceMap(), by name, then without namespaces, then by short name.
+
+:example:
+    >>> weights = sparseWeights.SparseWeights.fromDense(cmds.skinData(skin, q = True, wts = True),
+    ...                                                  cmds.skinData(skin, q = True, inf = True))
+    >>> weights.vertexWeights(12)
+    [('spine_jnt', 0.75), ('chest_jnt', 0.25)]
+    >>> cmds.skinData(skin, wts = weights.toDense(influences), inf = influences)
+'''
+#import python modules
+import bisect
+import itertools
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+#import package modules
+from japeto.libs import ordereddict
+
+#weights of EPSILON or less are left out
+EPSILON = 1e-5
+
+def removeNamespace(name):
+    '''
+    Returns the name without the namespace on every part of its path
+    '''
+    return '|'.join([part.split(':')[-1] for part in name.split('|')])
+
+def _looseNames(name):
+    name = removeNamespace(name)
+    return name, name.split('|')[-1]
+
+def influenceMap(source, target):
+    '''
+    Returns the position in target of every influence in source, -1 for
+    the ones that are not in it. Names are matched exactly first, then
+    without namespaces and then by their short names without
+    namespaces. A name that could be more than one influence in target,
+    or an influence that has already been matched, is not matched again.
+
+    :example:
+        >>> sparseWeights.influenceMap(['spine_jnt', 'arm_jnt'], ['char:arm_jnt', 'char:spine_jnt'])
+        [1, 0]
+
+    :param source: Influence names to find
+    :type source: list
+
+    :param target: Influence names to find them in
+    :type target: list
+
+    :rtype: list
+    '''
+    positions = [-1] * len(source)
+    exact = dict((name, i) for i, name in reversed(list(enumerate(target))))
+    used = set()
+    for i, name in enumerate(source):
+        position = exact.get(name, -1)
+        if position != -1 and position not in used:
+            positions[i] = position
+            used.add(position)
+
+    #names without namespaces, and short names without namespaces
+    loose = (dict(), dict())
+    for position, name in enumerate(target):
+        if position in used:
+            continue
+        for names, key in zip(loose, _looseNames(name)):
+            names[key] = -1 if key in names else position
+
+    for i, name in enumerate(source):
+        if positions[i] != -1:
+            continue
+        for names, key in zip(loose, _looseNames(name)):
+            position = names.get(key, -1)
+            if position != -1 and position not in used:
+                positions[i] = position
+                used.add(position)
+                break
+
+    return positions
+
+def _toNumpy(values):
+    return numpy.frombuffer(values, dtype = values.typecode)
+
+def _toArray(typecode, values):
+    result = array(typecode)
+    result.fromstring(numpy.ascontiguousarray(values, dtype = typecode).tostring())
+    return result
+
+class SparseWeights(object):
+    '''
+    :param influences: Names of the influences
+    :type influences: list
+
+    :param offsets: Offset of the first weight of every vertex, and the
+                    number of weights at the end
+    :type offsets: array
+
+    :param indices: Influence index of every weight
+    :type indices: array
+
+    :param values: Every weight
+    :type values: array
+    '''
+    def __init__(self, influences, offsets, indices, values):
+        super(SparseWeights, self).__init__()
+
+        if len(indices) != len(values):
+            raise RuntimeError('There are %s indices for %s values' % (len(indices), len(values)))
+        if not offsets or offsets[-1] != len(values):
+            raise RuntimeError('Offsets do not end at the number of values %s' % len(values))
+
+        self.__influences = list(influences)
+        self.__offsets    = offsets
+        self.__indices    = indices
+        self.__values     = values
+
+    def __repr__(self):
+        return '< %s: %s vertices, %s influences, %s weights >' % (self.__class__.__name__,
+                    self.vertexCount(), len(self.__influences), len(self.__values))
+
+    def __eq__(self, other):
+        if not isinstance(other, SparseWeights):
+            return False
+        return (self.__influences == other.influences() and
+                list(self.__offsets) == list(other.offsets()) and
+                list(self.__indices) == list(other.indices()) and
+                list(self.__values) == list(other.values()))
+
+    def __ne__(self, other):
+        return not self == other
+
+    #---------------------------------------------
+    #Building
+    #---------------------------------------------
+    @classmethod
+    def indexTypecode(cls, influenceCount):
+        '''
+        Returns the smallest array typecode that can hold an index in to
+        the given number of influences
+        '''
+        if influenceCount <= 0xffff:
+            return 'H'
+        return 'I'
+
+    @classmethod
+    def fromDense(cls, weights, influences, epsilon = EPSILON, typecode = 'd'):
+        '''
+        Builds sparse weights from the dense list the skinData command
+        gets, all the influences of a vertex one after the other
+
+        :param weights: Dense weights
+        :type weights: list
+
+        :param influences: Names of the influences
+        :type influences: list
+
+        :param epsilon: Weights of epsilon or less are left out
+        :type epsilon: float
+
+        :param typecode: Array typecode the weights are stored as
+        :type typecode: str
+
+        :rtype: SparseWeights
+        '''
+        influenceCount = len(influences)
+        if not influenceCount:
+            return cls(influences, array('I', [0]), array('H'), array(typecode))
+        if len(weights) % influenceCount:
+            raise RuntimeError('%s weights can not be split between %s influences' % (len(weights), influenceCount))
+
+        if numpy is not None:
+            matrix = numpy.asarray(weights, dtype = 'd').reshape(-1, influenceCount)
+            keep = matrix > epsilon
+            offsets = numpy.zeros(len(matrix) + 1, dtype = 'I')
+            numpy.cumsum(keep.sum(axis = 1), out = offsets[1:])
+            return cls(influences, _toArray('I', offsets),
+                       _toArray(cls.indexTypecode(influenceCount), numpy.nonzero(keep)[1]),
+                       _toArray(typecode, matrix[keep]))
+
+        #the comparisons and filtering all run in C, only the weights
+        #that are kept are looked at in python
+        keep = map(float(epsilon).__lt__, weights)
+        values = array(typecode, itertools.compress(weights, keep))
+        positions = list(itertools.compress(xrange(len(weights)), keep))
+
+        indices = array(cls.indexTypecode(influenceCount), [position % influenceCount for position in positions])
+        vertices = [position // influenceCount for position in positions]
+        offsets = array('I', [bisect.bisect_left(vertices, vertex) for vertex in
+                              xrange(len(weights) // influenceCount)])
+        offsets.append(len(values))
+
+        return cls(influences, offsets, indices, values)
+
+    @classmethod
+    def fromInfluenceWeights(cls, weights, epsilon = EPSILON, typecode = 'd'):
+        '''
+        Builds sparse weights from a list of weights for every vertex per
+        influence, the way SkinCluster has saved weights to pyon files
+
+        :param weights: Influence name : weight of every vertex
+        :type weights: dict
+
+        :param epsilon: Weights of epsilon or less are left out
+        :type epsilon: float
+
+        :param typecode: Array typecode the weights are stored as
+        :type typecode: str
+
+        :rtype: SparseWeights
+        '''
+        influences = weights.keys()
+        vertexCount = len(weights[influences[0]]) if influences else 0
+        keep = float(epsilon).__lt__
+
+        rows = [list() for vertex in xrange(vertexCount)]
+        for index, influence in enumerate(influences):
+            column = weights[influence]
+            if len(column) != vertexCount:
+                raise RuntimeError('%s has %s weights, expected %s' % (influence, len(column), vertexCount))
+            for vertex in itertools.compress(xrange(vertexCount), map(keep, column)):
+                rows[vertex].append((index, column[vertex]))
+
+        offsets = array('I', [0])
+        indices = array(cls.indexTypecode(len(influences)))
+        values = array(typecode)
+        for row in rows:
+            for index, value in row:
+                indices.append(index)
+                values.append(value)
+            offsets.append(len(values))
+
+        return cls(influences, offsets, indices, values)
+
+    @classmethod
+    def fromColumns(cls, influences, vertexCount, offsets, vertices, values):
+        '''
+        Builds sparse weights from weights stored per influence, as
+        toColumns() returns them
+
+        :param influences: Names of the influences
+        :type influences: list
+
+        :param vertexCount: Number of vertices
+        :type vertexCount: int
+
+        :param offsets: Influence count + 1 offsets in to vertices and
+                        values, the weights of influence i are offsets[i]
+                        up to offsets[i + 1]
+        :type offsets: array
+
+        :param vertices: Vertex of every weight
+        :type vertices: array
+
+        :param values: Every weight
+        :type values: array
+
+        :rtype: SparseWeights
+        '''
+        if len(offsets) != len(influences) + 1 or offsets[-1] != len(values):
+            raise RuntimeError('Offsets do not end at the number of values %s' % len(values))
+        if len(vertices) != len(values):
+            raise RuntimeError('There are %s vertices for %s values' % (len(vertices), len(values)))
+        indexTypecode = cls.indexTypecode(len(influences))
+
+        if numpy is not None:
+            columnVertices = _toNumpy(vertices)
+            columns = numpy.repeat(numpy.arange(len(influences)), numpy.diff(_toNumpy(offsets)))
+            #a stable sort keeps the weights of a vertex in influence order
+            order = numpy.argsort(columnVertices, kind = 'mergesort')
+            rowOffsets = numpy.zeros(vertexCount + 1, dtype = 'I')
+            numpy.cumsum(numpy.bincount(columnVertices, minlength = vertexCount), out = rowOffsets[1:])
+            return cls(influences, _toArray('I', rowOffsets),
+                       _toArray(indexTypecode, columns[order]),
+                       _toArray(values.typecode, _toNumpy(values)[order]))
+
+        rows = [list() for vertex in xrange(vertexCount)]
+        for index in xrange(len(influences)):
+            for i in xrange(offsets[index], offsets[index + 1]):
+                rows[vertices[i]].append((index, values[i]))
+
+        rowOffsets = array('I', [0])
+        indices = array(indexTypecode)
+        rowValues = array(values.typecode)
+        for row in rows:
+            for index, value in row:
+                indices.append(index)
+                rowValues.append(value)
+            rowOffsets.append(len(rowValues))
+
+        return cls(influences, rowOffsets, indices, rowValues)
+
+    #---------------------------------------------
+    #Access
+    #---------------------------------------------
+    def influences(self):
+        return list(self.__influences)
+
+    def vertexCount(self):
+        return len(self.__offsets) - 1
+
+    def offsets(self):
+        return self.__offsets
+
+    def indices(self):
+        return self.__indices
+
+    def values(self):
+        return self.__values
+
+    def vertexWeights(self, vertex):
+        '''
+        Returns the influences and weights of the vertex
+
+        :rtype: list
+        '''
+        start, end = self.__offsets[vertex], self.__offsets[vertex + 1]
+        return [(self.__influences[index], value) for index, value in
+                itertools.izip(self.__indices[start:end], self.__values[start:end])]
+
+    def influenceWeights(self, influence):
+        '''
+        Returns the weight of every vertex for the influence
+
+        :param influence: Name of the influence
+        :type influence: str
+
+        :rtype: list
+        '''
+        if influence not in self.__influences:
+            raise KeyError('%s is not an influence' % influence)
+        return self.toInfluenceWeights([influence])[influence]
+
+    #---------------------------------------------
+    #Converting
+    #---------------------------------------------
+    def remap(self, influences):
+        '''
+        Returns the position in influences of every one of our influences,
+        -1 for the ones that are not in it. See influenceMap().
+        '''
+        return influenceMap(self.__influences, influences)
+
+    def __entries(self, influences):
+        '''
+        Returns the vertex, position in influences and value of every
+        weight for an influence in influences, as numpy arrays
+        '''
+        remap = numpy.array(self.remap(influences) + [-1], dtype = 'i')
+        offsets = _toNumpy(self.__offsets)
+        vertices = numpy.repeat(numpy.arange(self.vertexCount()), numpy.diff(offsets))
+        columns = remap[_toNumpy(self.__indices)]
+        keep = columns != -1
+        return vertices[keep], columns[keep], _toNumpy(self.__values)[keep]
+
+    def reorder(self, influences):
+        '''
+        Returns a copy with the weights laid out for influences, in
+        order. Weights for influences not in it are left out, the way
+        toDense() leaves them out.
+
+        :param influences: Influences to lay the weights out for
+        :type influences: list
+
+        :rtype: SparseWeights
+        '''
+        influences = list(influences)
+        if influences == self.__influences:
+            return self
+        indexTypecode = self.indexTypecode(len(influences))
+
+        if numpy is not None and len(self.__values):
+            vertices, columns, values = self.__entries(influences)
+            offsets = numpy.zeros(self.vertexCount() + 1, dtype = 'I')
+            numpy.cumsum(numpy.bincount(vertices, minlength = self.vertexCount()), out = offsets[1:])
+            return SparseWeights(influences, _toArray('I', offsets), _toArray(indexTypecode, columns),
+                                 _toArray(self.__values.typecode, values))
+
+        remap = self.remap(influences)
+        offsets = array('I', [0])
+        indices = array(indexTypecode)
+        values = array(self.__values.typecode)
+        for vertex in xrange(self.vertexCount()):
+            for i in xrange(self.__offsets[vertex], self.__offsets[vertex + 1]):
+                column = remap[self.__indices[i]]
+                if column != -1:
+                    indices.append(column)
+                    values.append(self.__values[i])
+            offsets.append(len(values))
+
+        return SparseWeights(influences, offsets, indices, values)
+
+    def toColumns(self):
+        '''
+        Returns the weights stored per influence instead of per vertex:
+        influence count + 1 offsets, the vertex of every weight and every
+        weight. See fromColumns().
+
+        :rtype: tuple
+        '''
+        influenceCount = len(self.__influences)
+        if numpy is not None:
+            indices = _toNumpy(self.__indices)
+            vertices = numpy.repeat(numpy.arange(self.vertexCount()), numpy.diff(_toNumpy(self.__offsets)))
+            #a stable sort keeps the weights of an influence in vertex order
+            order = numpy.argsort(indices, kind = 'mergesort')
+            offsets = numpy.zeros(influenceCount + 1, dtype = 'I')
+            numpy.cumsum(numpy.bincount(indices, minlength = influenceCount), out = offsets[1:])
+            return (_toArray('I', offsets), _toArray('I', vertices[order]),
+                    _toArray(self.__values.typecode, _toNumpy(self.__values)[order]))
+
+        columns = [list() for influence in self.__influences]
+        offsets, indices, values = self.__offsets, self.__indices, self.__values
+        for vertex in xrange(self.vertexCount()):
+            for i in xrange(offsets[vertex], offsets[vertex + 1]):
+                columns[indices[i]].append((vertex, values[i]))
+
+        columnOffsets = array('I', [0])
+        vertices = array('I')
+        values = array(values.typecode)
+        for column in columns:
+            for vertex, value in column:
+                vertices.append(vertex)
+                values.append(value)
+            columnOffsets.append(len(values))
+
+        return columnOffsets, vertices, values
+
+    def toDense(self, influences = None):
+        '''
+        Returns the dense list the skinData command sets, all the
+        influences of a vertex one after the other.
+
+        :param influences: Influences to lay the weights out for, in
+                           order. Defaults to influences(). Weights for
+                           influences not in it are left out, influences
+                           without weights get 0.
+        :type influences: list
+
+        :rtype: list
+        '''
+        if influences is None:
+            influences = self.__influences
+        influenceCount = len(influences)
+        dense = [0.0] * (self.vertexCount() * influenceCount)
+
+        if numpy is not None and len(self.__values):
+            vertices, columns, values = self.__entries(influences)
+            #map() runs the assignments in C, the list is never built in python
+            map(dense.__setitem__, (vertices * influenceCount + columns).tolist(), values.tolist())
+            return dense
+
+        remap = self.remap(influences)
+        offsets, indices, values = self.__offsets, self.__indices, self.__values
+        for vertex in xrange(self.vertexCount()):
+            start = vertex * influenceCount
+            for i in xrange(offsets[vertex], offsets[vertex + 1]):
+                column = remap[indices[i]]
+                if column != -1:
+                    dense[start + column] = values[i]
+
+        return dense
+
+    def toInfluenceWeights(self, influences = None):
+        '''
+        Returns a list with the weight of every vertex per influence
+
+        :param influences: Influences to return weights for. Defaults to
+                           influences().
+        :type influences: list
+
+        :rtype: ordereddict.OrderedDict
+        '''
+        if influences is None:
+            influences = self.__influences
+        if numpy is not None:
+            vertices, columns, values = self.__entries(influences)
+            #the transpose is a strided view, each row of it copies out a column
+            matrix = numpy.zeros((self.vertexCount(), len(influences)), dtype = 'd')
+            matrix[vertices, columns] = values
+            return ordereddict.OrderedDict(zip(influences, matrix.T.tolist()))
+
+        remap = self.remap(influences)
+
+        columns = [[0.0] * self.vertexCount() for influence in influences]
+        offsets, indices, values = self.__offsets, self.__indices, self.__values
+        for vertex in xrange(self.vertexCount()):
+            for i in xrange(offsets[vertex], offsets[vertex + 1]):
+                column = remap[indices[i]]
+                if column != -1:
+                    columns[column][vertex] = values[i]
+
+        return ordereddict.OrderedDict(zip(influences, columns))
+
+    def prune(self, epsilon = EPSILON):
+        '''
+        Returns a copy without the weights of epsilon or less
+
+        :rtype: SparseWeights
+        '''
+        keep = map(float(epsilon).__lt__, self.__values)
+        offsets = array('I', [0])
+        count = 0
+        for vertex in xrange(self.vertexCount()):
+            count += sum(keep[self.__offsets[vertex]:self.__offsets[vertex + 1]])
+            offsets.append(count)
+
+        return SparseWeights(self.__influences, offsets,
+                             array(self.__indices.typecode, itertools.compress(self.__indices, keep)),
+                             array(self.__values.typecode, itertools.compress(self.__values, keep)))
@@ -0,0 +1,225 @@
+'''
+Nearest point queries over a set of points
+
+PointIndex is built once over a set of points, given as one flat list of
+x, y, z, and then answers which of them are closest to other points.
+It uses scipy's cKDTree when scipy is available. Otherwise the points
+are bucketed in a uniform grid, sized for a few points a cell, and each
+query searches the cells around it ring by ring until nothing closer can
+be left. Queries outside the grid start from the cell of the grid closest
+to them, so points far from the mesh cost no more than points on it.
+Queries that start in the same cell share the cells they search.
+The grid is linear in the number of points and queries, but it runs in
+python, so install scipy for meshes of hundreds of thousands of
+vertices.
+
+:example:
+    >>> index = spatialIndex.PointIndex([0, 0, 0, 1, 0, 0, 5, 5, 5])
+    >>> index.nearest([0.9, 0, 0], count = 2)
+    ([[1, 0]], [[0.1, 0.9]])
+'''
+#import python modules
+import itertools
+import math
+
+try:
+    import numpy
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+#number of points the grid aims to have in a cell
+POINTS_PER_CELL = 2.0
+
+class PointIndex(object):
+    '''
+    :param positions: x, y, z of every point, one after the other
+    :type positions: list
+    '''
+    def __init__(self, positions):
+        super(PointIndex, self).__init__()
+
+        if len(positions) % 3:
+            raise RuntimeError('%s positions is not a list of x, y, z values' % len(positions))
+
+        self.__count = len(positions) // 3
+        self.__tree  = None
+        self.__cells = None
+        if not self.__count:
+            return
+
+        if cKDTree is not None:
+            self.__tree = cKDTree(numpy.asarray(positions, dtype = 'd').reshape(-1, 3))
+            return
+
+        self.__xs = list(itertools.islice(positions, 0, None, 3))
+        self.__ys = list(itertools.islice(positions, 1, None, 3))
+        self.__zs = list(itertools.islice(positions, 2, None, 3))
+        self.__minimum = (min(self.__xs), min(self.__ys), min(self.__zs))
+        extents = (max(self.__xs) - self.__minimum[0],
+                   max(self.__ys) - self.__minimum[1],
+                   max(self.__zs) - self.__minimum[2])
+
+        #size cells by the dimensions the points actually spread over, so
+        #a flat mesh does not end up with everything in a few cells
+        largest = max(extents)
+        spread = [extent for extent in extents if extent > largest * 1e-6]
+        if spread:
+            measure = reduce(lambda a, b: a * b, spread)
+            self.__cellSize = (measure * POINTS_PER_CELL / self.__count) ** (1.0 / len(spread))
+        else:
+            self.__cellSize = 1.0
+        self.__cellSize = max(self.__cellSize, largest * 1e-6, 1e-12)
+        self.__span = [int(extent / self.__cellSize) + 1 for extent in extents]
+
+        cells = dict()
+        for point, key in enumerate(itertools.izip(*[self.__cellIds(axis) for axis in range(3)])):
+            if key in cells:
+                cells[key].append(point)
+            else:
+                cells[key] = [point]
+        self.__cells = cells
+
+    def __repr__(self):
+        return '< %s: %s points >' % (self.__class__.__name__, self.__count)
+
+    def __len__(self):
+        return self.__count
+
+    def __cellIds(self, axis, values = None):
+        if values is None:
+            values = (self.__xs, self.__ys, self.__zs)[axis]
+        minimum, size = self.__minimum[axis], self.__cellSize
+        return [int(math.floor((value - minimum) / size)) for value in values]
+
+    def __shell(self, key, ring):
+        '''
+        Returns the points in the cells ring cells away from the cell key,
+        only looking at the cells in the grid
+        '''
+        x, y, z = key
+        spanX, spanY, spanZ = self.__span
+        points = list()
+        cells = self.__cells
+        for i in xrange(max(x - ring, 0), min(x + ring, spanX - 1) + 1):
+            edgeX = i == x - ring or i == x + ring
+            for j in xrange(max(y - ring, 0), min(y + ring, spanY - 1) + 1):
+                edgeY = edgeX or j == y - ring or j == y + ring
+                if edgeY:
+                    ks = xrange(max(z - ring, 0), min(z + ring, spanZ - 1) + 1)
+                else:
+                    ks = [k for k in ((z - ring, z + ring) if ring else (z,)) if 0 <= k < spanZ]
+                for k in ks:
+                    cell = cells.get((i, j, k))
+                    if cell:
+                        points.extend(cell)
+        return points
+
+    def __reach(self, key, ring, sides, offset):
+        '''
+        Returns how far, squared, a query is at least from every point in
+        the cells further than ring cells from the cell key
+        '''
+        size = self.__cellSize
+        reach = None
+        for axis, low, high, gap in sides:
+            for distance, outside in ((low, key[axis] - ring - 1 < 0),
+                                      (high, key[axis] + ring + 1 > self.__span[axis] - 1)):
+                if outside:
+                    continue
+                distance += ring * size
+                distance = offset - gap + distance * distance
+                if reach is None or distance < reach:
+                    reach = distance
+        return reach
+
+    def nearest(self, positions, count = 1):
+        '''
+        Returns the closest points to every position, closest first
+
+        :param positions: x, y, z of every position to find points for
+        :type positions: list
+
+        :param count: Number of points to find for every position
+        :type count: int
+
+        :return: The indices of the closest points for every position, and
+                 their distances
+        :rtype: tuple
+        '''
+        if len(positions) % 3:
+            raise RuntimeError('%s positions is not a list of x, y, z values' % len(positions))
+        count = min(count, self.__count)
+        queries = len(positions) // 3
+        if not count:
+            return [list() for i in xrange(queries)], [list() for i in xrange(queries)]
+
+        if self.__tree is not None:
+            distances, indices = self.__tree.query(numpy.asarray(positions, dtype = 'd').reshape(-1, 3), k = count)
+            if count == 1:
+                return indices.reshape(-1, 1).tolist(), distances.reshape(-1, 1).tolist()
+            return indices.tolist(), distances.tolist()
+
+        xs = list(itertools.islice(positions, 0, None, 3))
+        ys = list(itertools.islice(positions, 1, None, 3))
+        zs = list(itertools.islice(positions, 2, None, 3))
+        #queries outside the grid start from the closest cell in it
+        keys = zip(*[[min(max(cell, 0), self.__span[axis] - 1) for cell in self.__cellIds(axis, values)]
+                     for axis, values in enumerate((xs, ys, zs))])
+
+        #queries in the same cell search the same shells, so group them
+        groups = dict()
+        for query, key in enumerate(keys):
+            if key in groups:
+                groups[key].append(query)
+            else:
+                groups[key] = [query]
+
+        indices = [None] * queries
+        distances = [None] * queries
+        sourceXs, sourceYs, sourceZs = self.__xs, self.__ys, self.__zs
+        size = self.__cellSize
+        for key, group in groups.iteritems():
+            #the furthest ring that can still have cells with points in it
+            lastRing = max(max(abs(key[axis]), abs(self.__span[axis] - 1 - key[axis])) for axis in range(3))
+
+            #points in the cells up to ring cells away, grown for the whole
+            #group when a query needs to search further
+            ring = min(1, lastRing)
+            points = self.__shell(key, 0)
+            if ring:
+                points.extend(self.__shell(key, 1))
+            coords = [(sourceXs[point], sourceYs[point], sourceZs[point]) for point in points]
+
+            #corner of the cell the group is in
+            corner = [self.__minimum[axis] + key[axis] * size for axis in range(3)]
+            for query in group:
+                x, y, z = position = xs[query], ys[query], zs[query]
+                #the points left in the cells further out are past the
+                #ring along at least one axis. On each axis: how far the
+                #query is above the bottom and below the top of the cell,
+                #and how far it is outside the grid
+                sides = list()
+                offset = 0.0
+                for axis in range(3):
+                    low = position[axis] - corner[axis]
+                    high = corner[axis] + size - position[axis]
+                    gap = max(-low, -high, 0.0)
+                    offset += gap * gap
+                    sides.append((axis, low, high, gap * gap))
+
+                while True:
+                    if len(points) >= count:
+                        squared = [(a - x) * (a - x) + (b - y) * (b - y) + (c - z) * (c - z) for a, b, c in coords]
+                        closest = sorted(xrange(len(squared)), key = squared.__getitem__)[:count]
+                        if ring >= lastRing or squared[closest[-1]] <= self.__reach(key, ring, sides, offset):
+                            break
+                    ring += 1
+                    shell = self.__shell(key, ring)
+                    points.extend(shell)
+                    coords.extend([(sourceXs[point], sourceYs[point], sourceZs[point]) for point in shell])
+
+                indices[query] = [points[i] for i in closest]
+                distances[query] = [math.sqrt(squared[i]) for i in closest]
+
+        return indices, distances
@@ -0,0 +1,244 @@
+'''
+Weight buffers for the skinData command
+
+A weight buffer packs the weights of a whole skinCluster, and the
+indices of the influences they are for, in to one string, so skinData
+can set them with one MFnSkinCluster.setWeights() call instead of
+parsing a flag argument per weight. Nothing here needs Maya.
+
+Layout of a buffer (all numbers little endian):
+
+    header   magic 'WBUF', version, bytes per weight, layout, vertex
+             count, influence count
+    indices  influence index of every column (uint32)
+    weights  DENSE layout: vertex count * influence count weights,
+             vertex after vertex, as MFnSkinCluster.setWeights() takes
+             them.
+             SPARSE layout: the weights as sparseWeights.SparseWeights
+             stores them, vertex count + 1 offsets (uint32), the column
+             of every weight (uint32) and the weights. Only the weights
+             that are set are sent, decode() lays them out dense.
+
+The buffer goes to skinData either base64 encoded in the -weightBuffer
+flag, or saved to a file whose path goes in the -weightFile flag.
+Buffers bigger than MAX_ARGUMENT_SIZE should go through a file, base64
+makes them a third bigger again and the whole string is held by the
+command call.
+
+:example:
+    >>> argument = weightBuffer.encodeArgument(weights, range(len(influences)))
+    >>> cmds.skinData('bodyShape', weightBuffer = argument)
+    >>> data = weightBuffer.encodeSparse(sparse.offsets(), sparse.indices(), sparse.values(), range(len(influences)))
+    >>> cmds.skinData('bodyShape', weightBuffer = weightBuffer.toArgument(data))
+'''
+#import python modules
+import array
+import base64
+import struct
+import sys
+
+MAGIC   = 'WBUF'
+VERSION = 1
+
+#typecode of the weights for each number of bytes per weight
+TYPECODES = {4 : 'f', 8 : 'd'}
+
+#layouts of the weights
+DENSE  = 0
+SPARSE = 1
+
+#bytes of buffer that are sent as a flag argument, bigger buffers are
+#saved to a file
+MAX_ARGUMENT_SIZE = 16 * 1024 * 1024
+
+_HEADER = struct.Struct('<4sHBBII')
+
+def _toString(values):
+    if sys.byteorder == 'big':
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tostring()
+
+def _fromString(typecode, data, offset, count):
+    values = array.array(typecode)
+    end = offset + values.itemsize * count
+    if end > len(data):
+        raise ValueError('Weight buffer is %s bytes, expected at least %s' % (len(data), end))
+    values.fromstring(data[offset:end])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+def encode(weights, influenceIndices, typecode = 'd'):
+    '''
+    Packs weights in to a buffer
+
+    :param weights: Weights of every influence for every vertex, vertex
+                    after vertex
+    :type weights: list
+
+    :param influenceIndices: Index on the skinCluster of the influence
+                             of every column of weights
+    :type influenceIndices: list
+
+    :param typecode: 'd' to store float64 weights, 'f' to store float32
+    :type typecode: str
+
+    :rtype: str
+    '''
+    if typecode not in TYPECODES.values():
+        raise TypeError('%s is not a weight buffer typecode, use "f" or "d"' % typecode)
+
+    influenceCount = len(influenceIndices)
+    if not influenceCount:
+        raise ValueError('A weight buffer needs at least one influence')
+    if len(weights) % influenceCount:
+        raise ValueError('%s weights is not a multiple of %s influences' % (len(weights), influenceCount))
+
+    weights = array.array(typecode, weights)
+    header = _HEADER.pack(MAGIC, VERSION, weights.itemsize, DENSE, len(weights) // influenceCount, influenceCount)
+
+    return header + _toString(array.array('I', influenceIndices)) + _toString(weights)
+
+def encodeSparse(offsets, columns, weights, influenceIndices, typecode = 'd'):
+    '''
+    Packs sparse weights in to a buffer, only the weights that are set
+    are packed. decode() unpacks them dense, with 0 for every other
+    weight.
+
+    :param offsets: Vertex count + 1 offsets in to columns and weights,
+                    the weights of vertex v are offsets[v] up to
+                    offsets[v + 1]
+    :type offsets: list
+
+    :param columns: Position in influenceIndices of every weight
+    :type columns: list
+
+    :param weights: Every weight
+    :type weights: list
+
+    :param influenceIndices: Index on the skinCluster of the influence
+                             of every column
+    :type influenceIndices: list
+
+    :param typecode: 'd' to store float64 weights, 'f' to store float32
+    :type typecode: str
+
+    :rtype: str
+    '''
+    if typecode not in TYPECODES.values():
+        raise TypeError('%s is not a weight buffer typecode, use "f" or "d"' % typecode)
+
+    influenceCount = len(influenceIndices)
+    if not influenceCount:
+        raise ValueError('A weight buffer needs at least one influence')
+    if not len(offsets) or offsets[-1] != len(weights) or len(columns) != len(weights):
+        raise ValueError('%s offsets and %s columns do not match %s weights' % (len(offsets), len(columns), len(weights)))
+    if len(columns) and max(columns) >= influenceCount:
+        raise ValueError('Column %s is past the %s influences' % (max(columns), influenceCount))
+
+    weights = array.array(typecode, weights)
+    header = _HEADER.pack(MAGIC, VERSION, weights.itemsize, SPARSE, len(offsets) - 1, influenceCount)
+
+    return (header + _toString(array.array('I', influenceIndices)) + _toString(array.array('I', offsets)) +
+            _toString(array.array('I', columns)) + _toString(weights))
+
+def decode(data):
+    '''
+    Unpacks a buffer encode() made
+
+    :param data: Buffer to unpack
+    :type data: str
+
+    :return: The influence indices and the weights
+    :rtype: tuple
+    '''
+    if len(data) < _HEADER.size or data[:4] != MAGIC:
+        raise ValueError('Not a weight buffer')
+
+    magic, version, itemSize, layout, vertexCount, influenceCount = _HEADER.unpack(data[:_HEADER.size])
+    if version > VERSION:
+        raise ValueError('Weight buffer version %s is newer than %s' % (version, VERSION))
+    if itemSize not in TYPECODES:
+        raise ValueError('Weight buffer has %s byte weights, only 4 and 8 can be read' % itemSize)
+    if layout not in (DENSE, SPARSE):
+        raise ValueError('Weight buffer has an unknown layout %s' % layout)
+
+    influenceIndices = _fromString('I', data, _HEADER.size, influenceCount)
+    offset = _HEADER.size + influenceIndices.itemsize * influenceCount
+    if layout == DENSE:
+        return influenceIndices, _fromString(TYPECODES[itemSize], data, offset, vertexCount * influenceCount)
+
+    offsets = _fromString('I', data, offset, vertexCount + 1)
+    offset += offsets.itemsize * len(offsets)
+    columns = _fromString('I', data, offset, offsets[-1])
+    offset += columns.itemsize * len(columns)
+    values = _fromString(TYPECODES[itemSize], data, offset, offsets[-1])
+
+    weights = array.array(TYPECODES[itemSize], [0.0]) * (vertexCount * influenceCount)
+    for vertex in xrange(vertexCount):
+        start = vertex * influenceCount
+        for i in xrange(offsets[vertex], offsets[vertex + 1]):
+            weights[start + columns[i]] = values[i]
+
+    return influenceIndices, weights
+
+def toArgument(data):
+    '''
+    Returns a buffer encode() or encodeSparse() made as a string that
+    can be passed to a command flag
+
+    :rtype: str
+    '''
+    return base64.b64encode(data)
+
+def encodeArgument(weights, influenceIndices, typecode = 'd'):
+    '''
+    Returns encode() as a string that can be passed to a command flag
+
+    :rtype: str
+    '''
+    return toArgument(encode(weights, influenceIndices, typecode))
+
+def decodeArgument(argument):
+    '''
+    Unpacks a string encodeArgument() made
+
+    :rtype: tuple
+    '''
+    try:
+        data = base64.b64decode(argument)
+    except TypeError:
+        raise ValueError('Weight buffer argument is not base64')
+    return decode(data)
+
+def save(filepath, weights, influenceIndices, typecode = 'd'):
+    '''
+    Saves a buffer to a file for the -weightFile flag
+    '''
+    return write(filepath, encode(weights, influenceIndices, typecode))
+
+def write(filepath, data):
+    '''
+    Saves a buffer encode() or encodeSparse() made to a file for the
+    -weightFile flag
+    '''
+    f = open(filepath, 'wb')
+    try:
+        f.write(data)
+    finally:
+        f.close()
+
+    return filepath
+
+def load(filepath):
+    '''
+    Unpacks a buffer save() wrote
+
+    :rtype: tuple
+    '''
+    f = open(filepath, 'rb')
+    try:
+        return decode(f.read())
+    finally:
+        f.close()
@@ -0,0 +1,402 @@
+'''
+Binary skin weight files
+
+A weight file stores the data SkinCluster collects for a skinCluster as
+columns of numbers instead of as text. Weights are float32 by default,
+or float64. The file is opened with mmap and nothing has to be parsed,
+a column is read by copying its bytes in to an array.array, the rest of
+the file is not touched. The weights are stored sparse and per
+influence, so asking for the weights of one influence only reads the
+weights of that influence.
+
+Layout of a weight file (all numbers little endian):
+
+    header   magic 'WTSB', version, bytes per weight, skinningMethod,
+             normalizeWeights, vertex count, influence count, size of
+             the names, offset of the columns, topology hash
+    names    length of every name, followed by the names (utf-8): the
+             mesh, the skinCluster and then every influence
+    columns  the blend weights, then the weights as
+             sparseWeights.SparseWeights.toColumns() returns them:
+             influence count + 1 offsets (uint32), the vertex of every
+             weight (uint32) and the weights, the weights of influence i
+             are offsets[i] up to offsets[i + 1]. Then the number of
+             positions (uint32) and the x, y, z of every
+             vertex (float32), for weightTransfer to move the weights on
+             to a mesh with different vertices. Every column starts on a
+             16 byte boundary.
+
+:example:
+    >>> weightFile.save('/tmp/body.wtsb', skin.data, mesh = 'bodyShape')
+    >>> weights = weightFile.WeightFile('/tmp/body.wtsb')
+    >>> weights.influences()
+    ['root_jnt', 'spine_jnt', 'neck_jnt']
+    >>> weights.weights().vertexWeights(1024)
+    [('spine_jnt', 0.75), ('neck_jnt', 0.25)]
+'''
+#import python modules
+import array
+import hashlib
+import mmap
+import struct
+import sys
+
+#import package modules
+from japeto.libs import fileIO
+from japeto.libs import ordereddict
+from japeto.libs import sparseWeights
+
+MAGIC   = 'WTSB'
+VERSION = 1
+
+#typecode of the columns for each number of bytes per weight
+TYPECODES = {4 : 'f', 8 : 'd'}
+
+_HEADER  = struct.Struct('<4sHBBBIIIQ20s')
+_ALIGN   = 16
+_NO_HASH = '\0' * 20
+
+def topologyHash(counts, connects):
+    '''
+    Returns a hash of a mesh's topology, the number of vertices of each
+    face and the vertices they use, as MFnMesh.getVertices() gives them
+
+    :param counts: Number of vertices of each face
+    :type counts: list
+
+    :param connects: Vertex ids of each face, one face after the other
+    :type connects: list
+
+    :rtype: str
+    '''
+    digest = hashlib.sha1()
+    digest.update(_toString(array.array('i', counts)))
+    digest.update(_toString(array.array('i', connects)))
+    return digest.digest()
+
+def _toString(values):
+    if sys.byteorder == 'big':
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tostring()
+
+def _readArray(data, typecode, offset, count):
+    values = array.array(typecode)
+    #buffer() reads the mmap without slicing it in to a string first
+    values.fromstring(buffer(data, offset, values.itemsize * count))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+def _padding(offset):
+    return -offset % _ALIGN
+
+def _toUtf8(value):
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return str(value)
+
+#---------------------------------------------
+#Saving
+#---------------------------------------------
+def save(filepath, data, mesh = None, topology = None, typecode = 'f', epsilon = sparseWeights.EPSILON, positions = None):
+    '''
+    Saves skin weights to a weight file
+
+    :param filepath: Path to save the weight file to
+    :type filepath: str
+
+    :param data: Skin data as SkinCluster.data stores it, with the weights
+                 and the blendWeights
+    :type data: dict
+
+    :param mesh: Name of the mesh the weights are for
+    :type mesh: str
+
+    :param topology: topologyHash() of the mesh, checked when the weights
+                     are loaded back on to a mesh
+    :type topology: str
+
+    :param typecode: 'f' to store float32 weights, 'd' to store float64
+    :type typecode: str
+
+    :param epsilon: Weights of epsilon or less are left out when the
+                    weights are not sparse already
+    :type epsilon: float
+
+    :param positions: x, y, z of every vertex, defaults to the positions
+                      in data
+    :type positions: list
+    '''
+    if typecode not in TYPECODES.values():
+        raise TypeError('%s is not a weight file typecode, use "f" or "d"' % typecode)
+
+    weights = data['weights']
+    if not isinstance(weights, sparseWeights.SparseWeights):
+        weights = sparseWeights.SparseWeights.fromInfluenceWeights(weights, epsilon)
+    influences = weights.influences()
+    vertexCount = weights.vertexCount()
+    blendWeights = data.get('blendWeights') or [0.0] * vertexCount
+    if len(blendWeights) != vertexCount:
+        raise RuntimeError('There are %s blendWeights, expected %s' % (len(blendWeights), vertexCount))
+    if positions is None:
+        positions = data.get('positions') or list()
+    if positions and len(positions) != vertexCount * 3:
+        raise RuntimeError('There are %s positions, expected %s' % (len(positions), vertexCount * 3))
+
+    #names
+    names = [_toUtf8(mesh or ''), _toUtf8(data.get('name') or '')] + [_toUtf8(influence) for influence in influences]
+    nameData = _toString(array.array('I', [len(name) for name in names])) + ''.join(names)
+    columnOffset = _HEADER.size + len(nameData)
+    columnOffset += _padding(columnOffset)
+
+    itemSize = array.array(typecode).itemsize
+    header = _HEADER.pack(MAGIC, VERSION, itemSize,
+                          data.get('skinningMethod') or 0, data.get('normalizeWeights') or 0,
+                          vertexCount, len(influences), len(nameData), columnOffset,
+                          topology or _NO_HASH)
+
+    offsets, vertices, values = weights.toColumns()
+
+    with fileIO.atomicWrite(filepath, 'wb') as f:
+        f.write(header)
+        f.write(nameData)
+        offset = _HEADER.size + len(nameData)
+        for column in (array.array(typecode, blendWeights),
+                       offsets,
+                       vertices,
+                       array.array(typecode, values),
+                       array.array('I', [len(positions)]),
+                       array.array('f', positions)):
+            f.write('\0' * _padding(offset))
+            offset += _padding(offset)
+            column = _toString(column)
+            f.write(column)
+            offset += len(column)
+
+    return filepath
+
+#---------------------------------------------
+#Loading
+#---------------------------------------------
+class Column(object):
+    '''
+    The blend weights in a weight file. Nothing is read from the file
+    until a weight is asked for.
+    '''
+    __slots__ = ('__data', '__offset', '__count', '__typecode', '__values')
+
+    def __init__(self, data, offset, count, typecode):
+        self.__data     = data
+        self.__offset   = offset
+        self.__count    = count
+        self.__typecode = typecode
+        self.__values   = None
+
+    def __repr__(self):
+        return '< %s: %s weights >' % (self.__class__.__name__, self.__count)
+
+    def __len__(self):
+        return self.__count
+
+    def __getitem__(self, index):
+        return self.values()[index]
+
+    def __iter__(self):
+        return iter(self.values())
+
+    def values(self):
+        '''
+        Returns the weights, copied out of the file in to an array the
+        first time they are asked for
+        '''
+        if self.__values is None:
+            self.__values = _readArray(self.__data, self.__typecode, self.__offset, self.__count)
+
+        return self.__values
+
+    def tolist(self):
+        return self.values().tolist()
+
+
+class WeightFile(object):
+    '''
+    Reads the header and names of a weight file. Weights are only read
+    when they are asked for.
+    '''
+    def __init__(self, filepath):
+        '''
+        :param filepath: Path of the weight file
+        :type filepath: str
+        '''
+        super(WeightFile, self).__init__()
+
+        f = open(filepath, 'rb')
+        try:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size or header[:4] != MAGIC:
+                raise RuntimeError('%s is not a weight file' % filepath)
+            data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        finally:
+            f.close()
+
+        (magic, version, itemSize, skinningMethod, normalizeWeights,
+         vertexCount, influenceCount, nameSize, columnOffset, topology) = _HEADER.unpack(header)
+        if version != VERSION:
+            raise RuntimeError('%s was saved with weight file version %s, only version %s can be loaded' % (filepath, version, VERSION))
+        if itemSize not in TYPECODES:
+            raise RuntimeError('%s has %s byte weights, only 4 and 8 can be loaded' % (filepath, itemSize))
+
+        self.__filepath         = filepath
+        self.__version          = version
+        self.__data             = data
+        self.__typecode         = TYPECODES[itemSize]
+        self.__itemSize         = itemSize
+        self.__skinningMethod   = skinningMethod
+        self.__normalizeWeights = normalizeWeights
+        self.__vertexCount      = vertexCount
+        self.__columnOffset     = columnOffset
+        self.__topology         = topology if topology != _NO_HASH else None
+
+        #names
+        lengths = array.array('I')
+        offset = _HEADER.size + lengths.itemsize * (influenceCount + 2)
+        lengths.fromstring(buffer(data, _HEADER.size, offset - _HEADER.size))
+        if sys.byteorder == 'big':
+            lengths.byteswap()
+        names = list()
+        for length in lengths:
+            names.append(data[offset:offset + length].decode('utf-8'))
+            offset += length
+        self.__mesh       = names[0]
+        self.__name       = names[1]
+        self.__influences = names[2:]
+        self.__columns    = dict((influence, index) for index, influence in enumerate(self.__influences))
+        self.__weights    = None
+
+        #offsets of the sparse columns
+        offset = columnOffset + vertexCount * itemSize
+        self.__offsetsOffset = offset + _padding(offset)
+        count = _readArray(data, 'I', self.__offsetsOffset + 4 * influenceCount, 1)[0]
+        offset = self.__offsetsOffset + 4 * (influenceCount + 1)
+        self.__verticesOffset = offset + _padding(offset)
+        offset = self.__verticesOffset + 4 * count
+        self.__valuesOffset = offset + _padding(offset)
+        offset = self.__valuesOffset + itemSize * count
+        self.__positionsOffset = offset + _padding(offset)
+
+    def __repr__(self):
+        return '< %s %s: %s influences, %s vertices >' % (self.__class__.__name__, self.__filepath,
+                                                          len(self.__influences), self.__vertexCount)
+
+    def filepath(self):
+        return self.__filepath
+
+    def version(self):
+        return self.__version
+
+    def typecode(self):
+        return self.__typecode
+
+    def mesh(self):
+        return self.__mesh
+
+    def name(self):
+        '''
+        Returns the name of the skinCluster the weights were saved from
+        '''
+        return self.__name
+
+    def skinningMethod(self):
+        return self.__skinningMethod
+
+    def normalizeWeights(self):
+        return self.__normalizeWeights
+
+    def vertexCount(self):
+        return self.__vertexCount
+
+    def topology(self):
+        '''
+        Returns the topologyHash() saved with the weights, None if there
+        wasn't one
+        '''
+        return self.__topology
+
+    def influences(self):
+        return list(self.__influences)
+
+    def column(self, influence):
+        '''
+        Returns the weight of every vertex for the influence. Only the
+        weights of the influence are read.
+
+        :param influence: Name of the influence
+        :type influence: str
+
+        :rtype: list
+        '''
+        if influence not in self.__columns:
+            raise KeyError('%s is not an influence in %s' % (influence, self.__filepath))
+        index = self.__columns[influence]
+        start, end = _readArray(self.__data, 'I', self.__offsetsOffset + 4 * index, 2)
+        weights = [0.0] * self.__vertexCount
+        map(weights.__setitem__,
+            _readArray(self.__data, 'I', self.__verticesOffset + 4 * start, end - start),
+            _readArray(self.__data, self.__typecode, self.__valuesOffset + self.__itemSize * start, end - start))
+        return weights
+
+    def blendWeights(self):
+        '''
+        :rtype: Column
+        '''
+        return Column(self.__data, self.__columnOffset, self.__vertexCount, self.__typecode)
+
+    def weights(self):
+        '''
+        Returns the weights of every influence
+
+        :rtype: sparseWeights.SparseWeights
+        '''
+        if self.__weights is not None:
+            return self.__weights
+
+        influenceCount = len(self.__influences)
+        offsets = _readArray(self.__data, 'I', self.__offsetsOffset, influenceCount + 1)
+        vertices = _readArray(self.__data, 'I', self.__verticesOffset, offsets[-1])
+        values = _readArray(self.__data, self.__typecode, self.__valuesOffset, offsets[-1])
+
+        self.__weights = sparseWeights.SparseWeights.fromColumns(self.__influences, self.__vertexCount,
+                                                                 offsets, vertices, values)
+        return self.__weights
+
+    def positions(self):
+        '''
+        Returns the x, y, z of every vertex the weights were saved from,
+        None if the file has no positions
+
+        :rtype: array.array
+        '''
+        offset = self.__positionsOffset
+        count = _readArray(self.__data, 'I', offset, 1)[0]
+        if not count:
+            return None
+        offset += 4
+        offset += _padding(offset)
+        return _readArray(self.__data, 'f', offset, count)
+
+    def data(self):
+        '''
+        Returns the weights as SkinCluster.data stores them
+
+        :rtype: ordereddict.OrderedDict
+        '''
+        data = ordereddict.OrderedDict()
+        data['name']             = self.__name
+        data['skinningMethod']   = self.__skinningMethod
+        data['normalizeWeights'] = self.__normalizeWeights
+        data['weights']          = self.weights()
+        data['blendWeights']     = self.blendWeights()
+        data['positions']        = self.positions()
+
+        return data
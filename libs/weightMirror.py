@@ -0,0 +1,306 @@
+'''
+Skin weight mirroring
+
+Weights are mirrored across an axis by copying the weights of every
+vertex on one side to the vertex that mirrors it on the other, with the
+influences swapped for the ones on the other side.
+
+Vertices are matched with a spatial hash: positions are quantized to
+cells a few tolerances wide, and the mirrored position of every vertex
+only looks at the cells within tolerance of it. The closest vertex
+within tolerance wins, and the lower vertex id wins a tie, so the same
+mesh always gives the same map. Vertex maps are cached on disk by the
+topology of the mesh, see cachedVertexMap().
+
+Influences are swapped by their side token, the part of the name
+between delimiters that is the left or the right token.
+
+:example:
+    >>> vertices = weightMirror.vertexMap(positions, axis = 0)
+    >>> influences = weightMirror.influenceMirrorMap(weights.influences(), 'l', 'r')
+    >>> weights = weightMirror.mirrorWeights(weights, positions, vertices, influences)
+'''
+#import python modules
+import array
+import binascii
+import math
+import os
+import struct
+import sys
+import tempfile
+
+#import package modules
+from japeto.libs import fileIO
+from japeto.libs import sparseWeights
+
+#vertices further apart than this are not mirrors of each other
+TOLERANCE = 1e-3
+
+#cells of the spatial hash are this many tolerances wide
+CELL_TOLERANCES = 4.0
+
+#directory vertex maps are cached in
+CACHE_DIR = os.environ.get('JAPETO_MIRROR_CACHE', os.path.join(tempfile.gettempdir(), 'japeto', 'mirrorMaps'))
+
+_MAGIC  = 'WMAP'
+_HEADER = struct.Struct('<4sI')
+
+AXES = {'x' : 0, 'y' : 1, 'z' : 2}
+
+def _axisIndex(axis):
+    if isinstance(axis, basestring):
+        if axis.lower() not in AXES:
+            raise ValueError('%s is not an axis, use x, y or z' % axis)
+        return AXES[axis.lower()]
+    return axis
+
+#---------------------------------------------
+#Names
+#---------------------------------------------
+def mirrorName(name, left, right, delimiter = '_'):
+    '''
+    Returns the name with its left and right side tokens swapped, in
+    every part of its path. Names without side tokens come back as they
+    are.
+
+    :example:
+        >>> weightMirror.mirrorName('char:l_arm_jnt', 'l', 'r')
+        'char:r_arm_jnt'
+
+    :param name: Name to mirror
+    :type name: str
+
+    :param left: Left side token
+    :type left: str
+
+    :param right: Right side token
+    :type right: str
+
+    :param delimiter: What the tokens of the name are separated by
+    :type delimiter: str
+
+    :rtype: str
+    '''
+    swap = {left : right, right : left}
+    parts = list()
+    for part in name.split('|'):
+        namespace, sep, shortName = part.rpartition(':')
+        tokens = [swap.get(token, token) for token in shortName.split(delimiter)]
+        parts.append(namespace + sep + delimiter.join(tokens))
+    return '|'.join(parts)
+
+def influenceMirrorMap(influences, left, right, delimiter = '_'):
+    '''
+    Returns the index of the mirror of every influence. Influences whose
+    mirror is not one of the influences are their own mirror. Mirrored
+    names are matched as sparseWeights.influenceMap() matches them.
+
+    :param influences: Names of the influences
+    :type influences: list
+
+    :rtype: list
+    '''
+    mirrored = [mirrorName(influence, left, right, delimiter) for influence in influences]
+    positions = sparseWeights.influenceMap(mirrored, influences)
+    return [index if position == -1 else position for index, position in enumerate(positions)]
+
+#---------------------------------------------
+#Vertices
+#---------------------------------------------
+def vertexMap(positions, axis = 0, tolerance = TOLERANCE):
+    '''
+    Returns the vertex that mirrors every vertex, -1 for the ones without
+    a vertex within tolerance of their mirrored position
+
+    :param positions: x, y, z of every vertex, one after the other
+    :type positions: list
+
+    :param axis: Axis to mirror across, 0, 1, 2 or x, y, z
+    :type axis: int | str
+
+    :param tolerance: How far a vertex can be from the mirrored position
+    :type tolerance: float
+
+    :rtype: array.array
+    '''
+    axis = _axisIndex(axis)
+    if len(positions) % 3:
+        raise RuntimeError('%s positions is not a list of x, y, z values' % len(positions))
+    if tolerance <= 0:
+        raise ValueError('Tolerance must be more than 0, not %s' % tolerance)
+
+    count = len(positions) // 3
+    size = tolerance * CELL_TOLERANCES
+    floor = math.floor
+    points = [tuple(positions[i * 3:i * 3 + 3]) for i in xrange(count)]
+
+    cells = dict()
+    for vertex, (x, y, z) in enumerate(points):
+        key = (int(floor(x / size)), int(floor(y / size)), int(floor(z / size)))
+        if key in cells:
+            cells[key].append(vertex)
+        else:
+            cells[key] = [vertex]
+
+    mirrors = array.array('i', [-1]) * count
+    limit = tolerance * tolerance
+    for vertex, point in enumerate(points):
+        target = list(point)
+        target[axis] = -target[axis]
+        x, y, z = target
+        #cells the tolerance around the mirrored position touches
+        ranges = [xrange(int(floor((value - tolerance) / size)), int(floor((value + tolerance) / size)) + 1)
+                  for value in target]
+        best, bestDistance = -1, limit
+        for i in ranges[0]:
+            for j in ranges[1]:
+                for k in ranges[2]:
+                    for other in cells.get((i, j, k), ()):
+                        a, b, c = points[other]
+                        distance = (a - x) * (a - x) + (b - y) * (b - y) + (c - z) * (c - z)
+                        if distance < bestDistance or (distance == bestDistance and (best == -1 or other < best)):
+                            best, bestDistance = other, distance
+        mirrors[vertex] = best
+
+    return mirrors
+
+def cachePath(topology, axis = 0, tolerance = TOLERANCE, cacheDir = None):
+    '''
+    Returns the file the vertex map for a topology is cached in
+
+    :param topology: weightFile.topologyHash() of the mesh
+    :type topology: str
+
+    :rtype: str
+    '''
+    return os.path.join(cacheDir or CACHE_DIR, '%s_%s_%r.wmap' % (binascii.hexlify(topology),
+                                                                  _axisIndex(axis), float(tolerance)))
+
+def loadVertexMap(filepath):
+    '''
+    Returns the vertex map saved in the file, None if it can not be read
+
+    :rtype: array.array
+    '''
+    try:
+        f = open(filepath, 'rb')
+    except IOError:
+        return None
+    try:
+        data = f.read()
+    finally:
+        f.close()
+
+    if len(data) < _HEADER.size:
+        return None
+    magic, count = _HEADER.unpack(data[:_HEADER.size])
+    mirrors = array.array('i')
+    if magic != _MAGIC or len(data) != _HEADER.size + mirrors.itemsize * count:
+        return None
+    mirrors.fromstring(data[_HEADER.size:])
+    if sys.byteorder == 'big':
+        mirrors.byteswap()
+    return mirrors
+
+def saveVertexMap(filepath, mirrors):
+    '''
+    Saves a vertex map. It is written to a temporary file first, so
+    another process never reads half a map.
+    '''
+    directory = os.path.dirname(filepath)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    mirrors = array.array('i', mirrors)
+    if sys.byteorder == 'big':
+        mirrors.byteswap()
+    with fileIO.atomicWrite(filepath, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, len(mirrors)))
+        f.write(mirrors.tostring())
+
+    return filepath
+
+def cachedVertexMap(positions, topology, axis = 0, tolerance = TOLERANCE, cacheDir = None):
+    '''
+    Returns vertexMap() for the positions, read from the cache when a
+    map has been saved for the topology, axis and tolerance, and saved to
+    it when it has not. The map is reused as long as the topology stays
+    the same, so delete the cached file after making a mesh asymmetric.
+
+    :param topology: weightFile.topologyHash() of the mesh, the map is not
+                     cached when it is None
+    :type topology: str
+
+    :rtype: array.array
+    '''
+    if not topology:
+        return vertexMap(positions, axis, tolerance)
+
+    filepath = cachePath(topology, axis, tolerance, cacheDir)
+    mirrors = loadVertexMap(filepath)
+    if mirrors is not None and len(mirrors) * 3 == len(positions):
+        return mirrors
+
+    mirrors = vertexMap(positions, axis, tolerance)
+    try:
+        saveVertexMap(filepath, mirrors)
+    except (IOError, OSError), e:
+        sys.stderr.write('Could not cache the vertex map in %s: %s\n' % (filepath, e))
+
+    return mirrors
+
+#---------------------------------------------
+#Weights
+#---------------------------------------------
+def mirrorWeights(weights, positions, mirrors, influenceMirrors, axis = 0, positive = True, tolerance = TOLERANCE):
+    '''
+    Copies the weights of the vertices on one side of the axis to the
+    vertices that mirror them on the other side, swapping every influence
+    for its mirror. Vertices within tolerance of the axis and vertices
+    without a mirror keep their weights.
+
+    :param weights: Weights to mirror
+    :type weights: sparseWeights.SparseWeights
+
+    :param positions: x, y, z of every vertex
+    :type positions: list
+
+    :param mirrors: vertexMap() of the vertices
+    :type mirrors: array.array
+
+    :param influenceMirrors: influenceMirrorMap() of the influences
+    :type influenceMirrors: list
+
+    :param axis: Axis to mirror across, 0, 1, 2 or x, y, z
+    :type axis: int | str
+
+    :param positive: Copy from the positive side to the negative side,
+                     False to copy the other way
+    :type positive: bool
+
+    :rtype: sparseWeights.SparseWeights
+    '''
+    axis = _axisIndex(axis)
+    vertexCount = weights.vertexCount()
+    if len(mirrors) != vertexCount or len(positions) != vertexCount * 3:
+        raise RuntimeError('There are %s weighted vertices, %s mirrors and %s positions' % (vertexCount, len(mirrors),
+                                                                                           len(positions) // 3))
+
+    offsets, indices, values = weights.offsets(), weights.indices(), weights.values()
+    newOffsets = array.array('I', [0])
+    newIndices = array.array(indices.typecode)
+    newValues = array.array(values.typecode)
+    for vertex in xrange(vertexCount):
+        value = positions[vertex * 3 + axis]
+        source = mirrors[vertex]
+        if source != -1 and (value < -tolerance if positive else value > tolerance):
+            row = sorted([(influenceMirrors[indices[i]], values[i]) for i in
+                          xrange(offsets[source], offsets[source + 1])])
+        else:
+            row = [(indices[i], values[i]) for i in xrange(offsets[vertex], offsets[vertex + 1])]
+        for index, weight in row:
+            newIndices.append(index)
+            newValues.append(weight)
+        newOffsets.append(len(newValues))
+
+    return sparseWeights.SparseWeights(weights.influences(), newOffsets, newIndices, newValues)
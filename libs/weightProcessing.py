@@ -0,0 +1,304 @@
+'''
+Skin weight clean up
+
+Operations that run over the weights of every vertex at once, on
+sparseWeights.SparseWeights or on the dense list the skinData command
+gets. Each returns new SparseWeights and leaves the weights it was given
+alone. They run with numpy over all the weights when numpy is
+available, and vertex by vertex when it isn't.
+
+    limitInfluences   keeps the largest weights of every vertex
+    prune             drops weights of epsilon or less
+    normalize         scales every vertex to sum to 1, leaving the
+                      weights of locked influences as they are
+    roundWeights      rounds weights to a number of decimals without
+                      changing what a vertex sums to
+
+:example:
+    >>> weights = skin.data['weights']
+    >>> weights = weightProcessing.limitInfluences(weights, 4)
+    >>> weights = weightProcessing.prune(weights, 0.01)
+    >>> weights = weightProcessing.normalize(weights, locked = ['root_jnt'])
+'''
+#import python modules
+import itertools
+import math
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+#import package modules
+from japeto.libs import sparseWeights
+
+#influences a vertex keeps by default
+MAX_INFLUENCES = 4
+
+def asSparse(weights, influences = None):
+    '''
+    Returns weights as SparseWeights
+
+    :param weights: SparseWeights, influence name : weight of every vertex,
+                    or a dense list with all the influences of a vertex one
+                    after the other
+    :type weights: sparseWeights.SparseWeights | dict | list
+
+    :param influences: Names of the influences of a dense list
+    :type influences: list
+
+    :rtype: sparseWeights.SparseWeights
+    '''
+    if isinstance(weights, sparseWeights.SparseWeights):
+        return weights
+    if isinstance(weights, dict):
+        return sparseWeights.SparseWeights.fromInfluenceWeights(weights, 0.0)
+    if influences is None:
+        raise TypeError('Dense weights need the names of their influences')
+    return sparseWeights.SparseWeights.fromDense(weights, influences, 0.0)
+
+def _vertices(weights):
+    '''
+    Returns the vertex of every weight as a numpy array
+    '''
+    offsets = sparseWeights._toNumpy(weights.offsets())
+    return numpy.repeat(numpy.arange(weights.vertexCount()), numpy.diff(offsets))
+
+def _order(vertices, values):
+    '''
+    Returns the order that puts weights vertex by vertex, largest value
+    first within a vertex, for numpy arrays vertices and values
+    '''
+    #one argsort over vertex + how small the value is runs many times
+    #faster than lexsort. Values closer than about 1e-9 of their range
+    #apart keep the order they were in.
+    if not len(values):
+        return numpy.arange(0)
+    lowest = values.min()
+    span = (values.max() - lowest) * (1.0 + 1e-9) or 1.0
+    return numpy.argsort(vertices + (1.0 - (values - lowest) / span), kind = 'mergesort')
+
+def _ranks(weights, vertices, order):
+    '''
+    Returns the position of every weight within its vertex once they are
+    put in order
+    '''
+    offsets = sparseWeights._toNumpy(weights.offsets()).astype('i8')
+    ranks = numpy.empty(len(order), dtype = 'i8')
+    ranks[order] = numpy.arange(len(order)) - offsets[vertices[order]]
+    return ranks
+
+def _keep(weights, keep, values = None):
+    '''
+    Returns the weights that keep is True for, numpy arrays keep and values
+    '''
+    if values is None:
+        values = sparseWeights._toNumpy(weights.values())
+    counts = numpy.bincount(_vertices(weights)[keep], minlength = weights.vertexCount())
+    offsets = numpy.zeros(weights.vertexCount() + 1, dtype = 'I')
+    numpy.cumsum(counts, out = offsets[1:])
+    indices = sparseWeights._toNumpy(weights.indices())[keep]
+    return sparseWeights.SparseWeights(weights.influences(),
+                                       sparseWeights._toArray('I', offsets),
+                                       sparseWeights._toArray(weights.indices().typecode, indices),
+                                       sparseWeights._toArray(weights.values().typecode, values[keep]))
+
+def _rows(weights):
+    '''
+    Yields the start and end of the weights of every vertex
+    '''
+    offsets = weights.offsets()
+    return itertools.izip(offsets, itertools.islice(offsets, 1, None))
+
+def _fromRows(weights, rows):
+    '''
+    Returns SparseWeights with the (index, value) pairs of every row
+    '''
+    offsets = array('I', [0])
+    indices = array(weights.indices().typecode)
+    values = array(weights.values().typecode)
+    for row in rows:
+        for index, value in row:
+            indices.append(index)
+            values.append(value)
+        offsets.append(len(values))
+    return sparseWeights.SparseWeights(weights.influences(), offsets, indices, values)
+
+#---------------------------------------------
+#Operations
+#---------------------------------------------
+def limitInfluences(weights, count = MAX_INFLUENCES, influences = None):
+    '''
+    Keeps the count largest weights of every vertex. The weights are not
+    normalized afterwards.
+
+    :param weights: Weights to limit, see asSparse()
+    :type weights: sparseWeights.SparseWeights | dict | list
+
+    :param count: Number of influences a vertex keeps
+    :type count: int
+
+    :rtype: sparseWeights.SparseWeights
+    '''
+    weights = asSparse(weights, influences)
+    if numpy is not None:
+        vertices = _vertices(weights)
+        values = sparseWeights._toNumpy(weights.values())
+        order = _order(vertices, values)
+        return _keep(weights, _ranks(weights, vertices, order) < count, values)
+
+    indices, values = weights.indices(), weights.values()
+    rows = list()
+    for start, end in _rows(weights):
+        row = zip(indices[start:end], values[start:end])
+        if len(row) > count:
+            row = sorted(sorted(row, key = lambda item: -item[1])[:count])
+        rows.append(row)
+    return _fromRows(weights, rows)
+
+def prune(weights, epsilon = 0.01, influences = None):
+    '''
+    Drops the weights of epsilon or less. A vertex keeps its largest
+    weight even when it is epsilon or less, so no vertex is left without
+    weights. The weights are not normalized afterwards.
+
+    :param weights: Weights to prune, see asSparse()
+    :type weights: sparseWeights.SparseWeights | dict | list
+
+    :param epsilon: Weights of epsilon or less are dropped
+    :type epsilon: float
+
+    :rtype: sparseWeights.SparseWeights
+    '''
+    weights = asSparse(weights, influences)
+    if numpy is not None:
+        vertices = _vertices(weights)
+        values = sparseWeights._toNumpy(weights.values())
+        largest = _ranks(weights, vertices, _order(vertices, values)) == 0
+        return _keep(weights, (values > epsilon) | largest, values)
+
+    indices, values = weights.indices(), weights.values()
+    rows = list()
+    for start, end in _rows(weights):
+        row = [(index, value) for index, value in
+               itertools.izip(indices[start:end], values[start:end]) if value > epsilon]
+        if not row and end > start:
+            largest = max(xrange(start, end), key = values.__getitem__)
+            row = [(indices[largest], values[largest])]
+        rows.append(row)
+    return _fromRows(weights, rows)
+
+def normalize(weights, locked = None, influences = None):
+    '''
+    Scales the weights of every vertex to sum to 1. Weights of locked
+    influences are left as they are and the others share what is left.
+    When locked weights sum to 1 or more, the others become 0, and a
+    vertex with only locked weights is left as it is.
+
+    :param weights: Weights to normalize, see asSparse()
+    :type weights: sparseWeights.SparseWeights | dict | list
+
+    :param locked: Names of the influences to leave as they are
+    :type locked: list
+
+    :rtype: sparseWeights.SparseWeights
+    '''
+    weights = asSparse(weights, influences)
+    locked = set(locked or list())
+    lockedIndices = set([index for index, influence in enumerate(weights.influences()) if influence in locked])
+
+    if numpy is not None:
+        vertices = _vertices(weights)
+        values = sparseWeights._toNumpy(weights.values()).astype('d')
+        isLocked = numpy.zeros(len(weights.influences()) + 1, dtype = bool)
+        isLocked[list(lockedIndices)] = True
+        isLocked = isLocked[sparseWeights._toNumpy(weights.indices())]
+
+        vertexCount = weights.vertexCount()
+        lockedSum = numpy.bincount(vertices, values * isLocked, minlength = vertexCount)
+        freeSum = numpy.bincount(vertices, values * ~isLocked, minlength = vertexCount)
+        scale = numpy.ones(vertexCount)
+        free = freeSum > 0
+        scale[free] = numpy.maximum(1.0 - lockedSum[free], 0.0) / freeSum[free]
+        values = numpy.where(isLocked, values, values * scale[vertices])
+        return sparseWeights.SparseWeights(weights.influences(), weights.offsets(), weights.indices(),
+                                           sparseWeights._toArray(weights.values().typecode, values))
+
+    indices, values = weights.indices(), weights.values()
+    normalized = array(values.typecode, values)
+    for start, end in _rows(weights):
+        lockedSum = freeSum = 0.0
+        for i in xrange(start, end):
+            if indices[i] in lockedIndices:
+                lockedSum += values[i]
+            else:
+                freeSum += values[i]
+        if freeSum <= 0:
+            continue
+        scale = max(1.0 - lockedSum, 0.0) / freeSum
+        for i in xrange(start, end):
+            if indices[i] not in lockedIndices:
+                normalized[i] = values[i] * scale
+
+    return sparseWeights.SparseWeights(weights.influences(), weights.offsets(), weights.indices(), normalized)
+
+def roundWeights(weights, decimals = 3, influences = None):
+    '''
+    Rounds the weights to a number of decimals so that every vertex still
+    sums to what it did, rounded. Every weight is rounded down, and the
+    steps that leaves missing go to the weights that lost the most.
+    Weights that round to 0 are dropped.
+
+    :param weights: Weights to round, see asSparse()
+    :type weights: sparseWeights.SparseWeights | dict | list
+
+    :param decimals: Number of decimals to keep
+    :type decimals: int
+
+    :rtype: sparseWeights.SparseWeights
+    '''
+    weights = asSparse(weights, influences)
+    step = 10.0 ** -decimals
+    if numpy is not None:
+        vertices = _vertices(weights)
+        vertexCount = weights.vertexCount()
+        units = sparseWeights._toNumpy(weights.values()) / step
+        #a little slack so 0.25 / 0.001 does not round down to 249
+        steps = numpy.floor(units + 1e-9)
+        remainders = units - steps
+        missing = (numpy.round(numpy.bincount(vertices, units, minlength = vertexCount)) -
+                   numpy.bincount(vertices, steps, minlength = vertexCount))
+        order = _order(vertices, remainders)
+        steps += _ranks(weights, vertices, order) < missing[vertices]
+        values = steps * step
+        return _keep(weights, steps > 0, values)
+
+    indices, values = weights.indices(), weights.values()
+    rows = list()
+    for start, end in _rows(weights):
+        units = [value / step for value in values[start:end]]
+        steps = [math.floor(unit + 1e-9) for unit in units]
+        missing = int(round(sum(units)) - sum(steps))
+        for i in sorted(xrange(len(units)), key = lambda i: steps[i] - units[i])[:missing]:
+            steps[i] += 1
+        rows.append([(index, count * step) for index, count in
+                     itertools.izip(indices[start:end], steps) if count > 0])
+    return _fromRows(weights, rows)
+
+def clean(weights, count = MAX_INFLUENCES, epsilon = 0.01, locked = None, decimals = None, influences = None):
+    '''
+    Limits, prunes, normalizes and optionally rounds weights, the clean
+    up weights get after they are transferred
+
+    :param decimals: Number of decimals to round to, None to not round
+    :type decimals: int
+
+    :rtype: sparseWeights.SparseWeights
+    '''
+    weights = limitInfluences(weights, count, influences)
+    weights = prune(weights, epsilon)
+    weights = normalize(weights, locked)
+    if decimals is not None:
+        weights = roundWeights(weights, decimals)
+    return weights
@@ -0,0 +1,173 @@
+'''
+Closest point transfer of skin weights
+
+When a mesh has changed since its weights were saved, the weights can
+be moved on to it by position instead of by vertex id. The positions of
+the vertices the weights were saved from are put in a
+spatialIndex.PointIndex, every vertex of the new mesh finds the source
+vertices closest to it, and their weights are blended by inverse
+distance, pruned and renormalized.
+
+The PointIndex is cached per weight file, so loading one file on to
+several LODs only builds it once.
+
+:example:
+    >>> data = weightFile.WeightFile('/tmp/body.wtsb').data()
+    >>> data = weightTransfer.transferData(data, SkinCluster.getPositions('body_lod1'),
+    ...                                    filepath = '/tmp/body.wtsb')
+'''
+#import python modules
+import itertools
+import os
+from array import array
+
+#import package modules
+from japeto.libs import ordereddict
+from japeto.libs import sparseWeights
+from japeto.libs import spatialIndex
+
+#number of source vertices blended for every vertex
+COUNT = 4
+
+#power of the inverse distance blend, higher favours the closest vertex
+POWER = 2.0
+
+#vertices closer than this to a source vertex copy its weights
+TOLERANCE = 1e-6
+
+#number of weight files PointIndexes are kept for
+CACHE_SIZE = 4
+
+_cache = ordereddict.OrderedDict() #<-- (filepath, mtime, size) : PointIndex
+
+def pointIndex(positions, filepath = None):
+    '''
+    Returns a PointIndex over the positions. When the positions were read
+    from a file, the index is kept for the file until it changes on disk.
+
+    :param positions: x, y, z of every source vertex
+    :type positions: list
+
+    :param filepath: File the positions were read from
+    :type filepath: str
+
+    :rtype: spatialIndex.PointIndex
+    '''
+    if not filepath:
+        return spatialIndex.PointIndex(positions)
+
+    filepath = os.path.abspath(filepath)
+    stat = os.stat(filepath)
+    key = (filepath, stat.st_mtime, stat.st_size)
+    if key in _cache:
+        index = _cache.pop(key)
+    else:
+        index = spatialIndex.PointIndex(positions)
+    _cache[key] = index
+
+    while len(_cache) > CACHE_SIZE:
+        del _cache[_cache.keys()[0]]
+
+    return index
+
+def clearCache():
+    _cache.clear()
+
+def _factors(distances, power):
+    '''
+    Returns how much each of the closest source vertices contributes
+    '''
+    if distances[0] <= TOLERANCE:
+        return [1.0]
+
+    factors = [1.0 / distance ** power for distance in distances]
+    total = sum(factors)
+    return [factor / total for factor in factors]
+
+def transferWeights(weights, neighbours, power = POWER, epsilon = sparseWeights.EPSILON):
+    '''
+    Blends the weights of the source vertices closest to every vertex
+
+    :param weights: Weights of the source vertices
+    :type weights: sparseWeights.SparseWeights
+
+    :param neighbours: Closest source vertices and their distances for
+                       every vertex, as PointIndex.nearest() returns them
+    :type neighbours: tuple
+
+    :param power: Power of the inverse distance blend
+    :type power: float
+
+    :param epsilon: Blended weights of epsilon or less are pruned
+    :type epsilon: float
+
+    :rtype: sparseWeights.SparseWeights
+    '''
+    offsets, indices, values = weights.offsets(), weights.indices(), weights.values()
+    newOffsets = array('I', [0])
+    newIndices = array(indices.typecode)
+    newValues = array(values.typecode)
+
+    for sources, distances in itertools.izip(*neighbours):
+        blended = dict()
+        for source, factor in itertools.izip(sources, _factors(distances, power)):
+            for i in xrange(offsets[source], offsets[source + 1]):
+                blended[indices[i]] = blended.get(indices[i], 0.0) + values[i] * factor
+
+        #prune, then scale what is left back up to the blended total
+        total = sum(blended.itervalues())
+        kept = sorted([(influence, value) for influence, value in blended.iteritems() if value > epsilon])
+        keptTotal = sum([value for influence, value in kept])
+        scale = total / keptTotal if keptTotal else 1.0
+        for influence, value in kept:
+            newIndices.append(influence)
+            newValues.append(value * scale)
+        newOffsets.append(len(newValues))
+
+    return sparseWeights.SparseWeights(weights.influences(), newOffsets, newIndices, newValues)
+
+def transferValues(values, neighbours, power = POWER):
+    '''
+    Blends a value per source vertex, like blendWeights, for every vertex
+
+    :rtype: list
+    '''
+    return [sum([values[source] * factor for source, factor in
+                 itertools.izip(sources, _factors(distances, power))])
+            for sources, distances in itertools.izip(*neighbours)]
+
+def transferData(data, positions, count = COUNT, power = POWER, filepath = None):
+    '''
+    Moves skin data on to a mesh with the given vertex positions
+
+    :param data: Skin data as SkinCluster.data stores it, with the
+                 positions of the vertices it was saved from
+    :type data: dict
+
+    :param positions: x, y, z of every vertex of the mesh to move it to
+    :type positions: list
+
+    :param count: Number of source vertices blended for every vertex
+    :type count: int
+
+    :param power: Power of the inverse distance blend
+    :type power: float
+
+    :param filepath: File the data was read from, to cache the PointIndex for
+    :type filepath: str
+
+    :return: A copy of data with the weights, blendWeights and positions
+             for the mesh
+    :rtype: ordereddict.OrderedDict
+    '''
+    if not data.get('positions'):
+        raise RuntimeError('The weights have no vertex positions to transfer them by')
+
+    neighbours = pointIndex(data['positions'], filepath).nearest(positions, count)
+
+    transferred = ordereddict.OrderedDict(data)
+    transferred['weights'] = transferWeights(data['weights'], neighbours, power)
+    transferred['blendWeights'] = transferValues(data['blendWeights'], neighbours, power)
+    transferred['positions'] = positions
+
+    return transferred
@@ -0,0 +1,140 @@
+'''
+Builder will run the nodes on a graph incrementally
+
+Nodes start out dirty. Once a node has run it is marked clean, and it only
+runs again when it is made dirty, by editing one of its attributes
+(ml_attribute.MlAttribute.setValue) or one of the nodes it depends on.
+Nodes run in dependency order, see japeto.mlRig.scheduler.
+
+What was built is gone once a new scene is made or a file is opened, so
+a builder with its scene callbacks added makes every node dirty again
+when that happens.
+
+:example:
+    >>> builder = builder.Builder(rig)
+    >>> builder.execute('runSetupRig')
+    < BuildReport runSetupRig: ran 11, skipped 0 >
+    >>> rig.getNodeByName('l_arm').getAttributeByName('position').setValue([1,25,0])
+    >>> builder.execute('runSetupRig')
+    < BuildReport runSetupRig: ran 2, skipped 9 >
+'''
+from japeto.mlRig import scheduler
+
+try:
+    from maya import OpenMaya
+except ImportError:
+    OpenMaya = None
+
+BuildReport = scheduler.BuildReport
+
+class Builder(object):
+    def __init__(self, graph):
+        '''
+        :param graph: Graph to run the nodes of
+        :type graph: ml_graph.MlGraph
+        '''
+        super(Builder, self).__init__()
+
+        self.__graph     = graph
+        self.__report    = None
+        self.__scheduler = None
+        self.__callbacks = list()
+        self.__missed    = False #<-- the scene may have changed without callbacks
+
+    def graph(self):
+        return self.__graph
+
+    def setGraph(self, graph):
+        '''
+        Sets the graph to run the nodes of
+        
+        :param graph: Graph to run the nodes of
+        :type graph: ml_graph.MlGraph
+        '''
+        self.__graph     = graph
+        self.__report    = None
+        self.__scheduler = None
+
+    def addSceneCallbacks(self):
+        '''
+        Makes every node on the graph dirty after a new scene is made or a
+        file is opened. Adding them again after they were removed makes
+        every node dirty, the scene may have changed in between.
+        '''
+        if self.__callbacks or OpenMaya is None:
+            return
+        if self.__missed:
+            self.__graph.setDirty(True)
+            self.__missed = False
+        self.__callbacks = [OpenMaya.MSceneMessage.addCallback(message, self.__sceneChanged)
+                            for message in (OpenMaya.MSceneMessage.kAfterNew,
+                                            OpenMaya.MSceneMessage.kAfterOpen)]
+
+    def removeSceneCallbacks(self):
+        if not self.__callbacks:
+            return
+        for callback in self.__callbacks:
+            OpenMaya.MMessage.removeCallback(callback)
+        self.__callbacks = list()
+        self.__missed = True
+
+    def __sceneChanged(self, *args):
+        self.__graph.setDirty(True)
+
+    def report(self):
+        '''
+        Returns the report from the last time execute() was called
+        '''
+        return self.__report
+
+    def scheduler(self):
+        '''
+        Returns the scheduler from the last time execute() was called
+        '''
+        return self.__scheduler
+
+    def criticalPath(self):
+        '''
+        Returns the chain of dependent nodes that took the longest in the
+        last call to execute()
+
+        :see: japeto.mlRig.scheduler.Scheduler.criticalPath
+        '''
+        if not self.__report:
+            return 0.0, list()
+
+        return self.__scheduler.criticalPath(self.__report.durations)
+
+    def execute(self, method, nodes = None, prepare = None, clean = False, force = False):
+        '''
+        Calls the method on every dirty node that has it, after the nodes
+        it depends on.
+
+        :param method: Name of the method to call on each node (i.e. 'runRig')
+        :type method: str
+
+        :param nodes: Nodes to run. Defaults to every node on the graph.
+        :type nodes: list | generator
+
+        :param prepare: Function called with the node before the method is
+                        called, only for nodes that run.
+        :type prepare: function
+
+        :param clean: Mark the nodes clean once the method has run. Pass
+                      True for the last stage of a build.
+        :type clean: bool
+
+        :param force: Run the nodes even if they are clean
+        :type force: bool
+
+        :return: What ran and what was skipped
+        :rtype: BuildReport
+        '''
+        self.__scheduler = scheduler.Scheduler(self.__graph, nodes)
+        self.__report = self.__scheduler.execute(method,
+                                                 prepare = prepare,
+                                                 clean = clean,
+                                                 force = force)
+        #what the nodes depend on can change with what they built
+        self.__graph.invalidateDependents()
+        return self.__report
@@ -0,0 +1,577 @@
+'''
+Diff works out the changes that turn one graph into another, and patches
+a graph with them in place
+
+Nodes are matched by name first. Nodes left over on both sides are
+matched by a hash of their subtree (class, attributes and the hashes of
+the children, but not the names), which finds renamed nodes and subtrees.
+Everything is done with dictionaries and a single walk of each graph, so
+the time grows with the size of the graphs instead of comparing every
+node with every other node.
+
+The patch only refers to nodes by name, so a diff between two versions
+of a template can be applied to a rig that was made from the older
+version. Changes that don't fit the rig being patched are skipped and
+handed back. Only the nodes that change, and the nodes that depend on
+them, are marked dirty, so the next build only runs those.
+
+:example:
+    >>> patch = diff.diff(oldBiped, newBiped)
+    >>> print patch.log()
+    rename l_hand -> l_palm
+    add l_thumb under l_palm at 0
+    setAttribute l_arm.position = [20.0, 12.0, 0.0]
+    >>> patch.apply(character)
+    []
+    >>> character.builder.execute('runSetupRig')
+    < BuildReport runSetupRig: ran 3, skipped 9 >
+'''
+#import python modules
+import bisect
+import copy
+import functools
+import hashlib
+
+#import package modules
+from japeto.mlRig import ml_traversal
+
+#kinds of changes, in the order they are applied
+RENAME           = 'rename'
+ADD              = 'add'
+REPARENT         = 'reparent'
+REMOVE           = 'remove'
+MOVE             = 'move'
+SET_ATTRIBUTE    = 'setAttribute'
+REMOVE_ATTRIBUTE = 'removeAttribute'
+
+KINDS = (RENAME, ADD, REPARENT, REMOVE, MOVE, SET_ATTRIBUTE, REMOVE_ATTRIBUTE)
+
+#parent of a node whose parent is being removed
+_REMOVED = object()
+
+class Change(object):
+    '''
+    A single change to a graph. The node is always referred to by the
+    name it has before the change is applied, and any other data the
+    change needs is stored in data.
+    '''
+    __slots__ = ('kind', 'name', 'data')
+
+    def __init__(self, kind, name, **data):
+        '''
+        :param kind: One of the kinds in KINDS
+        :type kind: str
+
+        :param name: Name of the node the change is for
+        :type name: str
+        '''
+        if kind not in KINDS:
+            raise TypeError('%s must be one of the following kinds: %s' % (kind, KINDS))
+
+        self.kind = kind
+        self.name = name
+        self.data = data
+
+    def __repr__(self):
+        return '< %s %s %s >' % (self.__class__.__name__, self.kind, self.name)
+
+    def log(self):
+        '''
+        Returns the change as a line of text
+        '''
+        data = self.data
+        if self.kind == RENAME:
+            return '%s %s -> %s' % (self.kind, self.name, data['newName'])
+        elif self.kind in (ADD, REPARENT, MOVE):
+            return '%s %s under %s at %s' % (self.kind, self.name, data['parent'], data['index'])
+        elif self.kind == SET_ATTRIBUTE:
+            return '%s %s.%s = %r' % (self.kind, self.name, data['attribute'], data['value'])
+        elif self.kind == REMOVE_ATTRIBUTE:
+            return '%s %s.%s' % (self.kind, self.name, data['attribute'])
+
+        return '%s %s' % (self.kind, self.name)
+
+
+class Patch(object):
+    '''
+    Changes that turn one graph into another
+    '''
+    def __init__(self, changes = None):
+        '''
+        :param changes: Changes in the patch
+        :type changes: list
+        '''
+        super(Patch, self).__init__()
+
+        self.__changes = list()
+        for change in changes or list():
+            self.__changes.append(change)
+
+    def __repr__(self):
+        return '< %s: %s changes >' % (self.__class__.__name__, len(self.__changes))
+
+    def __len__(self):
+        return len(self.__changes)
+
+    def __iter__(self):
+        return iter(self.__changes)
+
+    def changes(self, kind = None):
+        '''
+        Returns the changes, only the ones of the given kind if one is given
+
+        :param kind: One of the kinds in KINDS
+        :type kind: str
+
+        :rtype: list
+        '''
+        if kind is None:
+            return list(self.__changes)
+
+        return [change for change in self.__changes if change.kind == kind]
+
+    def log(self):
+        '''
+        Returns the changes as a string, one change per line
+        '''
+        return '\n'.join([change.log() for change in self.__changes])
+
+    def apply(self, graph):
+        '''
+        Makes the changes to the graph in place and marks the nodes that
+        changed, and the nodes that depend on them, dirty.
+
+        :param graph: Graph to patch
+        :type graph: ml_graph.MlGraph
+
+        :return: Changes that couldn't be applied to the graph, because
+                 the nodes they need aren't there
+        :rtype: list
+        '''
+        skipped = list()
+        changed = set() #<-- nodes to mark dirty
+        placed  = list() #<-- (parent, index, node) for nodes to put in order
+
+        #find the nodes to remove before any names change, and move their
+        #names out of the way of nodes that are about to be added
+        removed = list()
+        addNames = set([change.name for change in self.changes(ADD)])
+        for change in self.changes(REMOVE):
+            node = graph.getNodeByName(change.name)
+            if node is None:
+                skipped.append(change)
+                continue
+            removed.append(node)
+            if change.name in addNames:
+                node.setName(_freeName(graph, change.name))
+
+        for change in self.changes(RENAME):
+            node = graph.getNodeByName(change.name)
+            if node is None or graph.hasNode(change.data['newName']):
+                skipped.append(change)
+                continue
+            node.setName(change.data['newName'])
+            changed.add(node)
+
+        #added in pre-order, so parents are added before their children
+        for change in self.changes(ADD):
+            data = change.data
+            parent = None
+            if data['parent'] is not None:
+                parent = graph.getNodeByName(data['parent'])
+            if (parent is None and data['parent'] is not None) or graph.hasNode(change.name):
+                skipped.append(change)
+                continue
+            node = data['nodeClass'](change.name)
+            node.niceName = data['niceName']
+            node.setColor(copy.copy(data['color']))
+            if not data['enabled']:
+                node.disable()
+            graph.addNode(node, parent)
+            graph._restoreNode(node, functools.partial(copy.deepcopy, data['attributes']))
+            placed.append((parent, data['index'], node))
+
+        for change in self.changes(REPARENT):
+            node = graph.getNodeByName(change.name)
+            parent = None
+            if change.data['parent'] is not None:
+                parent = graph.getNodeByName(change.data['parent'])
+                if parent is None:
+                    node = None
+            #a node can't go under itself or one of its own descendants
+            if node is not None and parent is not None and parent in set(ml_traversal.preOrder(node)):
+                node = None
+            if node is None:
+                skipped.append(change)
+                continue
+            _reparent(graph, node, parent)
+            changed.add(node)
+            placed.append((parent, change.data['index'], node))
+
+        #nodes that depend on the removed nodes need to run again
+        if removed:
+            removedSet = set()
+            for node in removed:
+                removedSet.update(ml_traversal.preOrder(node))
+            for node in graph.iterNodes():
+                if node not in removedSet:
+                    for dependency in graph.dependencies(node):
+                        if dependency in removedSet:
+                            changed.add(node)
+                            break
+            for node in removed:
+                graph.removeNode(node)
+
+        for change in self.changes(MOVE):
+            node = graph.getNodeByName(change.name)
+            if node is None:
+                skipped.append(change)
+                continue
+            parent = node.parent() or None
+            expected = change.data['parent']
+            if (parent and parent.name()) != expected:
+                skipped.append(change)
+                continue
+            changed.add(node)
+            placed.append((parent, change.data['index'], node))
+
+        _place(graph, placed)
+
+        for change in self.changes(SET_ATTRIBUTE):
+            node = graph.getNodeByName(change.name)
+            if node is None:
+                skipped.append(change)
+                continue
+            data = change.data
+            node._restoreAttribute(data['attribute'], data['attrType'],
+                                   copy.deepcopy(data['value']),
+                                   min(data['index'], node.attributeCount()))
+            changed.add(node)
+
+        for change in self.changes(REMOVE_ATTRIBUTE):
+            node = graph.getNodeByName(change.name)
+            attr = node and node.getAttributeByName(change.data['attribute'])
+            if not attr:
+                skipped.append(change)
+                continue
+            node.removeAttribute(attr)
+            changed.add(node)
+
+        _markDirty(graph, changed)
+
+        return skipped
+
+#---------------------------------------------
+#Diff
+#---------------------------------------------
+def diff(source, target):
+    '''
+    Returns the changes that turn the source graph into the target graph
+
+    :param source: Graph before the changes
+    :type source: ml_graph.MlGraph
+
+    :param target: Graph after the changes
+    :type target: ml_graph.MlGraph
+
+    :rtype: Patch
+    '''
+    sourceNodes = source.nodes()
+    targetNodes = target.nodes()
+    matches = match(source, target)
+    reverse = dict([(t, s) for s, t in matches.items()])
+    changes = list()
+
+    #position of every node among its siblings
+    sourceIndex = _siblingIndices(source)
+    targetIndex = _siblingIndices(target)
+
+    for s in sourceNodes:
+        t = matches.get(s)
+        if t is not None and t.name() != s.name():
+            changes.append(Change(RENAME, s.name(), newName = t.name()))
+
+    for t in targetNodes:
+        if t not in reverse:
+            parent = t.parent()
+            attributes = [(a.name(), a.attrType(), copy.deepcopy(a.value())) for a in t.attributes()]
+            changes.append(Change(ADD, t.name(),
+                                  nodeClass = t.__class__,
+                                  parent = parent and parent.name() or None,
+                                  index = targetIndex[t],
+                                  niceName = t.niceName,
+                                  color = copy.copy(t.color()),
+                                  enabled = t.active(),
+                                  attributes = attributes))
+
+    #matched nodes that end up under a different parent
+    reparented = set()
+    for t in targetNodes:
+        s = reverse.get(t)
+        if s is None:
+            continue
+        sourceParent = s.parent() or None
+        if sourceParent is not None:
+            sourceParent = matches.get(sourceParent, _REMOVED)
+        targetParent = t.parent() or None
+        if sourceParent is not targetParent:
+            reparented.add(t)
+            changes.append(Change(REPARENT, t.name(),
+                                  parent = targetParent and targetParent.name() or None,
+                                  index = targetIndex[t]))
+
+    for s in sourceNodes:
+        if s not in matches and (not s.parent() or s.parent() in matches):
+            changes.append(Change(REMOVE, s.name()))
+
+    #nodes that stay under the same parent but change order. The longest
+    #run of them already in order stays where it is, the rest move.
+    for parent in [None] + targetNodes:
+        if parent is None:
+            children = target.rootNodes()
+        else:
+            children = parent.children()
+        stay = [t for t in children if t in reverse and t not in reparented]
+        if len(stay) < 2:
+            continue
+        inOrder = _longestIncreasing([sourceIndex[reverse[t]] for t in stay])
+        for i, t in enumerate(stay):
+            if i not in inOrder:
+                changes.append(Change(MOVE, t.name(),
+                                      parent = parent and parent.name() or None,
+                                      index = targetIndex[t]))
+
+    for t in targetNodes:
+        s = reverse.get(t)
+        if s is None:
+            continue
+        sourceAttributes = dict([(a.name(), a) for a in s.attributes()])
+        for index, attr in enumerate(t.attributes()):
+            existing = sourceAttributes.pop(attr.name(), None)
+            if (existing is not None and existing.attrType() == attr.attrType() and
+                type(existing.value()) is type(attr.value()) and existing.value() == attr.value()):
+                continue
+            changes.append(Change(SET_ATTRIBUTE, t.name(),
+                                  attribute = attr.name(),
+                                  attrType = attr.attrType(),
+                                  value = copy.deepcopy(attr.value()),
+                                  index = index))
+        for attr in s.attributes():
+            if attr.name() in sourceAttributes:
+                changes.append(Change(REMOVE_ATTRIBUTE, t.name(), attribute = attr.name()))
+
+    #order the changes the way they are applied
+    order = dict([(kind, i) for i, kind in enumerate(KINDS)])
+    changes.sort(key = lambda change: order[change.kind])
+
+    return Patch(changes)
+
+def match(source, target):
+    '''
+    Matches the nodes in the source graph to the nodes in the target
+    graph. Nodes with the same name and class match. Then the nodes that
+    are left are matched by the hash of their subtree, along with the
+    nodes under them.
+
+    :param source: Graph before the changes
+    :type source: ml_graph.MlGraph
+
+    :param target: Graph after the changes
+    :type target: ml_graph.MlGraph
+
+    :return: source node : target node
+    :rtype: dict
+    '''
+    targetByName = dict([(node.name(), node) for node in target.iterNodes()])
+    matches = dict()
+    matched = set()
+    unmatched = list()
+    for s in source.iterNodes():
+        t = targetByName.pop(s.name(), None)
+        if t is not None and t.__class__ is s.__class__:
+            matches[s] = t
+            matched.add(t)
+        else:
+            unmatched.append(s)
+
+    if not unmatched:
+        return matches
+
+    leftOver = [t for t in target.iterNodes() if t not in matched]
+    if not leftOver:
+        return matches
+
+    sourceHashes = subtreeHashes(source)
+    targetHashes = subtreeHashes(target)
+    candidates = dict() #<-- hash : left over target nodes, last one first
+    for t in reversed(leftOver):
+        candidates.setdefault(targetHashes[t], list()).append(t)
+
+    for s in unmatched:
+        if s in matches:
+            continue
+        nodes = candidates.get(sourceHashes[s])
+        while nodes and nodes[-1] in matched:
+            nodes.pop()
+        if not nodes:
+            continue
+        #same hash means the same shape, so walk both subtrees together
+        for a, b in zip(ml_traversal.preOrder(s), ml_traversal.preOrder(nodes.pop())):
+            if a not in matches and b not in matched:
+                matches[a] = b
+                matched.add(b)
+
+    return matches
+
+def subtreeHashes(graph):
+    '''
+    Returns a hash for every node on the graph made from its class, its
+    attributes and the hashes of its children. Names are left out, so
+    renamed subtrees keep their hash.
+
+    :param graph: Graph to hash
+    :type graph: ml_graph.MlGraph
+
+    :return: node : hash
+    :rtype: dict
+    '''
+    hashes = dict()
+    for node in ml_traversal.postOrder(graph.rootNodes()):
+        nodeClass = node.__class__
+        digest = hashlib.sha1('%s.%s' % (nodeClass.__module__, nodeClass.__name__))
+        for attr in node.attributes():
+            digest.update(repr((attr.name(), attr.attrType(), attr.value())))
+        digest.update('|')
+        for child in node.children():
+            digest.update(hashes[child])
+        hashes[node] = digest.digest()
+
+    return hashes
+
+#---------------------------------------------
+#Helpers
+#---------------------------------------------
+def _siblingIndices(graph):
+    '''
+    Returns the position of every node among its siblings
+    '''
+    indices = dict()
+    for index, node in enumerate(graph.rootNodes()):
+        indices[node] = index
+    for node in graph.iterNodes():
+        for index, child in enumerate(node.children()):
+            indices[child] = index
+
+    return indices
+
+def _longestIncreasing(values):
+    '''
+    Returns the positions of the longest run of increasing values, which
+    don't have to be next to each other.
+
+    :rtype: set
+    '''
+    tails = list()   #<-- smallest last value of a run of each length
+    tailIndex = list()
+    previous = [None] * len(values)
+    for i, value in enumerate(values):
+        length = bisect.bisect_left(tails, value)
+        if length == len(tails):
+            tails.append(value)
+            tailIndex.append(i)
+        else:
+            tails[length] = value
+            tailIndex[length] = i
+        if length:
+            previous[i] = tailIndex[length - 1]
+
+    positions = set()
+    i = tailIndex[-1] if tailIndex else None
+    while i is not None:
+        positions.add(i)
+        i = previous[i]
+
+    return positions
+
+def _freeName(graph, name):
+    '''
+    Returns a name based on the given name that isn't on the graph
+    '''
+    count = 1
+    while graph.hasNode('%s_removed%s' % (name, count)):
+        count += 1
+
+    return '%s_removed%s' % (name, count)
+
+def _reparent(graph, node, parent):
+    '''
+    Moves the node under the parent, or to the root of the graph when the
+    parent is None. The node is added at the end.
+    '''
+    if parent is None:
+        if node.parent():
+            node.parent().removeChild(node)
+            graph.addNode(node)
+        return
+
+    graph.addNode(node, parent)
+
+def _move(graph, parent, node, index):
+    '''
+    Moves the node to the index under its parent, or among the root nodes
+    when the parent is None. An index of None moves it to the end.
+    '''
+    if parent is not None:
+        parent.moveChild(node, index)
+        return
+
+    roots = graph.rootNodes()
+    roots.remove(node)
+    if index is None:
+        index = len(roots)
+    roots.insert(index, node)
+
+def _place(graph, placed):
+    '''
+    Puts the nodes at their index under their parent. The nodes are moved
+    to the end first, then moved into place from the lowest index up, so
+    every node ends up at its index.
+
+    :param placed: (parent, index, node) for each node to place
+    :type placed: list
+    '''
+    groups = dict()
+    for parent, index, node in placed:
+        if node.graph() is not graph or (node.parent() or None) is not parent:
+            continue
+        if parent is None and node not in graph.rootNodes():
+            continue
+        groups.setdefault(parent, list()).append((index, node))
+
+    for parent, items in groups.items():
+        items.sort(key = lambda item: item[0])
+        for index, node in items:
+            _move(graph, parent, node, None)
+        for index, node in items:
+            _move(graph, parent, node, index)
+
+def _markDirty(graph, nodes):
+    '''
+    Marks the nodes and every node that depends on them dirty, working out
+    the dependents once for all the nodes.
+    '''
+    downstream = dict()
+    for node in graph.iterNodes():
+        for dependency in graph.dependencies(node):
+            downstream.setdefault(dependency, list()).append(node)
+
+    stack = [node for node in nodes if node.graph() is graph]
+    visited = set(stack)
+    while stack:
+        for dependent in downstream.get(stack.pop(), list()):
+            if dependent not in visited:
+                visited.add(dependent)
+                stack.append(dependent)
+
+    for node in visited:
+        node.setDirty(True, propagate = False)
@@ -7,7 +7,13 @@ class MlAttribute(object):
     Base Attribute to manage all data for nodes
     
     '''
-    __attrTypes__ = (bool, basestring, str, int, float, list, tuple)
+    __attrTypes__ = (bool, basestring, str, int, long, float, list, tuple)
+    
+    #attributes are stored in slots instead of a __dict__ to keep large
+    #graphs small
+    __slots__ = ('__name', '__shortName', '__value', '__storable',
+                 '__connectable', '__node', '__type')
+    
     @classmethod
     def isValid(cls, attr):
         if not isinstance(attr, cls):
@@ -19,6 +25,15 @@ class MlAttribute(object):
     def inValidError(cls, attr):
         raise TypeError("%s is not of type japeto.mlRig.attribute.Attribute" % attr)
     
+    @classmethod
+    def attrTypeNames(cls):
+        '''
+        Returns the names of all the types an attribute can be
+        '''
+        names = [t.__name__ for t in cls.__valueSetters__]
+        names.extend(cls.__typeSetters__.keys())
+        return sorted(names)
+    
     def __init__(self, longName = None, shortName = None, value = None, attrType = None, *args, **kwargs):
         super(MlAttribute, self).__init__()
         self.__name        = longName
@@ -26,6 +41,7 @@ class MlAttribute(object):
         self.__value       = value
         self.__storable    = True
         self.__connectable = True
+        self.__node        = None
         if not attrType:
             self.__type = type(self.__value).__name__
         else:
@@ -49,20 +65,46 @@ class MlAttribute(object):
     def shortName(self):
         return self.__shortName
     
+    def node(self):
+        '''
+        Node the attribute has been added to, None if it hasn't been added
+        '''
+        return self.__node
+    
+    def _setNode(self, node):
+        '''
+        Stores the node the attribute has been added to.
+        
+        .. warning: This should only be called by japeto.mlRig.ml_node.MlNode
+        '''
+        self.__node = node
+    
     def setValue(self, value):
-        if not type(value).__name__ not in self.__attrTypes__:
-            raise TypeError('%s needs to be one of the following types: %s' % (value, self.__attrTypes__))
+        '''
+        Validates and sets the value. Attributes with one of the types in
+        __typeSetters__ (i.e. "vector" or "code") only take values that
+        fit that type. Any other attribute takes any of the python types
+        in __valueSetters__.
         
-        #build the command
-        if isinstance(value, basestring):
-            cmd = "self._set%s('%s')" % (type(value).__name__.title(), value)
-        else:
-            cmd = 'self._set%s(%s)' % (type(value).__name__.title(), value)
-            
-        #execute the command
-        value = eval(cmd)
+        :param value: Value for the attribute
+        '''
+        #look up the setter for the attribute type, then the value type
+        setter = MlAttribute.__typeSetters__.get(self.__type)
+        if setter is None:
+            setter = MlAttribute.__valueSetters__.get(type(value))
+            if setter is None:
+                raise TypeError('%s needs to be one of the following types: %s' % (value, self.__attrTypes__))
         
+        value = setter(self, value)
+        
+        #editing the value means the node needs to run again
+        changed = value != self.__value
         self.__value = value #set the value
+        if changed and self.__node is not None:
+            graph = self.__node.graph()
+            if graph is not None:
+                graph._attributeChanged(self.__node, self)
+            self.__node.setDirty(True)
         
     def value(self):
         return self.__value
@@ -74,8 +116,8 @@ class MlAttribute(object):
         del self
     
     def create(self, longName, shortName, attrType, value):
-        if not attrType in MlAttribute.__attrTypes__:
-            raise TypeError('%s must be one of the following types: %s' % (attrType, str(*MlAttribute.__attrTypes__)))
+        if attrType not in MlAttribute.attrTypeNames():
+            raise TypeError('%s must be one of the following types: %s' % (attrType, MlAttribute.attrTypeNames()))
         
         self.__name      = longName
         self.__shortName = shortName
@@ -112,7 +154,8 @@ class MlAttribute(object):
         return float(value)
     
     def _setInt(self, value):
-        if not isinstance(value, int):
+        #large ints come back from maya as longs
+        if not isinstance(value, (int, long)):
             raise TypeError("%s must be <type 'int'>" % value)
         
         return int(value)
@@ -128,5 +171,60 @@ class MlAttribute(object):
             raise TypeError("%s must be <type 'tuple'>" % value)
 
         return tuple(value)
+    
+    def _setVector(self, value):
+        if not isinstance(value, (list, tuple)) or len(value) != 3:
+            raise TypeError("%s must be a <type 'list'> of 3 numbers" % value)
+        
+        return [self._toFloat(v) for v in value]
+    
+    def _setMatrix(self, value):
+        if not isinstance(value, (list, tuple)):
+            raise TypeError("%s must be a <type 'list'> of 16 numbers or 4 rows of 4" % value)
+        
+        #flatten 4 rows of 4
+        if len(value) == 4 and isinstance(value[0], (list, tuple)):
+            rows = value
+            value = list()
+            for row in rows:
+                if not isinstance(row, (list, tuple)) or len(row) != 4:
+                    raise TypeError("%s must be a <type 'list'> of 16 numbers or 4 rows of 4" % rows)
+                value.extend(row)
+                
+        if len(value) != 16:
+            raise TypeError("%s must be a <type 'list'> of 16 numbers or 4 rows of 4" % value)
+        
+        return [self._toFloat(v) for v in value]
+    
+    def _setPath(self, value):
+        if not isinstance(value, basestring):
+            raise TypeError("%s must be <type 'str'>" % value)
+        
+        return str(value).replace('\\', '/')
+    
+    def _toFloat(self, value):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise TypeError("%s must be <type 'float'>" % value)
+        
+        return float(value)
+
+#---------------------------------------------
+#Setter dispatch tables
+#---------------------------------------------
+#setters for the type of the value, used when the attribute's type isn't
+#in __typeSetters__
+MlAttribute.__valueSetters__ = {bool    : MlAttribute._setBool,
+                                str     : MlAttribute._setStr,
+                                unicode : MlAttribute._setStr,
+                                int     : MlAttribute._setInt,
+                                long    : MlAttribute._setInt,
+                                float   : MlAttribute._setFloat,
+                                list    : MlAttribute._setList,
+                                tuple   : MlAttribute._setTuple}
 
-        
\ No newline at end of file
+#setters for attribute types that restrict the values they take
+MlAttribute.__typeSetters__ = {'vector' : MlAttribute._setVector,
+                               'matrix' : MlAttribute._setMatrix,
+                               'code'   : MlAttribute._setStr,
+                               'file'   : MlAttribute._setPath,
+                               'dir'    : MlAttribute._setPath}
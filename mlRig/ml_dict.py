@@ -1,6 +1,8 @@
-from japeto.libs import ordereddict
+from japeto.libs import indexeddict
 
-class MlDict(ordereddict.OrderedDict):
+class MlDict(indexeddict.IndexedOrderedDict):
+    __slots__ = ()
+    
     def __init__(self, *args, **kwargs):
         super(MlDict,self).__init__(*args, **kwargs)
         
@@ -62,37 +64,7 @@ class MlDict(ordereddict.OrderedDict):
                       your pair to be ordered.
         @type index: *int*  
         '''
-        #check if there are keys
-        if self.keys():
-            #get keys and values
-            keys = self.keys()
-            values = self.values()
-            #if no key in self append key and value to end of lists
-            if not self.has_key(key):
-                #check length of keys against index
-                if index > len(self.keys()):
-                    keys.append(key)
-                    values.append(value)
-                #end if
-            #end if
-                else: 
-                    keys.insert(index,key)
-                    values.insert(index,value)
-            #end if
-            elif self.has_key(key):
-                self.move(key, index)
-                if value != self[key]:
-                    self[key] = value
-                return
-            #clear self and rebuild in new order
-            self.clear()
-            for k,v in zip(keys, values):
-                self[k] = v
-            #end loops
-        #end if
-        else:
-            self[key] = value
-        #end else
+        self.insert(index, key, value)
         
     def move(self, key, index):
         '''
@@ -105,22 +77,4 @@ class MlDict(ordereddict.OrderedDict):
                       key placed
         @type index: *int* 
         '''
-        if not self.has_key(key):
-            raise KeyError('%s is not a valid key in %s' % (key, self))
-        
-        if self.keys():
-            #get keys and values
-            keys = self.keys()
-            values = self.values()
-        
-        #get key and value from index
-        originalIndex = keys.index(key)
-        #pop key and value out of lists
-        key = keys.pop(originalIndex)
-        value = values.pop(originalIndex)
-        #insert key and value into list
-        keys.insert(index, key)
-        values.insert(index, value)
-        self.clear() #clear dict
-        for k,v in zip(keys, values):
-            self[k] = v
\ No newline at end of file
+        super(MlDict, self).move(key, index)
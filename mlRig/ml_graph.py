@@ -1,5 +1,6 @@
 #from japeto.mlRig import ml_dict
 from japeto.mlRig import ml_node
+from japeto.mlRig import ml_traversal
 
 class MlGraph(object):
     def __init__(self, name):
@@ -14,6 +15,10 @@ class MlGraph(object):
         self.__name       = name
         self.__rootNodes  = list()
         self.__nodes      = list()
+        self.__nodeIndex  = dict() #<-- name : node lookup for every node in the graph
+        self.__loader     = None   #<-- snapshot loader for nodes that aren't loaded yet
+        self.__downstream = None   #<-- node : nodes that depend on it, built by dependents()
+        self.__cleanCount = 0      #<-- number of clean nodes, there is nothing to dirty without them
         self.__rootNode__ = ml_node.MlNode('root')
     
     def name(self):
@@ -34,6 +39,11 @@ class MlGraph(object):
         if not ml_node.MlNode.isValid(node):
             ml_node.MlNode.inValidError(node)    
         
+        #root nodes are not parented to anything on the graph, so
+        #they need to be registered here
+        if not parent:
+            self._registerNode(node)
+        
         if parent and index != None:
             parent.moveChild(node, index)
         elif not parent and index != None:
@@ -47,26 +57,30 @@ class MlGraph(object):
     
     def removeNode(self, node):
         if node in self.__rootNodes:
-            self.__rootNodes.pop(node.index())
+            self.__rootNodes.remove(node)
         
         if node.parent():
             node.parent().removeChild(node)
         
-    def nodeCount(self):
-        count = len(self.__rootNodes)
+        self._unregisterNode(node)
         
-        for node in self.__rootNodes:
-            count += node.descendantCount()
+    def nodeCount(self):
+        count = 0
+        for node in self.iterNodes():
+            count += 1
             
         return count
     
     def nodes(self):
-        nodes = list()
-        for node in self.__rootNodes:
-            nodes.append(node)
-            nodes.extend(node.descendants())
-            
-        return nodes
+        return list(self.iterNodes())
+    
+    def iterNodes(self):
+        '''
+        Lazily walks all the nodes on the graph in pre-order
+        
+        :see: japeto.mlRig.ml_traversal.preOrder
+        '''
+        return ml_traversal.preOrder(self.__rootNodes)
     
     def log(self, tabLevel = -1):
         '''
@@ -92,25 +106,263 @@ class MlGraph(object):
         return output
 
     def nodeNames(self):
-        nodeNames = list()
-        for node in self.__rootNodes:
-            nodeNames.append(node.name())
-            for child in node.descendants():
-                nodeNames.append(child.name())
-            
-        return nodeNames
+        return [node.name() for node in self.iterNodes()]
+    
+    def dependencies(self, node):
+        '''
+        Returns the nodes on the graph the given node needs to run after.
+        On the base graph that is the node's parent.
+        
+        :param node: Node to get the dependencies of
+        :type node: ml_node.MlNode
+        
+        :rtype: list
+        '''
+        parent = node.parent()
+        if parent and parent.graph() is self:
+            return [parent]
+        
+        return list()
+    
+    def dependents(self, node):
+        '''
+        Returns the nodes that need to run again when the given node
+        changes. That is every node that depends on it, directly or
+        through other nodes.
+        
+        :see: MlGraph.dependencies
+        
+        :param node: Node that changed
+        :type node: ml_node.MlNode
+        
+        :rtype: list
+        '''
+        #reverse the dependencies once, until something they depend on changes
+        downstream = self.__downstream
+        if downstream is None:
+            downstream = dict()
+            for n in self.iterNodes():
+                for dependency in self.dependencies(n):
+                    downstream.setdefault(dependency, list()).append(n)
+            self.__downstream = downstream
+        
+        dependents = list()
+        visited = set([node])
+        stack = [node]
+        while stack:
+            for dependent in downstream.get(stack.pop(), list()):
+                if dependent in visited:
+                    continue
+                visited.add(dependent)
+                dependents.append(dependent)
+                stack.append(dependent)
+        
+        return dependents
+    
+    def invalidateDependents(self):
+        '''
+        Drops the map dependents() keeps of which nodes depend on which.
+        Nodes being added, removed, renamed or reparented drop it, graphs
+        whose dependencies() look at anything else have to drop it when
+        that changes.
+        '''
+        self.__downstream = None
+    
+    def hasCleanNodes(self):
+        '''
+        Returns whether or not any node on the graph is clean. While none
+        are, making a node dirty does not need to look for its dependents.
+        '''
+        return self.__cleanCount > 0
+    
+    def _nodeDirtyChanged(self, node, value):
+        '''
+        Called by the nodes on the graph when they become dirty or clean
+        
+        .. warning: This should only be called by japeto.mlRig.ml_node.MlNode
+        '''
+        self.__cleanCount += -1 if value else 1
+    
+    def _attributeChanged(self, node, attribute):
+        '''
+        Called when the value of an attribute on one of the nodes on the
+        graph changes, before the node is made dirty. 
+        
+        :param node: Node the attribute is on
+        :type node: ml_node.MlNode
+        
+        :param attribute: Attribute that changed
+        :type attribute: ml_attribute.MlAttribute
+        '''
+        pass
+    
+    def setDirty(self, value):
+        '''
+        Sets the dirty state on every node on the graph
+        
+        :param value: True if the nodes need to run again
+        :type value: bool
+        '''
+        for node in self.iterNodes():
+            node.setDirty(value, propagate = False)
     
     def getNodeByName(self, name):
-        for node in self.nodes():
-            if name == node.name():
-                return node
-        return None
+        '''
+        Returns the node with the given name, None if there isn't one.
+        
+        :param name: Name of the node
+        :type name: str
+        
+        :return: Node with the given name
+        :rtype: ml_node.MlNode | None
+        '''
+        node = self.__nodeIndex.get(name)
+        if node is None and self.__loader is not None:
+            node = self.__loader.loadNode(name)
+        return node
+    
+    def hasNode(self, name):
+        '''
+        Returns True if there is a node with the given name on the graph.
+        
+        :param name: Name of the node
+        :type name: str
+        
+        :rtype: bool
+        '''
+        if name in self.__nodeIndex:
+            return True
+        
+        return self.__loader is not None and name in self.__loader
+    
+    #---------------------------------------------
+    #Name index
+    #---------------------------------------------
+    def _subtree(self, node):
+        return ml_traversal.preOrder(node)
+    
+    def _validateNames(self, node):
+        '''
+        Raises a RuntimeError if any node under and including the given
+        node would clash with the name of a different node on the graph.
+        
+        :param node: Node that is about to be added to the graph
+        :type node: ml_node.MlNode
+        '''
+        names = dict()
+        for n in self._subtree(node):
+            name = n.name()
+            existing = self.__nodeIndex.get(name, names.get(name))
+            if existing is not None and existing is not n:
+                raise RuntimeError('%s already exists on graph %s' % (name, self.__name))
+            if existing is None and self.__loader is not None and name in self.__loader:
+                raise RuntimeError('%s already exists on graph %s' % (name, self.__name))
+            names[name] = n
+    
+    def _registerNode(self, node):
+        '''
+        Adds the given node and all of its descendants to the name index.
+        
+        :param node: Node to register
+        :type node: ml_node.MlNode
+        '''
+        self._validateNames(node)
+        self.invalidateDependents()
+        for n in self._subtree(node):
+            graph = n.graph()
+            if graph is not None and graph is not self:
+                graph._unregisterNode(n, recursive = False)
+            if n.graph() is not self and not n.dirty():
+                self.__cleanCount += 1
+            self.__nodeIndex[n.name()] = n
+            n._setGraph(self)
+    
+    def _unregisterNode(self, node, recursive = True):
+        '''
+        Removes the given node, and by default all of its descendants,
+        from the name index.
+        
+        :param node: Node to unregister
+        :type node: ml_node.MlNode
+        
+        :param recursive: Whether or not to unregister the descendants
+        :type recursive: bool
+        '''
+        nodes = [node]
+        if recursive:
+            nodes = self._subtree(node)
+        self.invalidateDependents()
+        for n in nodes:
+            if self.__nodeIndex.get(n.name()) is n:
+                del self.__nodeIndex[n.name()]
+            if n.graph() is self:
+                if not n.dirty():
+                    self.__cleanCount -= 1
+                n._setGraph(None)
+    
+    def _renameNode(self, node, name):
+        '''
+        Moves the node to a new name in the index. Raises a RuntimeError
+        if another node on the graph already has the name.
+        
+        :param node: Node being renamed
+        :type node: ml_node.MlNode
+        
+        :param name: New name for the node
+        :type name: str
+        '''
+        existing = self.__nodeIndex.get(name)
+        if existing is None and self.__loader is not None and name in self.__loader:
+            existing = self.__loader.loadNode(name)
+        if existing is not None and existing is not node:
+            raise RuntimeError('%s already exists on graph %s' % (name, self.__name))
+        self.invalidateDependents()
+        if self.__nodeIndex.get(node.name()) is node:
+            del self.__nodeIndex[node.name()]
+        self.__nodeIndex[name] = node
+    
+    #---------------------------------------------
+    #Snapshots
+    #---------------------------------------------
+    def _setLoader(self, loader):
+        '''
+        Stores the loader for the nodes of a snapshot that haven't been
+        loaded yet, so they can still be found by name.
+        
+        .. warning: This should only be called by japeto.mlRig.snapshot
+        '''
+        self.__loader = loader
+    
+    def _restoreNode(self, node, attributes):
+        '''
+        Called for every node loaded from a snapshot once it is on the
+        graph. The attributes are added the first time they are asked for.
+        
+        :param node: Node that was loaded
+        :type node: ml_node.MlNode
+        
+        :param attributes: Returns a list of (name, attrType, value) for
+                           the node
+        :type attributes: function
+        '''
+        node._setAttributeLoader(attributes)
     
-    '''
     def save(self, filepath):
-        print 'Saving %s' % filepath
+        '''
+        Saves the graph to a snapshot file
         
-        for node in self.nodes():
-            node
-    ''' 
+        :see: japeto.mlRig.snapshot.save
+        '''
+        from japeto.mlRig import snapshot
+        snapshot.save(self, filepath)
+    
+    def load(self, filepath, lazy = True):
+        '''
+        Loads the nodes from a snapshot file onto the graph
+        
+        :see: japeto.mlRig.snapshot.load
+        '''
+        from japeto.mlRig import snapshot
+        return snapshot.load(filepath, self, lazy)
+
         
\ No newline at end of file
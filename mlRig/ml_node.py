@@ -3,6 +3,8 @@ Node will track and manage all data with-in a node
 '''
 from japeto.mlRig import ml_dict
 from japeto.mlRig import ml_attribute
+from japeto.mlRig import ml_traversal
+from japeto.mlRig import profiler
 
 class MlNode(object):
     '''
@@ -18,6 +20,13 @@ class MlNode(object):
         childNode.name and Node.parent return instance of parentNode)
     
     '''
+    #nodes are stored in slots instead of a __dict__ to keep large graphs
+    #small. Subclasses that don't declare __slots__ get a __dict__ back.
+    __slots__ = ('__name', '__parent', '__children', '__attributes',
+                 '__enabled', '__dirty', '__running', '__color', '__graph',
+                 '__function', '__childLoader', '__attributeLoader',
+                 'niceName')
+    
     @classmethod
     def isValid(cls, node):
         #if not isinstance(node, cls):
@@ -33,12 +42,16 @@ class MlNode(object):
         #declare class variable
         self.__name = name
         self.__parent = parent
-        self.__children = ml_dict.MlDict()
-        self.__attributes = ml_dict.MlDict()
+        self.__children = None #<-- MlDict created when the first child is added
+        self.__attributes = None #<-- MlDict created when the first attribute is added
         self.__enabled = True
         self.__dirty = True
         self.__running = False
         self.__color = (255,255,255)
+        self.__graph = None
+        self.__function = None
+        self.__childLoader = None #<-- set by japeto.mlRig.snapshot for lazy loading
+        self.__attributeLoader = None
         self.niceName = str()
         
         
@@ -56,7 +69,102 @@ class MlNode(object):
     def parent(self):
         return self.__parent
     
+    def graph(self):
+        '''
+        Returns the graph this node is registered with, None if the node
+        does not belong to a graph.
+        '''
+        return self.__graph
+    
+    def _setGraph(self, graph):
+        '''
+        Stores the graph this node is registered with.
+        
+        .. warning: This should only be called by japeto.mlRig.ml_graph.MlGraph
+                    while it keeps its name index up to date.
+        '''
+        self.__graph = graph
+    
+    def _setChildLoader(self, loader):
+        '''
+        Stores a function that adds the node's children the first time
+        they are asked for, so large graphs can be loaded a piece at a time.
+        
+        .. warning: This should only be called by japeto.mlRig.snapshot
+        
+        :param loader: Called with the node, adds the children to it
+        :type loader: function
+        '''
+        self.__childLoader = loader
+    
+    def _setAttributeLoader(self, loader):
+        '''
+        Stores a function that returns the node's attributes, which are
+        added the first time they are asked for.
+        
+        .. warning: This should only be called by japeto.mlRig.ml_graph.MlGraph
+                    while loading a snapshot.
+        
+        :param loader: Returns a list of (name, attrType, value)
+        :type loader: function
+        '''
+        self.__attributeLoader = loader
+    
+    def __loadChildren(self):
+        loader = self.__childLoader
+        if loader is not None:
+            self.__childLoader = None
+            loader(self)
+    
+    def __loadAttributes(self):
+        loader = self.__attributeLoader
+        if loader is not None:
+            self.__attributeLoader = None
+            self._restoreAttributes(loader())
+    
+    def _restoreAttributes(self, attributes):
+        '''
+        Adds the attributes to the node in the given order, replacing any
+        attributes with the same name.
+        
+        :see: MlNode._restoreAttribute
+        
+        :param attributes: (name, attrType, value) for each attribute
+        :type attributes: list
+        '''
+        for index, (name, attrType, value) in enumerate(attributes):
+            self._restoreAttribute(name, attrType, value, index)
+    
+    def _restoreAttribute(self, name, attrType, value, index = -1):
+        '''
+        Adds a new attribute at the index, replacing any attribute with
+        the same name. Arguments kept in the node's __dict__ (i.e. on
+        components) get the new value as well.
+        
+        :param name: Name of the attribute
+        :type name: str
+        
+        :param attrType: Type of the attribute
+        :type attrType: str
+        
+        :param value: Value of the attribute
+        
+        :param index: Position of the attribute, -1 adds it at the end
+        :type index: int
+        '''
+        existing = self.getAttributeByName(name)
+        if existing:
+            self.removeAttribute(existing)
+        self.addAttribute(ml_attribute.MlAttribute(name, value = value, attrType = attrType), None, index)
+        
+        arguments = getattr(self, '__dict__', dict())
+        if name in arguments:
+            arguments[name] = value
+    
     def children(self):
+        self.__loadChildren()
+        if self.__children is None:
+            return list()
         return self.__children.values()
     
     def enable(self):
@@ -72,11 +180,24 @@ class MlNode(object):
         return self.__color
     
     def attributes(self):
+        self.__loadAttributes()
+        if self.__attributes is None:
+            return list()
         return self.__attributes.values()
     
     def attributeAtIndex(self, index = None):
-        if index != None and not index > len(self.__attributes.keys()):
-            return self.__attributes.values()[index]
+        self.__loadAttributes()
+        if index != None and index < self.attributeCount():
+            return self.__attributes.itemAtIndex(index)[1]
+    
+    def attributeCount(self):
+        '''
+        Returns the number of attributes
+        '''
+        self.__loadAttributes()
+        if self.__attributes is None:
+            return 0
+        return len(self.__attributes)
 
     def running(self):
         return self.__running
@@ -85,16 +206,39 @@ class MlNode(object):
         if not isinstance(value,bool):
             raise TypeError("{0} must be a {1}".format(value,type(bool)))
         
-        self.__running = True
+        self.__running = value
 
     def setName(self, value):
+        #keep the name index on the graph in sync
+        if self.__graph is not None:
+            self.__graph._renameNode(self, value)
+        
         self.__name  = value
     
-    def setDirty(self,value):
+    def setDirty(self, value, propagate = True):
+        '''
+        Sets whether or not the node needs to run again. Making a node
+        dirty also makes every node that depends on it dirty.
+        
+        :see: japeto.mlRig.ml_graph.MlGraph.dependents
+        
+        :param value: True if the node needs to run again
+        :type value: bool
+        
+        :param propagate: Whether or not to dirty the dependent nodes
+        :type propagate: bool
+        '''
         if not isinstance(value,bool):
             raise TypeError("{0} must be a {1}".format(value,type(bool)))
         
-        self.__dirty = True
+        if value != self.__dirty and self.__graph is not None:
+            self.__graph._nodeDirtyChanged(self, value)
+        self.__dirty = value
+        
+        #while every node is dirty there are no dependents left to dirty
+        if value and propagate and self.__graph is not None and self.__graph.hasCleanNodes():
+            for node in self.__graph.dependents(self):
+                node.setDirty(True, propagate = False)
         
     def setColor(self,value):
         if not isinstance(value,list) and not isinstance(value,tuple):
@@ -126,12 +270,17 @@ class MlNode(object):
         if not isinstance(attr, ml_attribute.MlAttribute):
             raise TypeError('%s must be %s' % (attr, ml_attribute.MlAttribute))
         
+        self.__loadAttributes()
+        
         #change index if it's none
         if index == -1:
-            index = len(self.__children.keys())
+            index = self.attributeCount()
         
         #add attributes to the attributes dictionary
+        if self.__attributes is None:
+            self.__attributes = ml_dict.MlDict()
         self.__attributes.add(attr.name(), attr, index)
+        attr._setNode(self)
         
     def setParent(self, parent):
         '''
@@ -150,6 +299,18 @@ class MlNode(object):
         #validate
         if not MlNode.isValid(parent) and parent != None:
             MlNode.inValidError(parent)
+        #make sure the names are free on the graph we're moving into
+        #before anything changes
+        graph = None
+        if parent and self.__parent != parent:
+            graph = parent.graph()
+            if graph is not None and graph is not self.__graph:
+                graph._validateNames(self)
+        #the graphs the node leaves and joins depend on it differently
+        if self.__parent != parent:
+            for g in (self.__graph, graph):
+                if g is not None:
+                    g.invalidateDependents()
         #check if parent
         if self.__parent and self.__parent != parent:
             self.__parent.removeChild(self) #remove child from parent
@@ -158,6 +319,10 @@ class MlNode(object):
         #add self to parent
         self.__parent = parent
         if parent == None:
+            #a node that is no longer parented is no longer in the graph,
+            #unless it is one of the graph's root nodes
+            if self.__graph is not None and self not in self.__graph.rootNodes():
+                self.__graph._unregisterNode(self)
             return
         parent.addChild(self)
         
@@ -182,14 +347,27 @@ class MlNode(object):
         
         #check the index, make sure it's never 0
         
+        self.__loadChildren()
+        
+        #make sure the names are free on the graph before anything changes
+        graph = self.__graph
+        if graph is not None and child.graph() is not graph:
+            graph._validateNames(child)
+        
         #add self as parent of child node
         child.setParent(self)
         
+        #add the child to the graph's name index
+        if graph is not None and child.graph() is not graph:
+            graph._registerNode(child)
+        
         #change index if it's none
         if index == -1:
-            index = len(self.__children.keys())
+            index = self.childCount()
 
         #add child
+        if self.__children is None:
+            self.__children = ml_dict.MlDict()
         self.__children.add(child.name, child, index)
         
     def addChildren(self, children, index = None):
@@ -235,13 +413,17 @@ class MlNode(object):
         Returns the value of the node. Normally this will be a 
         class or function.
         '''
+        self.__loadAttributes()
+        if self.__attributes is None:
+            self.__attributes = ml_dict.MlDict()
         return self.__attributes 
     
     def getAttributeByName(self, name):
         '''
         Get the attribute with the given name
         ''' 
-        if name in self.__attributes.keys():
+        self.__loadAttributes()
+        if self.__attributes and name in self.__attributes:
             return self.__attributes[name]
         
         return None
@@ -256,7 +438,8 @@ class MlNode(object):
         :return: Child node
         :rtype: node.Node  
         '''
-        if self.__children.has_key(name):
+        self.__loadChildren()
+        if self.__children and self.__children.has_key(name):
             return self.__children[name]
         
         return None
@@ -271,17 +454,36 @@ class MlNode(object):
         :return: Child node
         :rtype: node.Node  
         '''
+        self.__loadChildren()
         if index != None:
-            if self.children():
-                return self.children()[index]
+            if self.__children:
+                return self.__children.itemAtIndex(index)[1]
         
         return None
     
+    def childIndex(self, child):
+        '''
+        Returns the position of the child in the list of children
+        
+        :param child: Child node to find
+        :type child: node.Node
+        
+        :rtype: int
+        '''
+        self.__loadChildren()
+        if not self.__children:
+            raise KeyError('%s is not a child of %s' % (child.name(), self.__name))
+        return self.__children.index(child.name)
+    
     def removeAttribute(self, attribute):
         if not ml_attribute.MlAttribute.isValid(attribute):
             ml_attribute.MlAttribute.inValidError(attribute)
+        self.__loadAttributes()
         #remove it from the attributes dictionary
+        if not self.__attributes or attribute.name() not in self.__attributes:
+            raise KeyError('%s is not an attribute on %s' % (attribute.name(), self.__name))
         self.__attributes.pop(attribute.name())
+        attribute._setNode(None)
         #delete the attribute
         del(attribute)
     
@@ -304,8 +506,9 @@ class MlNode(object):
         #check if child is valid
         if not MlNode.isValid(child):
             MlNode.inValidError(child)
+        self.__loadChildren()
         #check key on  __children dict, if it exists, pop it out of dict
-        if self.__children.has_key(child.name):
+        if self.__children and self.__children.has_key(child.name):
             self.__children.pop(child.name) #remove it from __children dict
             child.setParent(None) #remove self from parent
             
@@ -329,13 +532,17 @@ class MlNode(object):
         if not MlNode.isValid(child):
             MlNode.inValidError(child)
         #reorder the __children dict
+        self.__loadChildren()
+        if not self.__children:
+            raise KeyError('%s is not a child of %s' % (child.name(), self.__name))
         self.__children.move(child.name, index)
 
     def isChild(self, node):
         if not MlNode.isValid(node):
             MlNode.inValidError(node)
         
-        if self.__children.has_key(node.name):
+        self.__loadChildren()
+        if self.__children and self.__children.has_key(node.name):
             return True
         
         return False
@@ -344,32 +551,36 @@ class MlNode(object):
         '''
         Returns the length of the children
         '''
-        return len(self.children())
+        self.__loadChildren()
+        if self.__children is None:
+            return 0
+        return len(self.__children)
     
     def descendantCount(self):
-        children = self.children()
+        '''
+        Returns the number of nodes under self
+        '''
         count = 0
-        if children:
-            for child in children: 
-                count += 1
-                count += child.descendantCount()
-            return count
-        else:
-            return count
+        for node in self.iterDescendants():
+            count += 1
+        
+        return count
         
     def descendants(self):
-        children = self.children()
-        nodes = list()
-        if children:
-            for child in children:
-                nodes.append(child)
-                newNodes = child.descendants()
-                if newNodes:
-                    if newNodes not in nodes:
-                        nodes.extend(newNodes)
-            return nodes
-        else:
-            return nodes
+        '''
+        Returns all the nodes under self in pre-order
+        
+        :see: japeto.mlRig.ml_traversal.preOrder
+        '''
+        return list(self.iterDescendants())
+    
+    def iterDescendants(self):
+        '''
+        Lazily walks all the nodes under self in pre-order
+        
+        :see: japeto.mlRig.ml_traversal.preOrder
+        '''
+        return ml_traversal.preOrder(self.children())
 
 
     def index(self):
@@ -377,8 +588,8 @@ class MlNode(object):
         returns what index the current node is at on the parents list of children
         '''
         if self.__parent:
-            if self.__parent.children():
-                return self.__parent.children().index(self)
+            if self.__parent.childCount():
+                return self.__parent.childIndex(self)
         
         return 0
     
@@ -398,10 +609,33 @@ class MlNode(object):
         output += '\n'
         return output
     
+    def function(self):
+        '''
+        Returns the function called by execute(), None if there isn't one
+        '''
+        return self.__function
+    
+    def setFunction(self, value):
+        '''
+        Sets the function execute() will call
+        
+        :param value: Function or method to call
+        :type value: function | method
+        '''
+        if value is not None and not callable(value):
+            raise TypeError('%s must be callable' % value)
+        self.__function = value
+    
+    @profiler.profiled
     def execute(self, *args, **kwargs):
         '''
+        Calls the function set with setFunction(), passing through any
+        arguments.
+        
         .. todo: add execution code here
         '''
+        if self.__function:
+            return self.__function(*args, **kwargs)
         return
             
             
\ No newline at end of file
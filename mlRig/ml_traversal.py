@@ -0,0 +1,183 @@
+'''
+Traversal will walk the hierarchy of nodes in a graph
+
+All the iterators are lazy generators that use an explicit stack or queue
+instead of recursion, so deep chains of nodes never hit python's recursion
+limit. They take a single node or a list of nodes as the roots of the walk
+and only rely on the node having a children() method.
+
+:example:
+    >>> [n.name() for n in ml_traversal.preOrder(graph.rootNodes())]
+    ['a', 'b', 'c']
+    >>> [n.name() for n in ml_traversal.postOrder(graph.rootNodes())]
+    ['c', 'b', 'a']
+'''
+#import python modules
+from collections import deque
+
+def _toList(nodes):
+    '''
+    Makes sure the roots passed into the iterators are a list
+    '''
+    if nodes is None:
+        return list()
+    if isinstance(nodes, (list, tuple)):
+        return list(nodes)
+
+    return [nodes]
+
+def preOrder(nodes, maxDepth = None):
+    '''
+    Walks the nodes depth first, yielding each node before its children.
+
+    :param nodes: Node or list of nodes to start walking from
+    :type nodes: ml_node.MlNode | list
+
+    :param maxDepth: How many levels below the given nodes to walk. The
+                     given nodes are at depth 0. None walks everything.
+    :type maxDepth: int | None
+
+    :return: Generator of nodes
+    :rtype: generator
+    '''
+    stack = [(node, 0) for node in reversed(_toList(nodes))]
+
+    while stack:
+        node, depth = stack.pop()
+        yield node
+
+        if maxDepth is not None and depth >= maxDepth:
+            continue
+
+        children = node.children()
+        if children:
+            depth += 1
+            for child in reversed(children):
+                stack.append((child, depth))
+
+def postOrder(nodes, maxDepth = None):
+    '''
+    Walks the nodes depth first, yielding each node after its children.
+
+    :param nodes: Node or list of nodes to start walking from
+    :type nodes: ml_node.MlNode | list
+
+    :param maxDepth: How many levels below the given nodes to walk. The
+                     given nodes are at depth 0. None walks everything.
+    :type maxDepth: int | None
+
+    :return: Generator of nodes
+    :rtype: generator
+    '''
+    #the flag tells us if the children have already been put on the stack
+    stack = [(node, 0, False) for node in reversed(_toList(nodes))]
+
+    while stack:
+        node, depth, expanded = stack.pop()
+        if expanded:
+            yield node
+            continue
+
+        stack.append((node, depth, True))
+
+        if maxDepth is not None and depth >= maxDepth:
+            continue
+
+        children = node.children()
+        if children:
+            for child in reversed(children):
+                stack.append((child, depth + 1, False))
+
+def breadthFirst(nodes, maxDepth = None):
+    '''
+    Walks the nodes one level at a time.
+
+    :param nodes: Node or list of nodes to start walking from
+    :type nodes: ml_node.MlNode | list
+
+    :param maxDepth: How many levels below the given nodes to walk. The
+                     given nodes are at depth 0. None walks everything.
+    :type maxDepth: int | None
+
+    :return: Generator of nodes
+    :rtype: generator
+    '''
+    queue = deque([(node, 0) for node in _toList(nodes)])
+
+    while queue:
+        node, depth = queue.popleft()
+        yield node
+
+        if maxDepth is not None and depth >= maxDepth:
+            continue
+
+        children = node.children()
+        if children:
+            depth += 1
+            for child in children:
+                queue.append((child, depth))
+
+def depthLimited(nodes, maxDepth):
+    '''
+    Pre-order walk that stops at the given depth. The given nodes are at
+    depth 0, so a maxDepth of 1 yields the nodes and their children.
+
+    :param nodes: Node or list of nodes to start walking from
+    :type nodes: ml_node.MlNode | list
+
+    :param maxDepth: How many levels below the given nodes to walk
+    :type maxDepth: int
+
+    :return: Generator of nodes
+    :rtype: generator
+    '''
+    if maxDepth is None or maxDepth < 0:
+        raise ValueError('%s must be an int of 0 or greater' % maxDepth)
+
+    return preOrder(nodes, maxDepth)
+
+#---------------------------------------------
+#Filters
+#---------------------------------------------
+def filterByClass(iterator, cls):
+    '''
+    Yields the nodes from the iterator that are instances of the given
+    class or tuple of classes.
+
+    :example:
+        >>> ml_traversal.filterByClass(ml_traversal.preOrder(graph.rootNodes()),
+        ...                            component.Component)
+
+    :param iterator: Nodes to filter
+    :type iterator: generator | list
+
+    :param cls: Class or tuple of classes to keep
+    :type cls: type | tuple
+
+    :return: Generator of nodes
+    :rtype: generator
+    '''
+    for node in iterator:
+        if isinstance(node, cls):
+            yield node
+
+def filterByPredicate(iterator, predicate):
+    '''
+    Yields the nodes from the iterator the predicate returns True for.
+
+    :example:
+        >>> ml_traversal.filterByPredicate(ml_traversal.preOrder(node),
+        ...                                lambda n: n.active())
+
+    :param iterator: Nodes to filter
+    :type iterator: generator | list
+
+    :param predicate: Function that takes a node and returns a bool
+    :type predicate: function
+
+    :return: Generator of nodes
+    :rtype: generator
+    '''
+    for node in iterator:
+        if predicate(node):
+            yield node
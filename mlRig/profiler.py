@@ -0,0 +1,353 @@
+'''
+Profiler records where the time goes while a rig builds
+
+Spans are recorded around MlNode.execute(), the setup and rig stages of
+components and the build stages of a rig. Each span keeps the node it
+ran for, wall time, cpu time and the spans that ran inside of it, per
+thread. The results can be saved as a flat table, as collapsed stacks
+for flamegraph.pl / speedscope, or as Chrome trace events for
+chrome://tracing and Perfetto.
+
+Profiling is off unless the JAPETO_PROFILE environment variable is set
+to a true value before japeto is imported, or it is turned on with
+enable() or the profile() context manager. While it is off a span only
+costs checking one global.
+
+:example:
+    >>> with profiler.profile() as p:
+    ...     rig.builder.execute('runRig')
+    >>> print p.table()
+    node                                   calls     wall (s)     self (s)      cpu (s)
+    l_arm.runRig                               1        4.210        0.002        3.980
+    l_arm.rig                                  1        3.108        3.108        2.951
+    ...
+    >>> p.saveChromeTrace('/tmp/build.json')
+'''
+#import python modules
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+ENVIRONMENT = 'JAPETO_PROFILE'
+
+if hasattr(time, 'process_time'):
+    _cpuTime = time.process_time
+elif sys.platform == 'win32':
+    #time.clock is wall time on windows
+    def _cpuTime():
+        times = os.times()
+        return times[0] + times[1]
+else:
+    _cpuTime = time.clock
+
+class Span(object):
+    '''
+    One call that was profiled
+    '''
+    __slots__ = ('node', 'method', 'start', 'wall', 'cpu', 'childWall',
+                 'parent', 'depth', 'thread', '_cpuStart')
+
+    def __init__(self, node, method, parent, thread):
+        self.node      = node
+        self.method    = method
+        self.parent    = parent
+        self.depth     = parent.depth + 1 if parent else 0
+        self.thread    = thread
+        self.start     = 0.0
+        self.wall      = None #<-- set when the span closes
+        self.cpu       = 0.0
+        self.childWall = 0.0
+
+    def __repr__(self):
+        return '< %s %s %.3fs >' % (self.__class__.__name__, self.label(), self.wall or 0.0)
+
+    def label(self):
+        return '%s.%s' % (self.node, self.method)
+
+    def selfWall(self):
+        '''
+        Returns the wall time not spent in the spans inside of this one
+        '''
+        return self.wall - self.childWall
+
+    def stack(self):
+        '''
+        Returns the labels of the spans from the outer most one down to
+        this one
+        '''
+        labels = list()
+        span = self
+        while span is not None:
+            labels.append(span.label())
+            span = span.parent
+        labels.reverse()
+        return labels
+
+
+class Profile(object):
+    '''
+    Collects the spans recorded while it is the current profile
+    '''
+    def __init__(self):
+        super(Profile, self).__init__()
+
+        self.__spans = list()
+        self.__lock  = threading.Lock()
+        self.__local = threading.local() #<-- stack of open spans per thread
+        self.__start = time.time()
+
+    def __repr__(self):
+        return '< %s: %s spans >' % (self.__class__.__name__, len(self.__spans))
+
+    def spans(self):
+        '''
+        Returns the finished spans in the order they started
+        '''
+        return [span for span in self.__spans if span.wall is not None]
+
+    def _open(self, node, method):
+        stack = getattr(self.__local, 'stack', None)
+        if stack is None:
+            stack = self.__local.stack = list()
+
+        if hasattr(node, 'name') and callable(node.name):
+            node = node.name()
+        span = Span(node, method, stack[-1] if stack else None, threading.current_thread().ident)
+        stack.append(span)
+        with self.__lock:
+            self.__spans.append(span)
+        span._cpuStart = _cpuTime()
+        span.start = time.time()
+        return span
+
+    def _close(self, span):
+        span.wall = time.time() - span.start
+        span.cpu  = _cpuTime() - span._cpuStart
+        if span.parent is not None:
+            span.parent.childWall += span.wall
+        self.__local.stack.pop()
+
+    #---------------------------------------------
+    #Results
+    #---------------------------------------------
+    def stats(self):
+        '''
+        Returns the totals for each node and method, slowest first
+
+        :return: (label, calls, wall, self wall, cpu) for each label
+        :rtype: list
+        '''
+        totals = dict()
+        for span in self.spans():
+            label = span.label()
+            if label not in totals:
+                totals[label] = [label, 0, 0.0, 0.0, 0.0]
+            row = totals[label]
+            row[1] += 1
+            row[2] += span.wall
+            row[3] += span.selfWall()
+            row[4] += span.cpu
+
+        return sorted([tuple(row) for row in totals.values()], key = lambda row: -row[2])
+
+    def table(self):
+        '''
+        Returns the stats as a flat table
+        '''
+        output = '%-36s %8s %12s %12s %12s\n' % ('node', 'calls', 'wall (s)', 'self (s)', 'cpu (s)')
+        for label, calls, wall, selfWall, cpu in self.stats():
+            output += '%-36s %8d %12.3f %12.3f %12.3f\n' % (label, calls, wall, selfWall, cpu)
+        return output
+
+    def collapsed(self):
+        '''
+        Returns the spans as collapsed stacks, one line per stack with the
+        self time in microseconds, the input flamegraph.pl takes.
+        '''
+        totals = dict()
+        order = list()
+        for span in self.spans():
+            stack = ';'.join(span.stack())
+            if stack not in totals:
+                totals[stack] = 0
+                order.append(stack)
+            totals[stack] += int(round(span.selfWall() * 1e6))
+
+        return '\n'.join(['%s %d' % (stack, totals[stack]) for stack in order]) + '\n'
+
+    def chromeTrace(self):
+        '''
+        Returns the spans as Chrome trace events
+        '''
+        pid = os.getpid()
+        events = list()
+        for span in self.spans():
+            events.append({'name' : span.label(),
+                           'cat'  : str(span.method),
+                           'ph'   : 'X',
+                           'ts'   : int((span.start - self.__start) * 1e6),
+                           'dur'  : int(span.wall * 1e6),
+                           'pid'  : pid,
+                           'tid'  : span.thread,
+                           'args' : {'node' : str(span.node), 'cpu' : span.cpu}})
+
+        return {'traceEvents' : events, 'displayTimeUnit' : 'ms'}
+
+    def saveTable(self, filepath):
+        self.__write(filepath, self.table())
+
+    def saveCollapsed(self, filepath):
+        self.__write(filepath, self.collapsed())
+
+    def saveChromeTrace(self, filepath):
+        self.__write(filepath, json.dumps(self.chromeTrace()))
+
+    def __write(self, filepath, data):
+        f = open(filepath, 'w')
+        try:
+            f.write(data)
+        finally:
+            f.close()
+
+
+class _Span(object):
+    '''
+    Context manager that records a span on the current profile
+    '''
+    __slots__ = ('profile', 'node', 'method', 'span')
+
+    def __init__(self, profile, node, method):
+        self.profile = profile
+        self.node    = node
+        self.method  = method
+
+    def __enter__(self):
+        self.span = self.profile._open(self.node, self.method)
+        return self.span
+
+    def __exit__(self, *args):
+        self.profile._close(self.span)
+
+
+class _NullSpan(object):
+    '''
+    Context manager used while profiling is off
+    '''
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *args):
+        return None
+
+_NULL_SPAN = _NullSpan()
+
+#the profile spans are being recorded on, None while profiling is off
+_current = None
+
+#---------------------------------------------
+#Switching profiling on and off
+#---------------------------------------------
+def enabled():
+    return _current is not None
+
+def current():
+    '''
+    Returns the profile spans are being recorded on, None if profiling
+    is off
+    '''
+    return _current
+
+def enable(profile = None):
+    '''
+    Starts recording spans
+
+    :param profile: Profile to record on. Defaults to a new one.
+    :type profile: Profile
+
+    :rtype: Profile
+    '''
+    global _current
+    _current = profile or Profile()
+    return _current
+
+def disable():
+    '''
+    Stops recording spans, returns the profile they were recorded on
+    '''
+    global _current
+    profile = _current
+    _current = None
+    return profile
+
+@contextmanager
+def profile():
+    '''
+    Records spans on a new profile for the length of the with block,
+    then puts back whatever was being recorded before.
+
+    :example:
+        >>> with profiler.profile() as p:
+        ...     rig.setup()
+        >>> p.saveCollapsed('/tmp/setup.folded')
+    '''
+    global _current
+    previous = _current
+    _current = Profile()
+    try:
+        yield _current
+    finally:
+        _current = previous
+
+#---------------------------------------------
+#Recording
+#---------------------------------------------
+def span(node, method):
+    '''
+    Returns a context manager that records a span for the node and
+    method when profiling is on
+
+    :example:
+        >>> with profiler.span(self, 'setupRig'):
+        ...     self.setupRig()
+
+    :param node: Node the span is for
+    :type node: ml_node.MlNode | ml_graph.MlGraph | str
+
+    :param method: Name of what is running
+    :type method: str
+    '''
+    profile = _current
+    if profile is None:
+        return _NULL_SPAN
+
+    return _Span(profile, node, method)
+
+def profiled(func):
+    '''
+    Decorator for methods that records a span for every call while
+    profiling is on
+    '''
+    method = func.__name__
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        profile = _current
+        if profile is None:
+            return func(self, *args, **kwargs)
+
+        span = profile._open(self, method)
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            profile._close(span)
+
+    return wrapper
+
+if os.environ.get(ENVIRONMENT, '').lower() in ('1', 'true', 'yes', 'on'):
+    enable()
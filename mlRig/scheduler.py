@@ -0,0 +1,305 @@
+'''
+Scheduler works out what order the nodes on a graph can run in
+
+The dependencies come from MlGraph.dependencies() (the parent of a node,
+and on a rig the component a node hooks onto). The scheduler turns them
+into a DAG over the nodes it was given, sorts it topologically and groups
+it into waves of nodes that don't depend on each other.
+
+Nodes edit the Maya scene, which can only be done from the main thread,
+so they run one at a time in the sorted order. The waves and the
+critical path show how much of a build could overlap and which chain of
+components bounds it.
+
+:example:
+    >>> s = scheduler.Scheduler(rig, rig.components.values())
+    >>> [[n.name() for n in wave] for wave in s.waves()]
+    [['c_spine'], ['c_neck', 'l_leg', 'l_arm', 'r_leg', 'r_arm'], ...]
+    >>> report = s.execute('runRig')
+    >>> s.criticalPath(report.durations)
+    (12.5, [< Spine c_spine >, < Leg l_leg >, < Foot l_foot >])
+'''
+#import python modules
+import heapq
+import time
+
+#import package modules
+from japeto.mlRig import profiler
+
+class BuildReport(object):
+    '''
+    Records what ran, what was skipped and how long each node took when
+    running a method on the nodes
+    '''
+    def __init__(self, method):
+        self.method    = method
+        self.executed  = list()
+        self.skipped   = list()
+        self.durations = dict() #<-- node : seconds
+        self.queries   = None   #<-- japeto.libs.queryCache report, set by the caller
+
+    def __repr__(self):
+        return '< %s %s: ran %s, skipped %s >' % (self.__class__.__name__,
+                                                  self.method,
+                                                  len(self.executed),
+                                                  len(self.skipped))
+
+    def log(self):
+        '''
+        Returns the report as a string with the names of the nodes
+        '''
+        output = '%s\n' % self.method
+        output += '\tran:     %s\n' % ', '.join([n.name() for n in self.executed])
+        output += '\tskipped: %s\n' % ', '.join([n.name() for n in self.skipped])
+        if self.queries:
+            output += self.queries
+        return output
+
+
+class CycleError(RuntimeError):
+    '''
+    Raised when the dependencies between nodes loop back on themselves
+    '''
+    def __init__(self, nodes):
+        self.nodes = nodes
+        super(CycleError, self).__init__('Dependency cycle between %s' %
+                                         ', '.join([n.name() for n in nodes]))
+
+
+class Scheduler(object):
+    def __init__(self, graph, nodes = None):
+        '''
+        :param graph: Graph the nodes are on
+        :type graph: ml_graph.MlGraph
+
+        :param nodes: Nodes to schedule. Defaults to every node on the graph.
+                      Dependencies through nodes that aren't scheduled are
+                      still kept.
+        :type nodes: list | generator
+        '''
+        super(Scheduler, self).__init__()
+
+        if nodes is None:
+            nodes = graph.iterNodes()
+
+        self.__graph = graph
+        self.__nodes = list(nodes)
+        self.__dependencies = dict()
+        self.__order = None
+        self.__waves = None
+
+        scheduled = set(self.__nodes)
+        resolved = dict() #<-- node : scheduled nodes it depends on
+        for node in self.__nodes:
+            self.__dependencies[node] = self.__resolve(node, scheduled, resolved)
+
+    def __resolve(self, node, scheduled, resolved):
+        '''
+        Returns the scheduled nodes the node depends on, walking through
+        any dependency that isn't being scheduled.
+        '''
+        dependencies = list()
+        seen = set()
+        stack = list(reversed(self.__graph.dependencies(node)))
+        while stack:
+            dependency = stack.pop()
+            if dependency in seen:
+                continue
+            seen.add(dependency)
+            if dependency in scheduled:
+                dependencies.append(dependency)
+            elif dependency in resolved:
+                dependencies.extend([d for d in resolved[dependency] if d not in seen])
+                seen.update(resolved[dependency])
+            else:
+                stack.extend(reversed(self.__graph.dependencies(dependency)))
+        resolved[node] = dependencies
+        return dependencies
+
+    def graph(self):
+        return self.__graph
+
+    def nodes(self):
+        return list(self.__nodes)
+
+    def dependencies(self, node):
+        '''
+        Returns the scheduled nodes the given node has to run after
+        '''
+        return list(self.__dependencies[node])
+
+    def order(self):
+        '''
+        Returns the nodes sorted so every node comes after the nodes it
+        depends on. Nodes that could go in any order keep the order they
+        were given in.
+
+        :raises CycleError: If the dependencies loop
+
+        :rtype: list
+        '''
+        if self.__order is not None:
+            return list(self.__order)
+
+        position = dict([(node, i) for i, node in enumerate(self.__nodes)])
+        downstream = dict([(node, list()) for node in self.__nodes])
+        remaining = dict()
+        for node in self.__nodes:
+            remaining[node] = len(self.__dependencies[node])
+            for dependency in self.__dependencies[node]:
+                downstream[dependency].append(node)
+
+        #kahn's algorithm, using a heap on the original position so the
+        #order stays as close to the given order as it can
+        ready = [(position[n], n) for n in self.__nodes if not remaining[n]]
+        heapq.heapify(ready)
+        order = list()
+        while ready:
+            node = heapq.heappop(ready)[1]
+            order.append(node)
+            for dependent in downstream[node]:
+                remaining[dependent] -= 1
+                if not remaining[dependent]:
+                    heapq.heappush(ready, (position[dependent], dependent))
+
+        if len(order) != len(self.__nodes):
+            raise CycleError(self.__findCycle([n for n in self.__nodes if remaining[n]]))
+
+        self.__order = order
+        return list(order)
+
+    def __findCycle(self, nodes):
+        '''
+        Returns one loop of nodes out of the nodes left over from the sort
+        '''
+        left = set(nodes)
+        node = nodes[0]
+        path = list()
+        onPath = dict()
+        #every left over node has a left over dependency, so walking the
+        #dependencies has to come back around to a node already on the path
+        while node not in onPath:
+            onPath[node] = len(path)
+            path.append(node)
+            node = [d for d in self.__dependencies[node] if d in left][0]
+        return path[onPath[node]:]
+
+    def waves(self):
+        '''
+        Groups the nodes into waves. Every node in a wave only depends on
+        nodes in earlier waves, so nodes in the same wave can run at the
+        same time.
+
+        :rtype: list
+        '''
+        if self.__waves is not None:
+            return [list(wave) for wave in self.__waves]
+
+        level = dict()
+        waves = list()
+        for node in self.order():
+            nodeLevel = 0
+            for dependency in self.__dependencies[node]:
+                nodeLevel = max(nodeLevel, level[dependency] + 1)
+            level[node] = nodeLevel
+            if nodeLevel == len(waves):
+                waves.append(list())
+            waves[nodeLevel].append(node)
+
+        self.__waves = waves
+        return [list(wave) for wave in waves]
+
+    def criticalPath(self, durations):
+        '''
+        Returns the chain of dependent nodes that takes the longest to
+        run, which is the least amount of time the nodes can run in no
+        matter how many run at once.
+
+        :param durations: node : seconds it took to run. Nodes that aren't
+                          in the dict count as 0.
+        :type durations: dict
+
+        :return: Total time of the path and the nodes on it
+        :rtype: tuple
+        '''
+        finish = dict()
+        previous = dict()
+        for node in self.order():
+            start = 0.0
+            previous[node] = None
+            for dependency in self.__dependencies[node]:
+                if finish[dependency] > start:
+                    start = finish[dependency]
+                    previous[node] = dependency
+            finish[node] = start + durations.get(node, 0.0)
+
+        if not finish:
+            return 0.0, list()
+
+        node = max(self.order(), key = lambda n: finish[n])
+        total = finish[node]
+        path = list()
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        path.reverse()
+
+        return total, path
+
+    def execute(self, method, prepare = None, clean = False, force = False):
+        '''
+        Calls the method on the dirty nodes in dependency order, on the
+        main thread.
+
+        :param method: Name of the method to call on each node (i.e. 'runRig')
+        :type method: str
+
+        :param prepare: Function called with the node before the method is
+                        called, only for nodes that run.
+        :type prepare: function
+
+        :param clean: Mark the nodes clean once the method has run
+        :type clean: bool
+
+        :param force: Run the nodes even if they are clean
+        :type force: bool
+
+        :return: What ran and what was skipped, with how long each node took
+        :rtype: BuildReport
+        '''
+        report = BuildReport(method)
+
+        for node in self.order():
+            func = getattr(node, method, None)
+            if not callable(func):
+                continue
+
+            if not node.dirty() and not force:
+                report.skipped.append(node)
+                continue
+
+            if prepare:
+                prepare(node)
+
+            report.executed.append(node)
+            report.durations[node] = _timedCall(node, func)
+
+        if clean:
+            for node in report.executed:
+                node.setDirty(False)
+
+        return report
+
+def _timedCall(node, func):
+    '''
+    Calls func with the node marked as running and returns the time it took
+    '''
+    node.setRunning(True)
+    start = time.time()
+    try:
+        with profiler.span(node, func.__name__):
+            func()
+    finally:
+        node.setRunning(False)
+
+    return time.time() - start
@@ -0,0 +1,580 @@
+'''
+Snapshot saves a graph to a compact binary file and loads it back
+
+A snapshot stores the structure of the graph, the class, name, niceName,
+color and enabled state of every node and the typed values of their
+attributes. Unlike Rig.saveTemplate() nothing has to be generated,
+imported or reloaded to get the graph back.
+
+Layout of a snapshot file (all numbers little endian):
+
+    header   magic 'JPSN', version, graph name, node count, string count,
+             offset of the string table, offset of the index table
+    records  one record per node: color, then the attributes as
+             (name, attrType, value) with length prefixed values
+    strings  length of every string, followed by the strings. Strings
+             saved from unicode are utf-8, with the top bit of their
+             length set so they load as unicode again.
+    index    one column per field for every node in pre-order: name,
+             class, niceName, parent, flags and the offset of its record
+
+Loading only reads the header, strings and index. Nodes are created
+when the children of their parent are first asked for, and attributes
+are added when the node's attributes are first asked for, so a large
+graph only pays for the parts of it that get used. The file is mapped
+into memory until every record has been read, or the Snapshot is closed.
+
+:example:
+    >>> snapshot.save(graph, '/tmp/biped.jpsn')
+    >>> graph = snapshot.load('/tmp/biped.jpsn')
+    >>> graph.getNodeByName('l_arm').getAttributeByName('position').value()
+    [20.0, 10.0, 10.0]
+'''
+#import python modules
+import array
+import functools
+import mmap
+import struct
+import sys
+
+#import package modules
+from japeto.libs import fileIO
+from japeto.mlRig import ml_graph
+
+MAGIC   = 'JPSN'
+VERSION = 1
+
+#node flags stored in the index
+ENABLED  = 1
+FUNCTION = 2 #<-- node had a function set, it can't be stored
+
+_HEADER = struct.Struct('<4sHIIIQQ')
+_COUNT  = struct.Struct('<I')
+_NAMES  = struct.Struct('<II')
+_INT    = struct.Struct('<q')
+_FLOAT  = struct.Struct('<d')
+
+#set on the length of strings saved from unicode
+_UNICODE_LENGTH = 0x80000000
+
+#value tags
+_NONE, _FALSE, _TRUE, _INTEGER, _LONG, _FLOAT_, _STR, _UNICODE, _LIST, _TUPLE, _DICT = range(11)
+
+#---------------------------------------------
+#Values
+#---------------------------------------------
+def _encode(value, out):
+    '''
+    Appends the value to the list of strings as a tag followed by the
+    value.
+    '''
+    valueType = type(value)
+    if value is None:
+        out.append(chr(_NONE))
+    elif valueType is bool:
+        out.append(chr(_TRUE) if value else chr(_FALSE))
+    elif valueType is int or valueType is long:
+        if -0x8000000000000000 <= value <= 0x7fffffffffffffff:
+            out.append(chr(_INTEGER))
+            out.append(_INT.pack(value))
+        else:
+            text = str(value)
+            out.append(chr(_LONG))
+            out.append(_COUNT.pack(len(text)))
+            out.append(text)
+    elif valueType is float:
+        out.append(chr(_FLOAT_))
+        out.append(_FLOAT.pack(value))
+    elif valueType is str:
+        out.append(chr(_STR))
+        out.append(_COUNT.pack(len(value)))
+        out.append(value)
+    elif valueType is unicode:
+        text = value.encode('utf-8')
+        out.append(chr(_UNICODE))
+        out.append(_COUNT.pack(len(text)))
+        out.append(text)
+    elif valueType is list or valueType is tuple:
+        out.append(chr(_LIST) if valueType is list else chr(_TUPLE))
+        out.append(_COUNT.pack(len(value)))
+        for item in value:
+            _encode(item, out)
+    elif isinstance(value, dict):
+        out.append(chr(_DICT))
+        out.append(_COUNT.pack(len(value)))
+        for key, item in value.items():
+            _encode(key, out)
+            _encode(item, out)
+    else:
+        raise TypeError('%s can not be stored in a snapshot' % (value,))
+
+def _decode(data, offset):
+    '''
+    Returns the value starting at the offset and the offset after it
+    '''
+    tag = ord(data[offset])
+    offset += 1
+    if tag == _STR:
+        size = _COUNT.unpack_from(data, offset)[0]
+        offset += 4
+        return data[offset:offset + size], offset + size
+    elif tag == _INTEGER:
+        return _INT.unpack_from(data, offset)[0], offset + 8
+    elif tag == _FLOAT_:
+        return _FLOAT.unpack_from(data, offset)[0], offset + 8
+    elif tag == _TRUE:
+        return True, offset
+    elif tag == _FALSE:
+        return False, offset
+    elif tag == _NONE:
+        return None, offset
+    elif tag == _LIST or tag == _TUPLE:
+        size = _COUNT.unpack_from(data, offset)[0]
+        offset += 4
+        value = list()
+        for i in xrange(size):
+            item, offset = _decode(data, offset)
+            value.append(item)
+        if tag == _TUPLE:
+            value = tuple(value)
+        return value, offset
+    elif tag == _UNICODE:
+        size = _COUNT.unpack_from(data, offset)[0]
+        offset += 4
+        return data[offset:offset + size].decode('utf-8'), offset + size
+    elif tag == _DICT:
+        size = _COUNT.unpack_from(data, offset)[0]
+        offset += 4
+        value = dict()
+        for i in xrange(size):
+            key, offset = _decode(data, offset)
+            value[key], offset = _decode(data, offset)
+        return value, offset
+    elif tag == _LONG:
+        size = _COUNT.unpack_from(data, offset)[0]
+        offset += 4
+        return long(data[offset:offset + size]), offset + size
+
+    raise RuntimeError('Unknown value tag %s in snapshot' % tag)
+
+#---------------------------------------------
+#Columns
+#---------------------------------------------
+def _toString(values):
+    if sys.byteorder == 'big':
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tostring()
+
+def _readArray(typecode, data, offset, count):
+    '''
+    Returns an array of count values read from the offset, and the
+    offset after them
+    '''
+    values = array.array(typecode)
+    end = offset + values.itemsize * count
+    values.fromstring(data[offset:end])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values, end
+
+#---------------------------------------------
+#Saving
+#---------------------------------------------
+def save(graph, filepath):
+    '''
+    Saves the graph to a snapshot file
+
+    :param graph: Graph to save
+    :type graph: ml_graph.MlGraph
+
+    :param filepath: Path of the file to write
+    :type filepath: str
+    '''
+    strings = list()
+    lengths = array.array('I')
+    stringIds = dict()
+    def stringId(value):
+        #u'a' and 'a' are the same key in a dict, keep them apart
+        isUnicode = isinstance(value, unicode)
+        key = (value, isUnicode) if isUnicode else (str(value), False)
+        if key not in stringIds:
+            value = value.encode('utf-8') if isUnicode else key[0]
+            stringIds[key] = len(strings)
+            strings.append(value)
+            lengths.append(len(value) | _UNICODE_LENGTH if isUnicode else len(value))
+        return stringIds[key]
+
+    graphName = stringId(graph.name())
+    nodes = graph.nodes()
+    position = dict()
+    names     = array.array('I')
+    classes   = array.array('I')
+    niceNames = array.array('I')
+    parents   = array.array('i')
+    flags     = array.array('B')
+    offsets   = array.array('I', [_HEADER.size]) #<-- records start after the header
+
+    records = list()
+    size = 0
+    for index, node in enumerate(nodes):
+        position[node] = index
+        nodeClass = node.__class__
+        names.append(stringId(node.name()))
+        classes.append(stringId('%s.%s' % (nodeClass.__module__, nodeClass.__name__)))
+        niceNames.append(stringId(node.niceName))
+        parent = node.parent()
+        parents.append(position[parent] if parent in position else -1)
+        nodeFlags = 0
+        if node.active():
+            nodeFlags |= ENABLED
+        if node.function() is not None:
+            nodeFlags |= FUNCTION
+        flags.append(nodeFlags)
+
+        record = list()
+        _encode(node.color(), record)
+        attributes = node.attributes()
+        record.append(_COUNT.pack(len(attributes)))
+        for attr in attributes:
+            record.append(_NAMES.pack(stringId(attr.name()), stringId(attr.attrType())))
+            _encode(attr.value(), record)
+
+        record = ''.join(record)
+        records.append(record)
+        size += len(record)
+        offsets.append(_HEADER.size + size)
+
+    stringData = [_toString(lengths)]
+    stringData.extend(strings)
+    stringData = ''.join(stringData)
+
+    #written next to the file first, so a failed save leaves the old one
+    with fileIO.atomicWrite(filepath, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, 0, 0, 0, 0, 0))
+        recordOffset = _HEADER.size
+        f.write(''.join(records))
+        stringOffset = recordOffset + size
+        f.write(stringData)
+        indexOffset = stringOffset + len(stringData)
+        for column in (names, classes, niceNames, parents, flags, offsets):
+            f.write(_toString(column))
+
+        #go back and fill in the header now the offsets are known
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, graphName, len(nodes),
+                             len(strings), stringOffset, indexOffset))
+
+#---------------------------------------------
+#Loading
+#---------------------------------------------
+class Snapshot(object):
+    '''
+    Reads the header, strings and index of a snapshot file. Node records
+    are only read when they are asked for.
+    '''
+    def __init__(self, filepath):
+        '''
+        :param filepath: Path of the snapshot file
+        :type filepath: str
+        '''
+        super(Snapshot, self).__init__()
+
+        f = open(filepath, 'rb')
+        try:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size or header[:4] != MAGIC:
+                raise RuntimeError('%s is not a snapshot file' % filepath)
+            data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        finally:
+            f.close()
+
+        magic, version, nameId, nodeCount, stringCount, stringOffset, indexOffset = _HEADER.unpack(header)
+        if version > VERSION:
+            raise RuntimeError('%s was saved with snapshot version %s, only %s and older can be loaded' % (filepath, version, VERSION))
+
+        self.__filepath = filepath
+        self.__version  = version
+        self.__data     = data
+        self.__classes  = dict() #<-- class path : class
+        self.__children = None   #<-- index : list of child indices, built when needed
+
+        #strings
+        lengths, offset = _readArray('I', data, stringOffset, stringCount)
+        strings = list()
+        for length in lengths:
+            if length & _UNICODE_LENGTH:
+                length &= ~_UNICODE_LENGTH
+                strings.append(data[offset:offset + length].decode('utf-8'))
+            else:
+                strings.append(data[offset:offset + length])
+            offset += length
+        self.__strings = strings
+        self.__graphName = strings[nameId] if strings else str()
+
+        #index
+        offset = indexOffset
+        self.__names, offset     = _readArray('I', data, offset, nodeCount)
+        self.__classIds, offset  = _readArray('I', data, offset, nodeCount)
+        self.__niceNames, offset = _readArray('I', data, offset, nodeCount)
+        self.__parents, offset   = _readArray('i', data, offset, nodeCount)
+        self.__flags, offset     = _readArray('B', data, offset, nodeCount)
+        self.__offsets, offset   = _readArray('I', data, offset, nodeCount + 1)
+
+    def __repr__(self):
+        return '< %s %s v%s: %s nodes >' % (self.__class__.__name__, self.__filepath,
+                                            self.__version, self.nodeCount())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        '''
+        Unmaps the file. Node records can not be read after this.
+        '''
+        if self.__data is not None:
+            self.__data.close()
+            self.__data = None
+
+    def closed(self):
+        return self.__data is None
+
+    def __record(self):
+        if self.__data is None:
+            raise RuntimeError('%s is closed, its node records can not be read' % self.__filepath)
+        return self.__data
+
+    def filepath(self):
+        return self.__filepath
+
+    def version(self):
+        return self.__version
+
+    def graphName(self):
+        return self.__graphName
+
+    def nodeCount(self):
+        return len(self.__names)
+
+    def name(self, index):
+        return self.__strings[self.__names[index]]
+
+    def names(self):
+        '''
+        Returns the names of all the nodes in pre-order
+        '''
+        strings = self.__strings
+        return [strings[i] for i in self.__names]
+
+    def niceName(self, index):
+        return self.__strings[self.__niceNames[index]]
+
+    def parent(self, index):
+        '''
+        Returns the index of the node's parent, -1 for root nodes
+        '''
+        return self.__parents[index]
+
+    def flags(self, index):
+        return self.__flags[index]
+
+    def children(self, index):
+        '''
+        Returns the indices of the children of the node. Pass -1 to get the
+        root nodes.
+        '''
+        if self.__children is None:
+            children = dict()
+            for i, parent in enumerate(self.__parents):
+                children.setdefault(parent, list()).append(i)
+            self.__children = children
+
+        return self.__children.get(index, list())
+
+    def nodeClass(self, index):
+        '''
+        Returns the class the node was saved as
+        '''
+        path = self.__strings[self.__classIds[index]]
+        if path not in self.__classes:
+            moduleName, className = path.rsplit('.', 1)
+            module = __import__(moduleName, fromlist = [className])
+            if not hasattr(module, className):
+                raise RuntimeError('Could not find node class %s' % path)
+            self.__classes[path] = getattr(module, className)
+
+        return self.__classes[path]
+
+    def color(self, index):
+        return _decode(self.__record(), self.__offsets[index])[0]
+
+    def attributes(self, index):
+        '''
+        Reads the node's record and returns its attributes
+
+        :return: (name, attrType, value) for each attribute
+        :rtype: list
+        '''
+        data = self.__record()
+        strings = self.__strings
+        offset = _decode(data, self.__offsets[index])[1] #<-- skip the color
+        count = _COUNT.unpack_from(data, offset)[0]
+        offset += 4
+        attributes = list()
+        for i in xrange(count):
+            nameId, typeId = _NAMES.unpack_from(data, offset)
+            value, offset = _decode(data, offset + 8)
+            attributes.append((strings[nameId], strings[typeId], value))
+
+        return attributes
+
+    def load(self, graph = None, lazy = True):
+        '''
+        Adds the nodes to a graph
+
+        :param graph: Graph to add the nodes to. Defaults to a new
+                      ml_graph.MlGraph with the name of the saved graph.
+        :type graph: ml_graph.MlGraph
+
+        :param lazy: Only create nodes and attributes when they are first
+                     asked for
+        :type lazy: bool
+
+        :rtype: ml_graph.MlGraph
+        '''
+        if graph is None:
+            graph = ml_graph.MlGraph(self.__graphName)
+
+        _Loader(self, graph, lazy)
+
+        return graph
+
+
+class _Loader(object):
+    '''
+    Creates the nodes of a snapshot on a graph. While there are nodes left
+    to create the graph keeps the loader so they can be found by name.
+    '''
+    def __init__(self, snapshot, graph, lazy):
+        self.__snapshot = snapshot
+        self.__graph    = graph
+        self.__lazy     = lazy
+        self.__nodes    = dict() #<-- index : node that has been created
+        self.__unread   = set(xrange(snapshot.nodeCount())) #<-- nodes whose attributes haven't been read
+        if not self.__unread:
+            snapshot.close()
+        self.__pending  = dict([(name, i) for i, name in enumerate(snapshot.names())])
+
+        if lazy and self.__pending:
+            graph._setLoader(self)
+
+        if lazy:
+            for index in snapshot.children(-1):
+                graph.addNode(self.__create(index))
+                self.__restore(index)
+            return
+
+        #nodes are stored in pre-order, so parents are always created
+        #before their children
+        for index in xrange(snapshot.nodeCount()):
+            node = self.__create(index)
+            parent = snapshot.parent(index)
+            if parent == -1:
+                graph.addNode(node)
+            else:
+                self.__nodes[parent].addChild(node)
+            self.__restore(index)
+            node.attributeCount() #<-- adds the attributes
+
+    def __contains__(self, name):
+        return name in self.__pending
+
+    def __create(self, index):
+        snapshot = self.__snapshot
+        name = snapshot.name(index)
+        del self.__pending[name]
+        if not self.__pending:
+            self.__graph._setLoader(None)
+
+        node = snapshot.nodeClass(index)(name)
+        node.niceName = snapshot.niceName(index)
+        node.setColor(snapshot.color(index))
+        if not snapshot.flags(index) & ENABLED:
+            node.disable()
+        self.__nodes[index] = node
+
+        return node
+
+    def __restore(self, index):
+        node = self.__nodes[index]
+        self.__graph._restoreNode(node, functools.partial(self.__attributes, index))
+        if self.__lazy and self.__snapshot.children(index):
+            node._setChildLoader(functools.partial(self.loadChildren, index))
+
+    def __attributes(self, index):
+        '''
+        Reads the attributes of the node, and closes the snapshot once
+        every node's have been read
+        '''
+        attributes = self.__snapshot.attributes(index)
+        self.__unread.discard(index)
+        if not self.__unread:
+            self.__snapshot.close()
+        return attributes
+
+    def loadChildren(self, index, node):
+        '''
+        Creates the children of the node at the given index
+        '''
+        for child in self.__snapshot.children(index):
+            node.addChild(self.__create(child))
+            self.__restore(child)
+
+    def loadNode(self, name):
+        '''
+        Creates the node with the given name, and the nodes above it that
+        haven't been created yet. Returns None if there isn't a node with
+        the name left to create.
+        '''
+        index = self.__pending.get(name)
+        if index is None:
+            return None
+
+        #find the closest node above it that has been created
+        path = list()
+        parent = self.__snapshot.parent(index)
+        while parent not in self.__nodes:
+            path.append(parent)
+            parent = self.__snapshot.parent(parent)
+        path.reverse()
+        path.append(index)
+
+        #asking for the children creates them
+        for i in path:
+            self.__nodes[self.__snapshot.parent(i)].children()
+
+        return self.__nodes[index]
+
+def load(filepath, graph = None, lazy = True):
+    '''
+    Loads a snapshot file
+
+    :see: Snapshot.load
+
+    :param filepath: Path of the snapshot file
+    :type filepath: str
+
+    :param graph: Graph to add the nodes to. Defaults to a new
+                  ml_graph.MlGraph with the name of the saved graph.
+    :type graph: ml_graph.MlGraph
+
+    :param lazy: Only create nodes and attributes when they are first
+                 asked for
+    :type lazy: bool
+
+    :rtype: ml_graph.MlGraph
+    '''
+    return Snapshot(filepath).load(graph, lazy)
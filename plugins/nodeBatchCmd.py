@@ -0,0 +1,215 @@
+'''
+/////////////////////////////////////////////////
+//                        //
+//    nodeBatch           //
+//                        //
+/////////////////////////////////////////////////
+
+:summary:
+    Scripted command that creates a batch of nodes declared with
+    japeto.libs.nodeBatch.NodeBatch. The nodes are created, named and
+    parented through one MDagModifier, and their attributes are set
+    through one MDGModifier once they all exist, so the whole batch is one
+    undo step.
+
+:scripting:
+    -batch or -b
+    The batch to create, encoded with japeto.libs.nodeBatch.NodeBatch.encode()
+
+    Returns the names of the nodes, in the order they were declared.
+
+:example:
+    .. python:
+        >>> from maya import cmds
+        >>> cmds.nodeBatch(batch = nodes.encode())
+'''
+
+import maya.OpenMaya as OpenMaya
+import maya.OpenMayaMPx as OpenMayaMPx
+import sys
+
+from japeto.libs import nodeBatch
+
+class NodeBatchCmd(OpenMayaMPx.MPxCommand):
+    kCmdName = "nodeBatch"
+    kBatchFlag = '-b'
+    kBatchLongFlag = '-batch'
+
+    def __init__(self):
+        super(NodeBatchCmd, self).__init__()
+        self.__records       = list()
+        self.__dagModifier   = OpenMaya.MDagModifier()
+        self.__valueModifier = OpenMaya.MDGModifier()
+        self.__nodes         = list()
+
+    def doIt(self, args):
+        argData = OpenMaya.MArgDatabase(self.syntax(), args)
+        if not argData.isFlagSet(NodeBatchCmd.kBatchFlag):
+            raise RuntimeError('%s needs a batch to create' % NodeBatchCmd.kCmdName)
+        self.__records = nodeBatch.decode(argData.flagArgumentString(NodeBatchCmd.kBatchFlag, 0))
+
+        self.__createNodes()
+        self.__dagModifier.doIt()
+        try:
+            self.__nameShapes()
+            self.__setValues()
+            self.__valueModifier.doIt()
+        except:
+            #a command that fails is not undone, so take the nodes back out
+            self.__dagModifier.undoIt()
+            raise
+        self.__setResult()
+
+    def redoIt(self):
+        self.__dagModifier.doIt()
+        self.__valueModifier.doIt()
+        self.__setResult()
+
+    def undoIt(self):
+        self.__valueModifier.undoIt()
+        self.__dagModifier.undoIt()
+
+    def isUndoable(self):
+        return True
+
+    #--------------------------------------------------------------------
+    #CREATE METHODS
+    #--------------------------------------------------------------------
+    def __createNodes(self):
+        '''
+        Adds every node to the dag modifier, named and under its parent
+        '''
+        for nodeType, name, parent, attributes in self.__records:
+            if isinstance(parent, int):
+                parentObject = self.__nodes[parent]
+            elif parent:
+                parentObject = self.__getMObject(parent)
+            else:
+                parentObject = OpenMaya.MObject()
+
+            try:
+                mObject = self.__dagModifier.createNode(nodeType, parentObject)
+            except RuntimeError:
+                #not a dag node
+                if parent is not None:
+                    raise RuntimeError('%s is a %s, which can not be parented to %s' % (name, nodeType, parent))
+                mObject = OpenMaya.MDGModifier.createNode(self.__dagModifier, nodeType)
+
+            #shapes made without a parent come back as the transform made
+            #for them, and are named once they exist
+            if name and not self.__isShapeTransform(mObject, nodeType):
+                self.__dagModifier.renameNode(mObject, name)
+            self.__nodes.append(mObject)
+
+    def __isShapeTransform(self, mObject, nodeType):
+        return (nodeType != 'transform' and mObject.hasFn(OpenMaya.MFn.kDagNode) and
+                OpenMaya.MFnDependencyNode(mObject).typeName() == 'transform')
+
+    def __nameShapes(self):
+        for index, (nodeType, name, parent, attributes) in enumerate(self.__records):
+            mObject = self.__nodes[index]
+            if self.__isShapeTransform(mObject, nodeType):
+                shape = OpenMaya.MFnDagNode(mObject).child(0)
+                if name:
+                    self.__valueModifier.renameNode(shape, name)
+                self.__nodes[index] = shape
+
+    def __setValues(self):
+        for index, (nodeType, name, parent, attributes) in enumerate(self.__records):
+            if not attributes:
+                continue
+            nodeName = self.__nodeName(self.__nodes[index], full = True)
+            for attr, value in attributes:
+                plug = self.__getPlug('%s.%s' % (nodeName, attr))
+                if isinstance(value, list):
+                    if plug.numChildren() != len(value):
+                        raise RuntimeError('%s.%s has %s children, not %s' % (nodeName, attr, plug.numChildren(), len(value)))
+                    for i, childValue in enumerate(value):
+                        self.__setValue(plug.child(i), childValue)
+                else:
+                    self.__setValue(plug, value)
+
+    def __setValue(self, plug, value):
+        if isinstance(value, bool):
+            self.__valueModifier.newPlugValueBool(plug, value)
+        elif isinstance(value, (int, long)):
+            self.__valueModifier.newPlugValueInt(plug, value)
+        elif isinstance(value, float):
+            self.__valueModifier.newPlugValueDouble(plug, value)
+        else:
+            self.__valueModifier.newPlugValueString(plug, value)
+
+    def __setResult(self):
+        self.clearResult()
+        for mObject in self.__nodes:
+            self.appendToResult(self.__nodeName(mObject))
+
+    #--------------------------------------------------------------------
+    #GATHER DATA METHODS
+    #--------------------------------------------------------------------
+    def __nodeName(self, mObject, full = False):
+        '''
+        Returns the shortest unique name of the node, or its full path
+        '''
+        if mObject.hasFn(OpenMaya.MFn.kDagNode):
+            dagPath = OpenMaya.MDagPath()
+            OpenMaya.MDagPath.getAPathTo(mObject, dagPath)
+            if full:
+                return dagPath.fullPathName()
+            return dagPath.partialPathName()
+        return OpenMaya.MFnDependencyNode(mObject).name()
+
+    def __getMObject(self, name):
+        selList = OpenMaya.MSelectionList()
+        try:
+            selList.add(name)
+        except RuntimeError:
+            raise RuntimeError('%s does not exist' % name)
+        mObject = OpenMaya.MObject()
+        selList.getDependNode(0, mObject)
+        return mObject
+
+    def __getPlug(self, name):
+        selList = OpenMaya.MSelectionList()
+        try:
+            selList.add(name)
+        except RuntimeError:
+            raise RuntimeError('%s does not exist' % name)
+        plug = OpenMaya.MPlug()
+        selList.getPlug(0, plug)
+        return plug
+
+    #--------------------------------------------------------------------
+    #CREATOR METHODS
+    #--------------------------------------------------------------------
+    @classmethod
+    def cmdCreator(cls):
+        return OpenMayaMPx.asMPxPtr(cls())
+
+    @classmethod
+    def cmdSyntaxCreator(cls):
+        ''' Defines the argument and flag syntax for this command. '''
+        syntax = OpenMaya.MSyntax()
+        syntax.addFlag(cls.kBatchFlag, cls.kBatchLongFlag, OpenMaya.MSyntax.kString)
+
+        return syntax
+
+
+# initialize the script plug-in
+def initializePlugin(mobject):
+    mplugin = OpenMayaMPx.MFnPlugin(mobject, "Magic Leap - Walt Yoder", "1.0", "Any")
+    try:
+        mplugin.registerCommand(NodeBatchCmd.kCmdName, NodeBatchCmd.cmdCreator, NodeBatchCmd.cmdSyntaxCreator)
+    except:
+        sys.stderr.write("Failed to register command: %s" % NodeBatchCmd.kCmdName)
+        raise
+
+
+# uninitialize the script plug-in
+def uninitializePlugin(mobject):
+    mplugin = OpenMayaMPx.MFnPlugin(mobject)
+    try:
+        mplugin.deregisterCommand(NodeBatchCmd.kCmdName)
+    except:
+        sys.stderr.write("Failed to deregister command: %s" % NodeBatchCmd.kCmdName)
+        raise
@@ -39,6 +39,20 @@
     -blendWeight or -bwt
     Specifies the blend weight values you would like to query or apply.
     :attention: Only working in command and Query modes
+    
+    -weightBuffer or -wbf
+    Sets the weights of many influences at once from a weight buffer,
+    base64 encoded with japeto.libs.weightBuffer.encodeArgument(), or
+    with weightBuffer.toArgument() for a sparse buffer from
+    weightBuffer.encodeSparse(). The buffer holds the influence indices
+    along with the weights, which are applied with one setWeights call.
+    :attention: Only working in command mode
+    
+    -weightFile or -wfl
+    Same as -weightBuffer, but reads the buffer from a file saved with
+    japeto.libs.weightBuffer.save() or weightBuffer.write(), for buffers
+    bigger than weightBuffer.MAX_ARGUMENT_SIZE
+    :attention: Only working in command mode
 
 :example:
     :Mel:
@@ -49,9 +63,7 @@
         >>> from maya import cmds
         >>> cmds.skinData('pPlane1', wts = (0.2, 0.3), vtx = ("pPlane1.vtx[3]",pPlane1.vtx[5]"), inf = 'joint1')
         >>> cmds.skinData('pPlane1', q = True, wts = True)
-        
-        
-.. todo: Get the command working with multiple influences when assigning weights
+        >>> cmds.skinData('pPlane1', wbf = weightBuffer.encodeArgument(weights, [0, 1, 2]))
 '''
 
 import maya.OpenMaya as OpenMaya
@@ -59,6 +71,8 @@ import maya.OpenMayaMPx as OpenMayaMPx
 import maya.OpenMayaAnim as OpenMayaAnim
 import sys
 
+from japeto.libs import weightBuffer
+
 class SkinDataCmd(OpenMayaMPx.MPxCommand):
     kCmdName = "skinData"
     kInfluenceFlag = '-inf'
@@ -69,6 +83,10 @@ class SkinDataCmd(OpenMayaMPx.MPxCommand):
     kVertIdLongFlag = '-vertex'
     kBlendWeightsFlag = '-bwt'
     kBlendWeightsLongFlag = '-blendWeight'
+    kWeightBufferFlag = '-wbf'
+    kWeightBufferLongFlag = '-weightBuffer'
+    kWeightFileFlag = '-wfl'
+    kWeightFileLongFlag = '-weightFile'
     
     def __init__(self):
         super(SkinDataCmd, self).__init__()
@@ -78,6 +96,7 @@ class SkinDataCmd(OpenMayaMPx.MPxCommand):
         self.__mSelList        = OpenMaya.MSelectionList()
         self.__mVertSelList    = OpenMaya.MSelectionList()
         self.__influenceNames  = list()
+        self.__influenceIndices = OpenMaya.MIntArray()
         self.__weights         = OpenMaya.MDoubleArray()
         self.__blendWeights    = OpenMaya.MDoubleArray()
         self.__oldWeights      = OpenMaya.MDoubleArray()
@@ -91,6 +110,7 @@ class SkinDataCmd(OpenMayaMPx.MPxCommand):
         self.__undoable               = False
         self.__setVertWeights         = False
         self.__setVertBlendWeights    = False
+        self.__setBufferWeights       = False
 
     
     def doIt(self, args):
@@ -127,6 +147,26 @@ class SkinDataCmd(OpenMayaMPx.MPxCommand):
         elif argData.isQuery() and argData.isFlagSet( SkinDataCmd.kBlendWeightsFlag ):
             self.__returnBlendWeights = True
             self.__undoable = False
+        elif argData.isFlagSet( SkinDataCmd.kWeightBufferFlag ) or argData.isFlagSet( SkinDataCmd.kWeightFileFlag ):
+            #unpack all the weights and influence indices at once
+            try:
+                if argData.isFlagSet( SkinDataCmd.kWeightBufferFlag ):
+                    influenceIndices, weights = weightBuffer.decodeArgument(argData.flagArgumentString(SkinDataCmd.kWeightBufferFlag, 0))
+                else:
+                    influenceIndices, weights = weightBuffer.load(argData.flagArgumentString(SkinDataCmd.kWeightFileFlag, 0))
+            except (IOError, ValueError), e:
+                self.displayError(str(e))
+                raise
+            OpenMaya.MScriptUtil.createIntArrayFromList(influenceIndices.tolist(), self.__influenceIndices)
+            OpenMaya.MScriptUtil.createDoubleArrayFromList(weights.tolist(), self.__weights)
+            #add to selectionList for verts
+            if argData.isFlagSet( SkinDataCmd.kVertIdFlag ):
+                for i in range(argData.numberOfFlagUses(SkinDataCmd.kVertIdFlag)):
+                    argList = OpenMaya.MArgList()
+                    argData.getFlagArgumentList(SkinDataCmd.kVertIdFlag, i, argList)
+                    self.__mVertSelList.add(argList.asString(0), i)
+            self.__setBufferWeights = True
+            self.__undoable = True
         elif argData.isFlagSet( SkinDataCmd.kWeightsFlag ) and argData.isFlagSet( SkinDataCmd.kInfluenceFlag):
             #add to doubleArray for weights
             self.__weights.setLength(argData.numberOfFlagUses(SkinDataCmd.kWeightsFlag))
@@ -192,6 +232,8 @@ class SkinDataCmd(OpenMayaMPx.MPxCommand):
             self.getCurrentResult(list())
         elif self.__setVertWeights:
             self.__setWeights(self.__weights, self.__influenceNames, True)
+        elif self.__setBufferWeights:
+            self.__setIndexedWeights(self.__weights, self.__influenceIndices, True)
         elif self.__setVertBlendWeights:
             self.__setBlendWeights(dagPath, components, self.__blendWeights)
 
@@ -199,6 +241,8 @@ class SkinDataCmd(OpenMayaMPx.MPxCommand):
     def undoIt(self):
         if self.__setVertWeights:
             self.__setWeights(self.__oldWeights, self.__getInfluences(), False)
+        elif self.__setBufferWeights:
+            self.__setIndexedWeights(self.__oldWeights, self.__influenceIndices, False)
         elif self.__setVertBlendWeights:
             dagPath, components = self.__getComponents()
             self.__setBlendWeights(dagPath, components, self.__oldBlendWeights)
@@ -319,6 +363,32 @@ class SkinDataCmd(OpenMayaMPx.MPxCommand):
     #SET DATA METHODS
     #--------------------------------------------------------------------
     def __setWeights(self, weights, influences, getOldWeights = False):
+        #Get node names for influences
+        influenceObjects = self.__getInfluences()
+        influenceIndices = OpenMaya.MIntArray()
+        influenceIndices.setLength(len(influences))
+        
+        for i,inf in enumerate(influences):
+            index = influenceObjects.index(inf)
+            influenceIndices.set(index, i)
+        
+        self.__setIndexedWeights(weights, influenceIndices, getOldWeights)
+    
+    def __setIndexedWeights(self, weights, influenceIndices, getOldWeights = False):
+        '''
+        Sets the weights of the influences at influenceIndices with one
+        setWeights call. The weights are vertex after vertex, with one
+        weight for every influence index.
+        
+        :param weights: Weights to set
+        :type weights: *OpenMaya.MDoubleArray*
+        
+        :param influenceIndices: Indices of the influences on the skinCluster
+        :type influenceIndices: *OpenMaya.MIntArray*
+        
+        :param getOldWeights: Store the weights being replaced for undo
+        :type getOldWeights: *bool*
+        '''
         #Create MObject and MDagPath
         if self.__mVertSelList.length() != 0:
             mComponentsObject = OpenMaya.MObject()
@@ -331,15 +401,6 @@ class SkinDataCmd(OpenMayaMPx.MPxCommand):
         if mComponentsObject.apiType() != OpenMaya.MFn.kMeshVertComponent:
             raise TypeError('Selection must Vertices on a mesh')
         
-        #Get node names for influences
-        influenceObjects = self.__getInfluences()
-        influenceIndices = OpenMaya.MIntArray()
-        influenceIndices.setLength(len(influences))
-        
-        for i,inf in enumerate(influences):
-            index = influenceObjects.index(inf)
-            influenceIndices.set(index, i)
-
         if getOldWeights:
             #get the old weights so we can reapply them when we undo.
             #self.__oldWeights = self.__getWeights(self.__mDagPath, mComponentsObject)
@@ -371,6 +432,8 @@ class SkinDataCmd(OpenMayaMPx.MPxCommand):
         syntax.addFlag( cls.kWeightsFlag, cls.kWeightsLongFlag, OpenMaya.MSyntax.kDouble )
         syntax.addFlag( cls.kVertIdFlag, cls.kVertIdLongFlag, OpenMaya.MSyntax.kString  )
         syntax.addFlag( cls.kBlendWeightsFlag, cls.kBlendWeightsLongFlag, OpenMaya.MSyntax.kDouble)
+        syntax.addFlag( cls.kWeightBufferFlag, cls.kWeightBufferLongFlag, OpenMaya.MSyntax.kString)
+        syntax.addFlag( cls.kWeightFileFlag, cls.kWeightFileLongFlag, OpenMaya.MSyntax.kString)
         syntax.makeFlagMultiUse(cls.kWeightsFlag)
         syntax.makeFlagMultiUse(cls.kVertIdFlag)
         syntax.makeFlagMultiUse(cls.kInfluenceFlag)
@@ -20,18 +20,25 @@ from japeto import PLUGINDIR
 #import libs
 from japeto.libs import common
 from japeto.libs import attribute
+from japeto.libs import attributeQueue
 from japeto.libs import joint
 from japeto.libs import control
 from japeto.libs import ordereddict
 from japeto.libs import fileIO
+from japeto.libs import nodeBatch
+from japeto.libs import queryCache
 
 #import components
 from japeto.components import component
 from japeto.mlRig import ml_graph
 from japeto.mlRig import ml_node
 from japeto.mlRig import ml_attribute
+from japeto.mlRig import ml_traversal
+from japeto.mlRig import builder
+from japeto.mlRig import profiler
 
 fileIO.loadPlugin(os.path.join(PLUGINDIR, 'rigNode.py'))
+fileIO.loadPlugin(os.path.join(PLUGINDIR, 'nodeBatchCmd.py'))
 
 class Rig(ml_graph.MlGraph):
     @classmethod
@@ -199,7 +206,7 @@ class Rig(ml_graph.MlGraph):
                 registerData += ',parent = "%s" ' % nodeParent.name()
             #store attributes 
             for attr in node.attributes():
-                if attr.attrType() not in str(ml_attribute.MlAttribute.__attrTypes__):
+                if attr.attrType() in ml_attribute.MlAttribute.__typeSetters__:
                     setAttrTypeData[node.name()] = attr
                 if isinstance(attr.value(), basestring):
                     registerData += ', %s = "%s"' % (attr.name(), attr.value())
@@ -254,6 +261,7 @@ class Rig(ml_graph.MlGraph):
         
         self.__registeredItems = list()
         self.skinClusterJoints = list()
+        self.builder           = builder.Builder(self)
 
     @property
     def _shotCtrl(self):
@@ -348,10 +356,9 @@ class Rig(ml_graph.MlGraph):
             #if there is a searchNode, place the object before or after
             #the given node.
             if searchNode:
-                for node in parent.nodes():
-                    if searchNode == node.name():
-                        index = node.index() + increment
-                        break
+                node = self.getNodeByName(searchNode)
+                if node and node.parent() == parent:
+                    index = node.index() + increment
         
         if not inspect.ismethod (obj) and not inspect.isfunction (obj) and isinstance(obj, component.Component):
             # Check if object is a component
@@ -365,7 +372,7 @@ class Rig(ml_graph.MlGraph):
             node = ml_node.MlNode(obj.__func__.__name__)
             self.addNode(node, parent, index)
             node.niceName = name
-            node.execute = obj
+            node.setFunction(obj)
         elif isinstance(obj,ml_node.MlNode):
             node = self.addNode(obj, parent, index)
             node.disable()
@@ -377,51 +384,189 @@ class Rig(ml_graph.MlGraph):
         
         return
 
-    def setup(self):
+    def dependencies(self, node):
         '''
-        Runs the setup rig for each component registered to the system
+        Returns the nodes the given node needs to run after. That is the
+        node's parent, plus the component that builds the joint the node
+        hooks onto with parentHook.
+        
+        :see: Rig._getHookNode
+        
+        :param node: Node to get the dependencies of
+        :type node: ml_node.MlNode
+        
+        :rtype: list
         '''
-        if self.nodes():
-            for node in self.nodes():
-                if not isinstance(node, component.Component):
-                    continue
-                attrDict = dict()
-                for attr in node.attributes():
-                    attrDict[attr.name()] = attr.value()
-                    
-                node.initialize(**attrDict)
-                node.runSetupRig()
+        dependencies = super(Rig, self).dependencies(node)
+        
+        if isinstance(node, component.Component):
+            hookNode = self._getHookNode(node)
+            if hookNode and hookNode not in dependencies:
+                dependencies.append(hookNode)
+        
+        return dependencies
+    
+    def _attributeChanged(self, node, attribute):
+        '''
+        Components depend on the component that builds their parentHook
+        
+        :see: japeto.mlRig.ml_graph.MlGraph._attributeChanged
+        '''
+        if attribute.name() == 'parentHook':
+            self.invalidateDependents()
+    
+    def _getHookNode(self, node):
+        '''
+        Returns the component that builds the joint the given component
+        hooks onto. Joints recorded on a component from a previous build
+        are used first, then the hook name is matched to the component
+        with the same side and the longest description in the joint name.
+        (i.e. "c_endspine_sc_jnt" is built by "c_spine")
+        
+        :param node: Component with a parentHook
+        :type node: component.Component
+        
+        :rtype: component.Component | None
+        '''
+        #the attribute is what gets edited, the component only gets the
+        #value when it is initialized
+        attr = node.getAttributeByName('parentHook')
+        hook = attr.value() if attr else getattr(node, 'parentHook', None)
+        if not hook or not isinstance(hook, basestring):
+            return None
+        
+        for component in self.components.values():
+            if component is not node and hook in component.skinClusterJnts:
+                return component
+        
+        tokens = hook.split(common.DELIMITER)
+        if len(tokens) < 2:
+            return None
+        
+        match = None
+        matchLength = 0
+        for component in self.components.values():
+            if component is node:
+                continue
+            nameTokens = component.name().split(common.DELIMITER, 1)
+            if len(nameTokens) < 2 or nameTokens[0] != tokens[0]:
+                continue
+            description = nameTokens[1].lower()
+            if description in tokens[1].lower() and len(description) > matchLength:
+                match = component
+                matchLength = len(description)
+        
+        return match
+    
+    def _initializeComponent(self, node):
+        '''
+        Initializes the component with the values of its attributes
+        '''
+        attrDict = dict()
+        for attr in node.attributes():
+            attrDict[attr.name()] = attr.value()
+            
+        node.initialize(**attrDict)
+
+    def _restoreNode(self, node, attributes):
+        '''
+        Sets up a node loaded from a snapshot the same way register() does.
+        Components are initialized with the saved attributes, and enabled
+        nodes get the method on the rig with the same name as their function.
+
+        :see: japeto.mlRig.ml_graph.MlGraph._restoreNode
+        '''
+        attributes = attributes()
+        if isinstance(node, component.Component):
+            node.initialize(**dict([(name, value) for name, attrType, value in attributes]))
+            for name, attrType, value in attributes:
+                attr = node.getAttributeByName(name)
+                if attr:
+                    attr.setAttrType(attrType)
+            self.components[node.niceName] = node
+            return
+
+        function = getattr(self, node.name(), None)
+        if node.active() and callable(function):
+            node.setFunction(function)
+        node._restoreAttributes(attributes)
+
+    def load(self, filepath, lazy = False):
+        '''
+        Loads the nodes from a snapshot file onto the rig. The whole rig
+        is loaded by default since building it needs every component.
+
+        :see: japeto.mlRig.snapshot.load
+        '''
+        return super(Rig, self).load(filepath, lazy)
+
+    def setup(self):
+        '''
+        Runs the setup rig for each component registered to the system that
+        is dirty.
+        
+        :see: japeto.mlRig.builder.Builder.execute
+        
+        :return: What ran and what was skipped, and the scene queries in
+                 report.queries. Nothing is printed, print report.log()
+                 for it and see builder.criticalPath() for the slowest
+                 chain of components.
+        :rtype: builder.BuildReport
+        '''
+        #names are checked against one snapshot of the scene, and scene
+        #queries are cached for the stage
+        with common.nameRegistry(), queryCache.cached() as cache:
+            report = self.builder.execute('runSetupRig',
+                                          ml_traversal.filterByClass(self.iterNodes(), component.Component),
+                                          prepare = self._initializeComponent)
+        report.queries = cache.report()
+        return report
                 
     def run(self):
         '''
         build each individual component, or function in the order it was
-        registered to the build
+        registered to the build. Only dirty components are built.
+        
+        :see: japeto.mlRig.builder.Builder.execute
+        
+        :return: What ran and what was skipped, and the scene queries in
+                 report.queries. Nothing is printed, print report.log()
+                 for it and see builder.criticalPath() for the slowest
+                 chain of components.
+        :rtype: builder.BuildReport
         '''
-
         #loops through components and runs their runRig function
-        if self.nodes():
-            for node in self.nodes():
-                if not isinstance(node, component.Component):
-                    continue
-                node.runRig()
-                if node.controls:
-                    for ctrls in node.controls.values():
-                        for ctrl in ctrls:
-                            if ctrl not in self.controls:
-                                self.controls.append(ctrl)
-                            #end if
-                        #end loop
+        with common.nameRegistry(), queryCache.cached() as cache:
+            report = self.builder.execute('runRig',
+                                          ml_traversal.filterByClass(self.iterNodes(), component.Component),
+                                          clean = True)
+        
+        #skipped components keep what they built last time
+        for node in ml_traversal.filterByClass(self.iterNodes(), component.Component):
+            if node.controls:
+                for ctrls in node.controls.values():
+                    for ctrl in ctrls:
+                        if ctrl not in self.controls:
+                            self.controls.append(ctrl)
+                        #end if
                     #end loop
-                    for jnt in node.skinClusterJnts:
-                        if jnt not in self.skinClusterJoints:
-                                self.skinClusterJoints.append(jnt)
+                #end loop
+                for jnt in node.skinClusterJnts:
+                    if jnt not in self.skinClusterJoints:
+                            self.skinClusterJoints.append(jnt)
+        
+        report.queries = cache.report()
+        return report
 
     def newScene(self):
         '''
         creates a fresh scene to start building an asset
         '''
         cmds.file(new = True, force = True)
+        #nothing has been built in the new scene
+        self.setDirty(True)
 
+    @profiler.profiled
     def preBuild(self):
         '''
         sets up the hierachry
@@ -432,11 +577,13 @@ class Rig(ml_graph.MlGraph):
         
         if common.isValid(self.rigGrp):
             return True
-        #create hierachy
-        cmds.createNode('rig', n = self.rigGrp)
-        cmds.createNode('transform', n = self.noXformGrp)
-        cmds.createNode('transform', n = self.jointsGrp)
-        cmds.createNode('transform', n = self.controlsGrp)
+        #create hierachy, with inherit transforms off on the noXformGrp
+        with nodeBatch.batch() as nodes:
+            rigGrp = nodes.createNode('rig', self.rigGrp)
+            nodes.createNode('transform', self.noXformGrp, parent = rigGrp,
+                             attributes = {'inheritsTransform' : 0})
+            nodes.createNode('transform', self.jointsGrp, parent = rigGrp)
+            nodes.createNode('transform', self.controlsGrp, parent = rigGrp)
 
         #create shot and trs controls
         control.create(self._shotCtrl.replace('_%s' % common.CONTROL, ''),
@@ -452,13 +599,9 @@ class Rig(ml_graph.MlGraph):
         cmds.delete([shotZero, trsZero])
         #cmds.createNode('transform', n = self.modelGroup)
 
-        cmds.parent([self.noXformGrp, self.jointsGrp, self.controlsGrp], self.rigGrp)
-
-        #turn off inherit transforms on the noXformGrp
-        cmds.setAttr('%s.inheritsTransform' % self.noXformGrp, 0)
-
         self.controls.extend([self._shotCtrl, self._trsCtrl])
 
+    @profiler.profiled
     def build(self):
         '''
         build rig hierarchy and attach components
@@ -468,6 +611,13 @@ class Rig(ml_graph.MlGraph):
             self.preBuild()
             self.run()
 
+        with queryCache.cached():
+            self._attachComponents()
+
+    def _attachComponents(self):
+        '''
+        parents the controls and joints of every component under the rig
+        '''
         for node in self.nodes():
             if not isinstance(node, component.Component):
                 continue
@@ -475,7 +625,7 @@ class Rig(ml_graph.MlGraph):
             if not common.isValid(node.rigGrp):
                 node.runRig()
             
-            trsChildren = cmds.listRelatives(self._trsCtrl,c = True)
+            trsChildren = common.getChildren(self._trsCtrl) or list()
             if node.controlsGrp in trsChildren:
                 continue
             cmds.parent(node.controlsGrp, self._trsCtrl)
@@ -501,36 +651,39 @@ class Rig(ml_graph.MlGraph):
         #end loop
 
 
+    @profiler.profiled
     def postBuild(self):
         '''
         clean up rig asset
         
         .. todo: Finish complete cleanup of the rig
         '''
-        #create nodes on the rigGrp node
-        tagControlsAttr = control.tag_as_control(self.rigGrp)
-        cmds.addAttr(self.rigGrp, ln = 'deform_joints', at = 'message')
-        tagJointsAttr  = '%s.deform_joints' % self.rigGrp
+        #attribute edits are queued and flushed together
+        with attributeQueue.queued():
+            #create nodes on the rigGrp node
+            tagControlsAttr = control.tag_as_control(self.rigGrp)
+            cmds.addAttr(self.rigGrp, ln = 'deform_joints', at = 'message')
+            tagJointsAttr  = '%s.deform_joints' % self.rigGrp
+
+            if self.controls:
+                for ctrl in self.controls:
+                    attribute.connect(tagControlsAttr, '%s.%s' % (ctrl, tagControlsAttr.split('.')[1]))
+                #end loop
+            #end if
 
-        if self.controls:
-            for ctrl in self.controls:
-                attribute.connect(tagControlsAttr, '%s.%s' % (ctrl, tagControlsAttr.split('.')[1]))
-            #end loop
-        #end if
+            if self.skinClusterJoints:
+                for jnt in self.skinClusterJoints:
+                    if common.isValid(jnt):
+                        cmds.addAttr(jnt, ln = 'deform_joints', at = 'message')
+                        attribute.connect(tagJointsAttr, '%s.deform_joints' % jnt)
+                    #end if
+                #end loop
+            #end if
 
-        if self.skinClusterJoints:
-            for jnt in self.skinClusterJoints:
-                if common.isValid(jnt):
-                    cmds.addAttr(jnt, ln = 'deform_joints', at = 'message')
-                    attribute.connect(tagJointsAttr, '%s.deform_joints' % jnt)
-                #end if
-            #end loop
-        #end if
+            #lock and hide attributes
+            attribute.lockAndHide(['s', 'v'], [self._shotCtrl, self._trsCtrl])
+            attribute.lockAndHide(['t', 'r', 's', 'v'], self.rigGrp)
 
-        #lock and hide attributes
-        attribute.lockAndHide(['s', 'v'], [self._shotCtrl, self._trsCtrl])
-        attribute.lockAndHide(['t', 'r', 's', 'v'], self.rigGrp)
-        
         #clear selection
         cmds.select(cl = True)
 
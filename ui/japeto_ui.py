@@ -16,6 +16,8 @@ from japeto.templates import rig
 from japeto.components import component
 from japeto.ui import widgets, models
 from japeto.mlRig import ml_graph
+from japeto.mlRig import ml_traversal
+from japeto.mlRig import builder
 reload(models)
 
 #import maya modules
@@ -27,6 +29,18 @@ from maya import cmds
 #sip module
 import sip
 
+#attribute type : (field class, extra keyword arguments for the field)
+FIELD_TYPES = {'vector' : (fields.VectorField, dict()),
+               'str'    : (fields.LineEditField, dict()),
+               'bool'   : (fields.BooleanField, dict()),
+               'int'    : (fields.IntField, dict()),
+               'long'   : (fields.IntField, dict()),
+               'float'  : (fields.IntField, dict()),
+               'list'   : (fields.ListField, dict()),
+               'code'   : (fields.TextEditField, dict()),
+               'file'   : (fields.FileBrowserField, {'filter' : ''}),
+               'dir'    : (fields.DirBrowserField, dict())}
+
 def getMayaWindow():
     #Get the maya main window as a QMainWindow instance
     ptr = OpenMayaUI.MQtUtil.mainWindow()
@@ -37,6 +51,9 @@ class CentralTabWidget(QtGui.QTabWidget):
     def __init__(self, graph = ml_graph.MlGraph('null'), parent = None):
         super(CentralTabWidget, self).__init__(parent)
         self._graph = graph
+        self._builder = builder.Builder(self._graph)
+        #nodes have to run again in a new scene
+        self._builder.addSceneCallbacks()
         
         #-------------------------------------------------
         #SETUP TAB
@@ -194,19 +211,21 @@ class CentralTabWidget(QtGui.QTabWidget):
             node.execute()
             
     def _runSetup(self):
-        for rootNode in self._model._rootNode.children():
-            rootNode.runSetupRig()
-            for node in rootNode.descendants():
-                self._initializeNode(node)
-                node.runSetupRig()
-                
+        '''
+        Runs the setup on every dirty node in the graph
+        '''
+        report = self._builder.execute('runSetupRig', prepare = self._initializeNode)
+        print report.log()
+                    
     def _runSetupFromSelected(self):
         startNode = self._selectedNode()
-        self._initializeNode(startNode)
-        startNode.runSetupRig()
-        for node in startNode.descendants():
-            self._initializeNode(node)
-            node.runSetupRig()
+        if not startNode:
+            return
+        
+        report = self._builder.execute('runSetupRig',
+                                       ml_traversal.preOrder(startNode),
+                                       prepare = self._initializeNode)
+        print report.log()
                     
     def _runSelectedSetup(self):
         '''
@@ -215,24 +234,29 @@ class CentralTabWidget(QtGui.QTabWidget):
         node = self._selectedNode()
         
         if node:
-            self._initializeNode(node)
-            node.runSetupRig()
+            self._builder.execute('runSetupRig', [node],
+                                  prepare = self._initializeNode,
+                                  force = True)
             
     def _runBuild(self):
-        for rootNode in self._model._rootNode.children():
-            self._initializeNode(rootNode)
-            rootNode.runRig()
-            for node in rootNode.descendants():
-                self._initializeNode(node)
-                node.runRig()
+        '''
+        Runs the build on every dirty node in the graph
+        '''
+        report = self._builder.execute('runRig',
+                                       prepare = self._initializeNode,
+                                       clean = True)
+        print report.log()
                 
     def _runBuildFromSelected(self):
         startNode = self._selectedNode()
-        self._initializeNode(startNode)
-        startNode.runRig()
-        for node in startNode.descendants():
-            self._initializeNode(node)
-            node.runRig()
+        if not startNode:
+            return
+        
+        report = self._builder.execute('runRig',
+                                       ml_traversal.preOrder(startNode),
+                                       prepare = self._initializeNode,
+                                       clean = True)
+        print report.log()
                     
     def _runSelectedBuild(self):
         '''
@@ -241,8 +265,10 @@ class CentralTabWidget(QtGui.QTabWidget):
         node = self._selectedNode()
         
         if node:
-            self._initializeNode(node)
-            node.runRig()
+            self._builder.execute('runRig', [node],
+                                  prepare = self._initializeNode,
+                                  clean = True,
+                                  force = True)
             
     def _addItemToGraph(self):
         '''
@@ -326,24 +352,10 @@ class CentralTabWidget(QtGui.QTabWidget):
 
         #go through the attributes on the node and create appropriate field
         for attr in node.attributes():
-            if attr.name() == 'position':
-                field = fields.VectorField(attr.name(), value = attr.value(), attribute = attr)
-            elif attr.attrType() == "str":
-                field = fields.LineEditField(attr.name(), value = str(attr.value()), attribute = attr)
-            elif attr.attrType() == "bool":
-                field = fields.BooleanField(attr.name(), value = attr.value(), attribute = attr)
-            elif attr.attrType() == "int":
-                field = fields.IntField(attr.name(), value = attr.value(), attribute = attr)
-            elif attr.attrType() == "float":
-                field = fields.IntField(attr.name(), value = attr.value(), attribute = attr)
-            elif attr.attrType() == "list":
-                field = fields.ListField(attr.name(), value = attr.value(), attribute = attr)
-            elif attr.attrType() == "code":
-                field = fields.TextEditField(attr.name(), value = attr.value(), attribute = attr)
-            elif attr.attrType() == "file":
-                field = fields.FileBrowserField(label = attr.name(), filter = "",value = attr.value(), attribute = attr)
-            elif attr.attrType() == "dir":
-                field = fields.DirBrowserField(label = attr.name(), value = attr.value(), attribute = attr)
+            fieldClass, kwargs = FIELD_TYPES.get(attr.attrType(), (None, None))
+            if not fieldClass:
+                continue
+            field = fieldClass(label = attr.name(), value = attr.value(), attribute = attr, **kwargs)
             
             #add the field to the layout
             self._setupAttrsLayout.addWidget(field)
@@ -425,6 +437,14 @@ class JapetoWindow(QtGui.QMainWindow):
         self.setMinimumSize(880,550)
         self.setMaximumSize(1000, 1200)
         
+    def showEvent(self, event):
+        self.centralWidget()._builder.addSceneCallbacks()
+        super(JapetoWindow, self).showEvent(event)
+        
+    def closeEvent(self, event):
+        self.centralWidget()._builder.removeSceneCallbacks()
+        super(JapetoWindow, self).closeEvent(event)
+        
     def _loadTemplate(self):
         '''
         Load all the templates into the dialog
@@ -469,6 +489,7 @@ class JapetoWindow(QtGui.QMainWindow):
                                                       templateName,
                                                       eval('%s.%s' % (parentTemplate,parentTemplate.capitalize()))) 
             tabWidget._graph.initialize()
+            tabWidget._builder.setGraph(tabWidget._graph)
             tabWidget._model = models.LayerGraphModel(tabWidget._graph)
             tabWidget._proxyModel.setSourceModel(tabWidget._model)
             tabWidget._setupTreeView.setModel(tabWidget._proxyModel)
@@ -492,6 +513,7 @@ class JapetoWindow(QtGui.QMainWindow):
             tabWidget._graph = data[template.title()](template)
             del(data) #<-- delete globals data
             tabWidget._graph.initialize()
+            tabWidget._builder.setGraph(tabWidget._graph)
             tabWidget._model = models.LayerGraphModel(tabWidget._graph)
             tabWidget._proxyModel.setSourceModel(tabWidget._model)
             tabWidget._setupTreeView.setModel(tabWidget._proxyModel)
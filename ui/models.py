@@ -271,13 +271,7 @@ class LayerGraphModel(QtCore.QAbstractItemModel):
         while not stream.atEnd():
             variant = QtCore.QVariant()
             stream >> variant # extract
-            name = variant
-            node = None
-            
-            for node in self._rootNode.descendants():
-                if name == node.name():
-                    node = node 
-                    break
+            node = self._graph.getNodeByName(str(variant.toString()))
                 
             if not node:
                 break